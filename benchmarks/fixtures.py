@@ -0,0 +1,241 @@
+"""
+inputs for the offline benchmarks: records rebuilt from the GitHub payloads saved
+in sample_objects_and_output/, and synthetic PRs, issues, report tuples and PR
+discussion pages of any size built from them.  Synthetic inputs are seeded, so
+every run measures the same data.
+"""
+import ast
+import datetime
+import json
+import os
+import random
+import re
+
+from pr_records import BranchRef
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+from pr_records import UserRef
+
+sample_directory = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "sample_objects_and_output",
+)
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+developer_ids = ["ambv"]
+other_ids = ["zooba", "vstinner", "tiran", "pablogsal", "erlend-aasland"]
+branches = ["main", "main", "main", "3.10", "3.9", "3.8"]
+
+
+def _sample_path(filename: str) -> str:
+    return os.path.join(sample_directory, filename)
+
+
+def _dump_fields(filename: str) -> dict:
+    """`name = {type} value` lines of a debugger dump of a PyGithub object"""
+    fields = {}
+    with open(_sample_path(filename), encoding="utf-8") as reader:
+        for line in reader:
+            field_match = re.match(r" (\w+) = \{(\w+)\} (.*)$", line.rstrip("\n"))
+            if field_match:
+                fields[field_match[1]] = (field_match[2], field_match[3])
+    return fields
+
+
+def _dump_value(field: tuple):
+    kind, value = field
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(value)
+    if kind == "NamedUser":
+        return UserRef(re.search(r'login="([^"]*)"', value)[1])
+    if kind in ("str", "int", "bool"):
+        return ast.literal_eval(value)
+    return None  # NoneType, and objects the records don't need
+
+
+def branch_of_title(title: str) -> str:
+    """backport PRs are titled `[3.10] ...`; the dumps don't include base.ref"""
+    branch_match = re.match(r"\[(\d\.\d+)\]", title)
+    return branch_match[1] if branch_match else "main"
+
+
+def recorded_pull_requests() -> list:
+    """PullRequestRecord for each PR dump in sample_objects_and_output"""
+    records = []
+    for filename in sorted(os.listdir(sample_directory)):
+        if not filename.startswith("sample_pr_originated_by_"):
+            continue
+        fields = {
+            name: _dump_value(field)
+            for name, field in _dump_fields(filename).items()
+            if name in PullRequestRecord.__slots__
+        }
+        records.append(
+            PullRequestRecord(
+                **{
+                    name: fields.get(name)
+                    for name in PullRequestRecord.__slots__
+                    if name not in ("base", "discussion_authors")
+                },
+                base=BranchRef(branch_of_title(fields["title"])),
+                discussion_authors={fields["user"].login, fields["merged_by"].login},
+            )
+        )
+    return records
+
+
+def recorded_report_items() -> list:
+    """report tuples saved from an issue report run"""
+    with open(
+        _sample_path("sample_output_issues.raw..txt"), encoding="utf-8"
+    ) as reader:
+        return [ast.literal_eval(line) for line in reader if line.startswith("(")]
+
+
+def recorded_titles() -> list[str]:
+    """PR and issue titles from the saved reports, without branch prefixes"""
+    titles = [title for *_, title in recorded_report_items()]
+    with open(
+        _sample_path("sample_pr_output.2021.08.30-2021.09.05.txt"), encoding="utf-8"
+    ) as reader:
+        titles += re.findall(r"</a>\s+\[[^\]]+\] (.*)/li>", reader.read())
+    return sorted({re.sub(r"^\[[^\]]+\] ", "", title) for title in titles})
+
+
+def recorded_discussion_text() -> str:
+    """issue events payload, rendered as `login event` lines like a PR page"""
+    with open(_sample_path("sample_issue_events_url.json"), encoding="utf-8") as reader:
+        events = json.load(reader)
+    return "\n".join(
+        f"{event['actor']['login']} {event['event'].replace('_', ' ')} this"
+        for event in events
+    )
+
+
+def synthetic_pull_requests(count: int, seed: int = 0) -> list:
+    """count PR records, most recently updated first; about half fall in the
+    report window and a quarter involve our developers
+
+    Args:
+      count: number of PRs
+      seed: random seed
+
+    Returns:
+        list of PullRequestRecord
+
+    """
+    generator = random.Random(seed)
+    titles = recorded_titles()
+    window = end_date - start_date
+    records = []
+    for position in range(count):
+        # newest first, spread over twice the window, ending past end_date
+        updated_at = end_date + window - (2 * window * position) / count
+        created_at = updated_at - datetime.timedelta(hours=generator.randint(1, 240))
+        merged = generator.random() < 0.4
+        closed = merged or generator.random() < 0.2
+        author = generator.choice(developer_ids + other_ids + other_ids)
+        branch = generator.choice(branches)
+        title = generator.choice(titles)
+        number = 30000 + count - position
+        records.append(
+            PullRequestRecord(
+                number=number,
+                title=title if branch == "main" else f"[{branch}] {title}",
+                html_url=f"https://github.com/python/cpython/pull/{number}",
+                state="closed" if closed else "open",
+                created_at=created_at,
+                updated_at=updated_at,
+                closed_at=updated_at if closed else None,
+                merged_at=updated_at if merged else None,
+                merged=merged,
+                merged_by=UserRef(generator.choice(developer_ids + other_ids))
+                if merged
+                else None,
+                user=UserRef(author),
+                comments=generator.randint(0, 12),
+                base=BranchRef(branch),
+                discussion_authors=set(
+                    generator.sample(developer_ids + other_ids, generator.randint(0, 3))
+                ),
+            )
+        )
+    return records
+
+
+def synthetic_issues(count: int, seed: int = 0) -> list:
+    """count issue records updated around the report window
+
+    Args:
+      count: number of issues
+      seed: random seed
+
+    Returns:
+        list of IssueRecord, most recently updated first
+
+    """
+    generator = random.Random(seed)
+    titles = recorded_titles()
+    window = end_date - start_date
+    issues = []
+    for position in range(count):
+        updated_at = end_date + window - (2 * window * position) / count
+        closed = generator.random() < 0.5
+        number = 45000 + count - position
+        issues.append(
+            IssueRecord(
+                number=number,
+                title=generator.choice(titles),
+                url=f"https://api.github.com/repos/python/cpython/issues/{number}",
+                html_url=f"https://github.com/python/cpython/issues/{number}",
+                state="closed" if closed else "open",
+                user=UserRef(generator.choice(developer_ids + other_ids)),
+                closed_by=UserRef(generator.choice(developer_ids + other_ids))
+                if closed
+                else None,
+                created_at=updated_at - datetime.timedelta(days=1),
+                updated_at=updated_at,
+                closed_at=updated_at if closed else None,
+            )
+        )
+    return issues
+
+
+def synthetic_report_items(count: int, seed: int = 0) -> list:
+    """count unsorted report tuples shaped like summarize_pr_info output"""
+    generator = random.Random(seed)
+    titles = recorded_titles()
+    items = []
+    for position in range(count):
+        timestamp = start_date + datetime.timedelta(
+            seconds=generator.randrange(7 * 24 * 3600)
+        )
+        branch = generator.choice(branches)
+        action = generator.choice(("merged", "authored", "closed", "reviewed"))
+        items.append(
+            (
+                f"{timestamp}",
+                generator.choice(("PR", "PR", "Issue")),
+                action,
+                f"{branch:>6}",
+                f"<a href=https://github.com/python/cpython/pull/{position}>"
+                f"{action} GH-{position}</a>",
+                f"[{branch}] {generator.choice(titles)}",
+            )
+        )
+    return items
+
+
+def synthetic_discussion_text(lines: int, seed: int = 0) -> str:
+    """PR page text with `lines` lines, a few of them developer activity"""
+    generator = random.Random(seed)
+    titles = recorded_titles()
+    phrases = ("approved these changes", "left a comment", "commented", "closed this")
+    text = []
+    for _ in range(lines):
+        if generator.random() < 0.05:
+            login = generator.choice(developer_ids + other_ids)
+            text.append(f"{login} {generator.choice(phrases)} 3 days ago")
+        else:
+            text.append(generator.choice(titles))
+    return "\n".join(text)
@@ -0,0 +1,471 @@
+"""
+offline CPU benchmarks for the classify / sort / render pipeline - no GitHub access
+
+each case runs on the recorded samples in sample_objects_and_output/ and on
+synthetic inputs of 1k, 10k and 100k items.  Each measurement calls the stage
+until at least min_measure_seconds have passed, so even the microsecond cases on
+recorded samples are timed over many calls; the best of --repeat measurements
+gives the throughput, a separate tracemalloc run gives peak memory, and the
+change in time between sizes shows how each stage scales (1.0 is linear).
+Logging and garbage collection are switched off while timing, so the numbers are
+the CPU cost of the code itself.
+
+a fixed pure Python loop is timed next to every measurement and saved with it;
+comparisons scale the baseline by how much slower that loop ran in this run
+than in the baseline's (the median over all measurements of each run, so one
+busy moment doesn't skew every case), so a baseline saved on another machine
+still compares fairly
+
+run from the repo root, e.g.:
+    python benchmarks/run_benchmarks.py                 # compare with baseline
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --cases sort_final_data
+a case more than --tolerance slower than its baseline, and still slower when
+measured again, is a regression; the run then exits with status 1
+"""
+import argparse
+import datetime
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import typing
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
+
+import config  # noqa: E402
+import fixtures  # noqa: E402
+from activity_matcher import ActivityMatcher  # noqa: E402
+from weekly_issues_summary import filter_issues  # noqa: E402
+from weekly_pr_summary import append_report_data  # noqa: E402
+from weekly_pr_summary import check_for_interesting_dates  # noqa: E402
+from weekly_pr_summary import filter_prs_from_date_range  # noqa: E402
+from weekly_pr_summary import format_final_html_block  # noqa: E402
+from weekly_pr_summary import sort_final_data  # noqa: E402
+from weekly_pr_summary import summarize_pr_info  # noqa: E402
+
+baseline_path = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+default_sizes = [1000, 10000, 100000]
+end_date_buffer: int = 2
+min_measure_seconds: float = 0.2  # shortest timed stretch per measurement
+
+
+class Case(typing.NamedTuple):
+    """one benchmarked stage
+
+    recorded and synthetic build the stage's inputs, as a tuple of arguments,
+    from the samples (None when nothing was recorded) or for a given number of
+    items; run executes the stage
+    """
+
+    name: str
+    recorded: typing.Callable[[], tuple] | None
+    synthetic: typing.Callable[[int], tuple]
+    run: typing.Callable
+
+
+def _check_dates(pull_requests):
+    end_with_buffer = fixtures.end_date + datetime.timedelta(days=end_date_buffer)
+    for pull_request in pull_requests:
+        check_for_interesting_dates(pull_request, fixtures.start_date, end_with_buffer)
+
+
+def _filter_prs(pull_requests):
+    filter_prs_from_date_range(
+        pull_requests, fixtures.developer_ids, fixtures.start_date, fixtures.end_date
+    )
+
+
+def _summarize(pull_requests):
+    # every fourth PR counts as reviewed
+    reviewed = [pull_request.number for pull_request in pull_requests[::4]]
+    summarize_pr_info(
+        pull_requests,
+        reviewed,
+        fixtures.developer_ids,
+        fixtures.start_date,
+        fixtures.end_date,
+    )
+
+
+def _append(pull_requests):
+    report_data = []
+    for pull_request in pull_requests:
+        append_report_data(report_data, pull_request, "merged", pull_request.updated_at)
+
+
+def _filter_issues(issues):
+    filter_issues(
+        issues,
+        fixtures.developer_ids,
+        fixtures.start_date,
+        fixtures.end_date,
+        end_date_buffer,
+    )
+
+
+def _match_activity(matcher, text):
+    matcher.find(text)
+
+
+def _matcher_inputs(text: str) -> tuple:
+    return ActivityMatcher(fixtures.developer_ids + fixtures.other_ids), text
+
+
+cases = [
+    Case(
+        "check_for_interesting_dates",
+        lambda: (fixtures.recorded_pull_requests(),),
+        lambda size: (fixtures.synthetic_pull_requests(size),),
+        _check_dates,
+    ),
+    Case(
+        "filter_prs_from_date_range",
+        lambda: (fixtures.recorded_pull_requests(),),
+        lambda size: (fixtures.synthetic_pull_requests(size),),
+        _filter_prs,
+    ),
+    Case(
+        "summarize_pr_info",
+        lambda: (fixtures.recorded_pull_requests(),),
+        lambda size: (fixtures.synthetic_pull_requests(size),),
+        _summarize,
+    ),
+    Case(
+        "append_report_data",
+        lambda: (fixtures.recorded_pull_requests(),),
+        lambda size: (fixtures.synthetic_pull_requests(size),),
+        _append,
+    ),
+    Case(
+        "sort_final_data",
+        lambda: (fixtures.recorded_report_items(),),
+        lambda size: (fixtures.synthetic_report_items(size),),
+        sort_final_data,
+    ),
+    Case(
+        "format_final_html_block",
+        lambda: (sort_final_data(fixtures.recorded_report_items()),),
+        lambda size: (sort_final_data(fixtures.synthetic_report_items(size)),),
+        format_final_html_block,
+    ),
+    Case(
+        "filter_issues",
+        None,  # no issue payloads were recorded
+        lambda size: (fixtures.synthetic_issues(size),),
+        _filter_issues,
+    ),
+    Case(
+        "activity_matcher",
+        lambda: _matcher_inputs(fixtures.recorded_discussion_text()),
+        # size is the number of lines on the PR page
+        lambda size: _matcher_inputs(fixtures.synthetic_discussion_text(size)),
+        _match_activity,
+    ),
+]
+
+
+def time_per_call(run, arguments: tuple, min_seconds: float) -> float:
+    """average seconds per call, calling run until min_seconds have passed"""
+    calls = 0
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while True:
+            run(*arguments)
+            calls += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_seconds:
+                return elapsed / calls
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _calibration_loop():
+    total = 0
+    for number in range(100000):
+        total += number % 7
+    return total
+
+
+def measure(
+    run, arguments: tuple, repeat: int, min_seconds: float = min_measure_seconds
+) -> dict:
+    """best time per call of repeat measurements, the calibration loop timed
+    the same way right before, and peak memory of one more traced run
+
+    Args:
+      run: stage to measure
+      arguments: inputs of the stage
+      repeat: timed measurements
+      min_seconds: shortest timed stretch of each measurement
+
+    Returns:
+        dict with seconds, calibration_seconds and peak_bytes
+
+    """
+    calibration = min(
+        time_per_call(_calibration_loop, (), min_seconds) for _ in range(repeat)
+    )
+    seconds = min(time_per_call(run, arguments, min_seconds) for _ in range(repeat))
+
+    tracemalloc.start()
+    run(*arguments)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "calibration_seconds": calibration,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def input_size(arguments: tuple) -> int:
+    """items in a stage's main input; lines for PR page text"""
+    main_input = arguments[-1]
+    if isinstance(main_input, str):
+        return main_input.count("\n") + 1
+    return len(main_input)
+
+
+def run_suite(
+    sizes: list[int] = default_sizes,
+    repeat: int = 3,
+    names: list[str] = None,
+    min_seconds: float = min_measure_seconds,
+) -> dict:
+    """measures every selected case on recorded and synthetic inputs
+
+    Args:
+      sizes: synthetic input sizes
+      repeat: timed measurements per case and input
+      names: cases to run, default all
+      min_seconds: shortest timed stretch of each measurement
+
+    Returns:
+        dict of case name to dict of size label ("recorded" or the size as a
+        str) to measurement, with items and items_per_second added
+
+    """
+    config.configure(
+        developer_ids=fixtures.developer_ids,
+        start_date=fixtures.start_date,
+        end_date=fixtures.end_date,
+        end_date_buffer=end_date_buffer,
+        cache_dir="",
+    )
+    logging.disable(logging.CRITICAL)
+    results = {}
+    try:
+        for case in cases:
+            if names and case.name not in names:
+                continue
+            inputs = [(str(size), case.synthetic(size)) for size in sizes]
+            if case.recorded is not None:
+                inputs.insert(0, ("recorded", case.recorded()))
+            results[case.name] = {}
+            for label, arguments in inputs:
+                measurement = measure(case.run, arguments, repeat, min_seconds)
+                measurement["items"] = input_size(arguments)
+                measurement["items_per_second"] = measurement["items"] / max(
+                    measurement["seconds"], 1e-9
+                )
+                results[case.name][label] = measurement
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def scaling_exponents(case_results: dict) -> dict:
+    """time growth between consecutive synthetic sizes: log(t2/t1) / log(n2/n1)
+
+    1.0 is linear, 2.0 quadratic; recorded inputs are left out
+    """
+    sized = sorted(
+        (measurement["items"], measurement["seconds"])
+        for label, measurement in case_results.items()
+        if label != "recorded"
+    )
+    exponents = {}
+    for (size, seconds), (next_size, next_seconds) in zip(sized, sized[1:]):
+        if size and seconds and next_size != size:
+            exponents[str(next_size)] = math.log(next_seconds / seconds) / math.log(
+                next_size / size
+            )
+    return exponents
+
+
+def calibration_seconds(results: dict) -> float | None:
+    """median time of the calibration loop over all measurements of a run;
+    None for results saved without calibration"""
+    timings = [
+        measurement["calibration_seconds"]
+        for case_results in results.values()
+        for measurement in case_results.values()
+        if measurement.get("calibration_seconds")
+    ]
+    return statistics.median(timings) if timings else None
+
+
+def expected_seconds(results: dict, baseline: dict, name: str, label: str) -> float:
+    """baseline seconds of a measurement, scaled by how much slower the
+    calibration loop ran in this run than in the baseline's; unscaled when
+    either was saved without calibration"""
+    reference_seconds = baseline[name][label]["seconds"]
+    calibration = calibration_seconds(results)
+    reference_calibration = calibration_seconds(baseline)
+    if not calibration or not reference_calibration:
+        return reference_seconds
+    return reference_seconds * calibration / reference_calibration
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """measurements slower than the scaled baseline * (1 + tolerance)
+
+    Args:
+      results: from run_suite
+      baseline: results saved earlier with --save-baseline
+      tolerance: allowed slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list of (case name, size label, seconds, scaled baseline seconds)
+
+    """
+    regressions = []
+    for name, case_results in results.items():
+        for label, measurement in case_results.items():
+            if not baseline.get(name, {}).get(label):
+                continue
+            expected = expected_seconds(results, baseline, name, label)
+            if measurement["seconds"] > expected * (1 + tolerance):
+                regressions.append((name, label, measurement["seconds"], expected))
+    return regressions
+
+
+def remeasure(results: dict, regressions: list, repeat: int) -> dict:
+    """measures regressed cases once more and keeps the faster measurement of
+    each; a busy stretch of the machine slows one measurement, a slower stage
+    slows both
+
+    Args:
+      results: from run_suite, updated in place
+      regressions: from compare_with_baseline
+      repeat: timed measurements per case and input
+
+    Returns:
+        results
+
+    """
+    for name in {regression[0] for regression in regressions}:
+        labels = {label for regressed, label, *_ in regressions if regressed == name}
+        sizes = [int(label) for label in labels if label != "recorded"]
+        retry = run_suite(sizes, repeat, [name])[name]
+        for label in labels:
+            if retry[label]["seconds"] < results[name][label]["seconds"]:
+                results[name][label] = retry[label]
+    return results
+
+
+def format_results(results: dict, baseline: dict) -> list[str]:
+    """table of time, throughput, peak memory, scaling and change to the scaled
+    baseline"""
+    lines = [
+        f"{'case':<28} {'input':>9} {'items':>7} {'seconds':>9} {'items/s':>11} "
+        f"{'peak MiB':>9} {'scaling':>7} {'vs base':>8}"
+    ]
+    for name, case_results in results.items():
+        exponents = scaling_exponents(case_results)
+        for label, measurement in case_results.items():
+            reference = baseline.get(name, {}).get(label)
+            change = f"{'':>8}"
+            if reference and reference["seconds"]:
+                expected = expected_seconds(results, baseline, name, label)
+                change = f"{measurement['seconds'] / expected - 1:+8.0%}"
+            exponent = exponents.get(str(measurement["items"]))
+            lines.append(
+                f"{name:<28} {label:>9} {measurement['items']:>7} "
+                f"{measurement['seconds']:>9.4f} "
+                f"{measurement['items_per_second']:>11,.0f} "
+                f"{measurement['peak_bytes'] / 2**20:>9.2f} "
+                f"{'' if exponent is None else format(exponent, '.2f'):>7} {change}"
+            )
+    return lines
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as reader:
+        return json.load(reader)["results"]
+
+
+def save_baseline(path: str, results: dict):
+    with open(path, "w", encoding="utf-8") as writer:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            writer,
+            indent=1,
+            sort_keys=True,
+        )
+        writer.write("\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="offline benchmarks of the classify / sort / render pipeline"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="timed measurements, best wins"
+    )
+    parser.add_argument(
+        "--cases", nargs="+", choices=[case.name for case in cases], metavar="CASE"
+    )
+    parser.add_argument("--baseline", default=baseline_path)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store results as the baseline"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.repeat, args.cases)
+    baseline = load_baseline(args.baseline)
+    print("\n".join(format_results(results, baseline)))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        remeasure(results, regressions, args.repeat)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+    for name, label, seconds, reference in regressions:
+        print(
+            f"REGRESSION {name} [{label}]: {seconds:.6f}s, "
+            f"scaled baseline {reference:.6f}s"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+module finds developer activity phrases ("ambv approved these changes", "zooba left
+a comment", ...) in a rendered PR page in a single pass.  Developer ids are merged
+into one trie-shaped regex, so each position in the page is checked against all
+ids at once instead of once per id, and the phrase is a bounded lookahead of at
+most three words after the id.  The matcher is compiled once per developer list.
+"""
+import functools
+import re
+
+# phrases GitHub renders after a user name for reviews, comments and closing
+activity_phrases = (
+    "approved these changes",
+    "left a comment",
+    "commented",
+    "closed this",
+)
+max_words_between: int = 3  # words allowed between a developer id and a phrase
+
+
+def trie_pattern(words) -> str:
+    """regex matching any of words, with shared prefixes factored out
+
+    e.g. ["ambv", "ambvx", "zooba"] becomes `(?:ambv(?:x)?|zooba)`, so matching
+    costs one step per character rather than one attempt per word
+
+    Args:
+      words: iterable of non-empty literal strings
+
+    Returns:
+        str regex; special characters in words are escaped
+
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for character in word:
+            node = node.setdefault(character, {})
+        node[""] = {}  # a word ends here
+    return _trie_node_pattern(trie)
+
+
+def _trie_node_pattern(node: dict) -> str:
+    branches = [
+        re.escape(character) + _trie_node_pattern(child)
+        for character, child in sorted(node.items())
+        if character
+    ]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if "" in node:
+        pattern = f"(?:{pattern})?"
+    return pattern
+
+
+class ActivityMatcher:
+    """precompiled matcher for developer ids followed by an activity phrase
+
+    Args:
+      developer_ids: GitHub ids to look for
+      phrases: activity phrases that may follow an id
+    """
+
+    def __init__(self, developer_ids, phrases=activity_phrases):
+        self.developer_ids = tuple(developer_ids)
+        # the phrase sits in a lookahead, so a match only consumes the id and
+        # "ambv zooba commented" still finds both developers
+        self.pattern = re.compile(
+            rf"\b(?P<developer>{trie_pattern(self.developer_ids)})"
+            rf"(?=\W+(?:\w+\W+){{0,{max_words_between}}}?"
+            rf"(?P<phrase>{trie_pattern(phrases)})\b)"
+        )
+
+    def find(self, text: str) -> dict[str, set[str]]:
+        """developers with activity in text, scanning it once
+
+        Args:
+          text: rendered PR page and review comments
+
+        Returns:
+            dict of developer id to the set of phrases found after it
+
+        """
+        if not self.developer_ids:
+            return {}
+        found = {}
+        for match in self.pattern.finditer(text):
+            found.setdefault(match["developer"], set()).add(match["phrase"])
+        return found
+
+
+@functools.lru_cache(maxsize=8)
+def get_activity_matcher(developer_ids: tuple[str, ...]) -> ActivityMatcher:
+    """matcher for a developer list, compiled on first use and reused for the run"""
+    return ActivityMatcher(developer_ids)
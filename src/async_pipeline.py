@@ -0,0 +1,286 @@
+"""
+module runs the PR and issue pipelines on asyncio, so listing pages, PR details and
+discussion timelines are fetched concurrently instead of one blocking call after
+another.  A semaphore bounds requests in flight; each request runs on the shared
+transport session in a worker thread, keeping the http cache and connection reuse.
+Once everything is fetched, the existing classification functions run unchanged
+on PullRequestRecord / IssueRecord objects, so the report matches the sync path.
+"""
+import asyncio
+import datetime
+import logging
+import re
+
+import config
+import transport
+from issue_events import IssueClosers
+from pr_discussion import get_discussion_events
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+from utilities import github_request_headers
+from utilities import parse_github_timestamp
+from utilities import timer_decorator
+from weekly_issues_summary import check_if_issue_date_interesting
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import discussion_known
+from weekly_pr_summary import get_final_summary
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+
+class AsyncGitHub:
+    """GitHub REST client for asyncio code with a bound on concurrent requests"""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+
+    def _get(self, url: str, params: dict | None):
+        response = transport.get_session().get(
+            url, params=params, headers=github_request_headers()
+        )
+        response.raise_for_status()
+        return response
+
+    async def get(self, url: str, params: dict | None = None):
+        """GET url, waiting for a free slot first
+
+        Returns:
+            requests.Response
+
+        """
+        async with self.semaphore:
+            return await asyncio.to_thread(self._get, url, params)
+
+    async def get_json(self, url: str, params: dict | None = None):
+        return (await self.get(url, params)).json()
+
+    async def call(self, function, *args):
+        """run a blocking helper (e.g. a paginated fetch) inside the bound"""
+        async with self.semaphore:
+            return await asyncio.to_thread(function, *args)
+
+    async def iter_updated_pages(
+        self, url: str, params: dict, report_start_date: datetime.datetime
+    ):
+        """yields pages of an updated-desc listing until a page reaches items
+        updated before the report start; pages are requested in waves of
+        `concurrency` once the page count is known from the Link header
+
+        Args:
+          url: listing endpoint
+          params: query parameters, must sort by updated descending
+          report_start_date: stop after the page holding the first older item
+
+        Returns:
+            async generator of pages (lists of payload dicts), in listing order
+
+        """
+        params = {"per_page": 100, **params}
+        first_page = await self.get(url, {**params, "page": 1})
+        last_page = link_page_number(first_page.links.get("last")) or 1
+
+        pages = [first_page.json()]
+        next_page = 2
+        while True:
+            for page in pages:
+                yield page
+                if not page or (
+                    parse_github_timestamp(page[-1]["updated_at"]) < report_start_date
+                ):
+                    return
+            if next_page > last_page:
+                return
+            wave = range(next_page, min(next_page + self.concurrency, last_page + 1))
+            pages = await asyncio.gather(
+                *(self.get_json(url, {**params, "page": page}) for page in wave)
+            )
+            next_page = wave.stop
+
+
+def link_page_number(link: dict | None) -> int | None:
+    """page number from a parsed `Link` header entry, e.g. the last page link"""
+    if not link:
+        return None
+    page_match = re.search(r"[?&]page=(\d+)", link["url"])
+    return int(page_match.group(1)) if page_match else None
+
+
+def _in_window(payload: dict, start: datetime.datetime, end: datetime.datetime):
+    return start <= parse_github_timestamp(payload["updated_at"]) <= end
+
+
+async def fetch_pull_request_records(
+    client: AsyncGitHub,
+    target_repo: str,
+    report_start_date: datetime.datetime,
+    report_end_date: datetime.datetime,
+    developer_ids: list[str],
+) -> list:
+    """PR records in listing order, with details and discussion fetched
+    concurrently for every PR updated inside [start, end]
+
+    Args:
+      client: AsyncGitHub
+      target_repo: owner/name
+      report_start_date: beginning of report period
+      report_end_date: end of report period, including end_date_buffer
+      developer_ids: developers the discussion is analyzed for
+
+    Returns:
+        list of PullRequestRecord, newest first, ending with the first older PR
+
+    """
+    listing = []
+    async for page in client.iter_updated_pages(
+        f"{config.settings.base_url}/repos/{target_repo}/pulls",
+        {"state": "all", "sort": "updated", "direction": "desc"},
+        report_start_date,
+    ):
+        listing.extend(page)
+    # keep the first PR older than the window, like iterating pull_requests_all;
+    # filter_prs_from_date_range stops there
+    for position, payload in enumerate(listing):
+        if parse_github_timestamp(payload["updated_at"]) < report_start_date:
+            del listing[position + 1 :]
+            break
+
+    candidates = [
+        payload
+        for payload in listing
+        if _in_window(payload, report_start_date, report_end_date)
+    ]
+    logging.info(f"fetching {len(candidates)} PRs of {len(listing)} listed")
+
+    details = await asyncio.gather(
+        *(client.get_json(payload["url"]) for payload in candidates)
+    )
+    # discussion lands in the per-run cache that check_developer_wrote_comments
+    # reads; PRs unchanged since an earlier analysis need no timeline at all
+    if config.settings.review_backend == "api":
+        await asyncio.gather(
+            *(
+                client.call(get_discussion_events, payload["number"])
+                for payload in candidates
+                if not discussion_known(
+                    PullRequestRecord.from_rest_payload(payload), developer_ids
+                )
+            )
+        )
+
+    # PRs outside the window are only checked for their dates, list payload is enough
+    details_by_number = {detail["number"]: detail for detail in details}
+    return [
+        PullRequestRecord.from_rest_payload(
+            details_by_number.get(payload["number"], payload)
+        )
+        for payload in listing
+    ]
+
+
+async def fetch_issue_records(
+    client: AsyncGitHub,
+    target_repo: str,
+    report_start_date: datetime.datetime,
+    report_end_date: datetime.datetime,
+) -> list:
+    """issue records updated since start (PRs included, like repo.get_issues)
+
+    closed_by is only looked up for closed issues created in the window, the
+    ones filter_issues reads it for: from the repo's issue events like the sync
+    path (see issue_events), or with a GET of the issue when the events don't
+    show the close
+
+    Args:
+      client: AsyncGitHub
+      target_repo: owner/name of repo
+      report_start_date: beginning of window
+      report_end_date: end of window, including any end_date_buffer
+
+    Returns:
+        list of IssueRecord, newest first
+
+    """
+    listing = []
+    async for page in client.iter_updated_pages(
+        f"{config.settings.base_url}/repos/{target_repo}/issues",
+        {
+            "state": "all",
+            "sort": "updated",
+            "direction": "desc",
+            "since": report_start_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        },
+        report_start_date,
+    ):
+        listing.extend(page)
+
+    closers = IssueClosers(target_repo, report_start_date)
+
+    async def closed_by(payload: dict) -> str | None:
+        if payload["state"] != "closed" or not check_if_issue_date_interesting(
+            parse_github_timestamp(payload["created_at"]),
+            report_start_date,
+            report_end_date,
+        ):
+            return None
+        close = await client.call(
+            closers.closer,
+            payload["number"],
+            parse_github_timestamp(payload["closed_at"]),
+        )
+        if close is not None:
+            return close.actor
+        issue = await client.get_json(payload["url"])
+        return (issue.get("closed_by") or {}).get("login")
+
+    logins = await asyncio.gather(*(closed_by(payload) for payload in listing))
+    return [
+        IssueRecord.from_rest_payload(payload, login)
+        for payload, login in zip(listing, logins)
+    ]
+
+
+async def build_report_items(settings) -> list:
+    """PR and issue report items for settings, both pipelines running at once
+
+    Args:
+      settings: config.Settings
+
+    Returns:
+        list of report tuples, same as get_final_summary + get_final_issues
+
+    """
+    client = AsyncGitHub(settings.concurrency)
+    report_end_date = settings.end_date + datetime.timedelta(
+        days=settings.end_date_buffer
+    )
+    pull_requests, issues = await asyncio.gather(
+        fetch_pull_request_records(
+            client,
+            settings.target_repo,
+            settings.start_date,
+            report_end_date,
+            settings.developer_ids,
+        ),
+        fetch_issue_records(
+            client, settings.target_repo, settings.start_date, report_end_date
+        ),
+    )
+
+    pr_items = get_final_summary(
+        pull_requests, settings.developer_ids, settings.start_date, settings.end_date
+    )
+    issue_items = get_final_issues(
+        issues,
+        settings.developer_ids,
+        settings.start_date,
+        settings.end_date,
+        settings.end_date_buffer,
+    )
+    return pr_items + issue_items
+
+
+@timer_decorator
+def run_async_report(settings) -> list:
+    """synchronous entry point for main"""
+    return asyncio.run(build_report_items(settings))
@@ -0,0 +1,151 @@
+"""
+module builds one report per ISO week for a long date range from a single scan.
+The PR and issue lists are walked once; every item is put in the bucket of each
+week whose window (Monday to Sunday, plus end_date_buffer) holds its date, which
+is exactly the set of items a separate run for that week would have classified.
+Each week's bucket then goes through the normal classification and formatting.
+"""
+import datetime
+import logging
+import os
+import typing
+
+from page_seek import seek_window
+from utilities import timer_decorator
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import get_final_summary
+from weekly_pr_summary import sort_final_data
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+week_length = datetime.timedelta(days=7)
+
+
+class ReportWeek(typing.NamedTuple):
+    """one ISO week; end is the following Monday, like config.end_date"""
+
+    label: str  # e.g. 2021-W46
+    start: datetime.datetime
+    end: datetime.datetime
+
+
+def iso_weeks(
+    start_date: datetime.datetime, end_date: datetime.datetime
+) -> list[ReportWeek]:
+    """ISO weeks covering a date range
+
+    Args:
+      start_date: first day of range; its whole week is included
+      end_date: end of range (exclusive, e.g. config.end_date)
+
+    Returns:
+        list of ReportWeek, oldest first
+
+    """
+    week_start = datetime.datetime.combine(
+        start_date.date() - datetime.timedelta(days=start_date.weekday()),
+        datetime.time(),
+    )
+    weeks = []
+    while week_start < end_date:
+        year, week, _ = week_start.isocalendar()
+        weeks.append(
+            ReportWeek(f"{year}-W{week:02d}", week_start, week_start + week_length)
+        )
+        week_start += week_length
+    return weeks
+
+
+def bucket_by_week(
+    items,
+    weeks: list[ReportWeek],
+    item_date,
+    end_date_buffer: int,
+    stop_before: datetime.datetime | None = None,
+) -> dict[str, list]:
+    """sorts items into weeks in one pass; an item lands in every week whose
+    window [start, end + end_date_buffer] holds its date
+
+    Args:
+      items: PRs or issues, most recently updated first
+      weeks: from iso_weeks
+      item_date: function returning the date that places an item
+      end_date_buffer: days added to each week's end, see config.py
+      stop_before: stop reading items dated before this (sorted input only)
+
+    Returns:
+        dict of week label to items, in input order
+
+    """
+    buffer = datetime.timedelta(days=end_date_buffer)
+    buckets = {week.label: [] for week in weeks}
+    for item in items:
+        date = item_date(item)
+        if stop_before is not None and date < stop_before:
+            break
+        position = min((date - weeks[0].start) // week_length, len(weeks) - 1)
+        # with a buffer, an item can also belong to the week(s) before its own
+        while position >= 0 and date <= weeks[position].end + buffer:
+            if weeks[position].start <= date:
+                buckets[weeks[position].label].append(item)
+            position -= 1
+    return buckets
+
+
+def weekly_report_path(output: str, week: ReportWeek) -> str:
+    """GitHub_summary.txt becomes GitHub_summary_2021-W46.txt"""
+    root, extension = os.path.splitext(output)
+    return f"{root}_{week.label}{extension}"
+
+
+@timer_decorator
+def build_weekly_reports(
+    pull_requests, issues, weeks: list[ReportWeek], settings
+) -> dict[ReportWeek, list]:
+    """formatted report lines for every week, from one pass over each input
+
+    Args:
+      pull_requests: PRs for the whole range, most recently updated first
+      issues: issues updated since the first week's start
+      weeks: from iso_weeks
+      settings: config.Settings for developer ids and end_date_buffer
+
+    Returns:
+        dict of ReportWeek to formatted report lines
+
+    """
+    buffer = settings.end_date_buffer
+    # read only the pages covering the whole range, when the listings can seek
+    range_end = weeks[-1].end + datetime.timedelta(days=buffer)
+    pull_requests = seek_window(pull_requests, "updated_at", weeks[0].start, range_end)
+    issues = seek_window(issues, "created_at", weeks[0].start, range_end)
+    pr_buckets = bucket_by_week(
+        pull_requests,
+        weeks,
+        lambda pull_request: pull_request.updated_at,
+        buffer,
+        stop_before=weeks[0].start,
+    )
+    # same date filter_issues uses
+    issue_buckets = bucket_by_week(
+        issues, weeks, lambda issue: issue.last_modified or issue.created_at, buffer
+    )
+
+    reports = {}
+    for week in weeks:
+        logging.info(
+            f"{week.label}: {len(pr_buckets[week.label])} PRs, "
+            f"{len(issue_buckets[week.label])} issues"
+        )
+        week_items = get_final_summary(
+            pr_buckets[week.label], settings.developer_ids, week.start, week.end
+        ) + get_final_issues(
+            issue_buckets[week.label],
+            settings.developer_ids,
+            week.start,
+            week.end,
+            buffer,
+        )
+        reports[week] = format_final_html_block(sort_final_data(week_items))
+    return reports
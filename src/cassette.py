@@ -0,0 +1,258 @@
+"""
+module records GitHub traffic to a compressed cassette file and replays it, so a
+report or test runs again with no network access, no token and no rate limit
+waits.  The cassette sits beneath both PyGithub and our direct requests: it is
+a transport adapter on the shared session from transport.build_session.
+
+interactions are matched on method, url (query parameters in any order) and
+request body; headers, including the token, are not part of the match and are
+never stored.  A request made several times is answered with its recordings in
+order, the last one repeating.  A request missing from a replayed cassette
+fails with CassetteMiss, naming the request and the closest recorded ones.
+
+modes: "record" always calls GitHub and (re)writes the cassette, "replay" only
+reads it, and "auto" replays a cassette that exists and records one that
+doesn't.
+"""
+import base64
+import collections
+import datetime
+import difflib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+cassette_modes = ("auto", "record", "replay")
+cassette_format_version: int = 1
+# bodies are stored decoded, so these no longer describe them
+dropped_response_headers = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """request not found in a replayed cassette"""
+
+
+def interaction_key(method: str, url: str, body) -> str:
+    """match key of a request: method, url with sorted query and a body hash"""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query)))
+    normalized_url = urllib.parse.urlunsplit(parts._replace(query=query))
+    if isinstance(body, str):
+        body = body.encode()
+    body_hash = hashlib.sha256(body).hexdigest()[:16] if body else ""
+    return f"{method} {normalized_url} {body_hash}".rstrip()
+
+
+def _encode_body(content: bytes) -> dict:
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(recording: dict) -> bytes:
+    if "text" in recording:
+        return recording["text"].encode("utf-8")
+    return base64.b64decode(recording["base64"])
+
+
+class Cassette:
+    """recorded interactions of one run, stored as gzip compressed JSON lines
+
+    Args:
+      path: cassette file, e.g. tests/cassettes/test_main_small.jsonl.gz
+      mode: "auto", "record" or "replay"
+    """
+
+    def __init__(self, path: str, mode: str = "auto"):
+        if mode not in cassette_modes:
+            raise ValueError(f"cassette mode must be one of {cassette_modes}")
+        if mode == "replay" and not os.path.isfile(path):
+            raise FileNotFoundError(
+                f"cassette {path} does not exist; record it first with "
+                "--cassette-mode record (needs network access and a token)"
+            )
+        self.path = path
+        self.replaying = mode == "replay" or (mode == "auto" and os.path.isfile(path))
+        self.recordings = collections.defaultdict(list)  # key: list of responses
+        self.statistics = {"recorded": 0, "replayed": 0, "missing": 0}
+        self._replay_positions = collections.Counter()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.replaying:
+            self.load()
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as reader:
+            header = json.loads(next(reader))
+            if header.get("version") != cassette_format_version:
+                raise ValueError(
+                    f"cassette {self.path} has format version "
+                    f"{header.get('version')}, expected {cassette_format_version}"
+                )
+            for line in reader:
+                recording = json.loads(line)
+                self.recordings[recording["key"]].append(recording)
+
+    def save(self):
+        """write recordings, when there are new ones; replaces the file atomically"""
+        with self._lock:
+            if self.replaying or not self._dirty:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            partial_path = f"{self.path}.partial"
+            with gzip.open(partial_path, "wt", encoding="utf-8") as writer:
+                header = {"version": cassette_format_version, "recorded": time.time()}
+                writer.write(json.dumps(header) + "\n")
+                for recordings in self.recordings.values():
+                    for recording in recordings:
+                        writer.write(json.dumps(recording) + "\n")
+            os.replace(partial_path, self.path)
+            self._dirty = False
+        logging.info(
+            f"cassette {self.path} saved with {self.statistics['recorded']} "
+            "interactions"
+        )
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response):
+        """store a response received for request"""
+        recording = {
+            "key": interaction_key(request.method, request.url, request.body),
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in dropped_response_headers
+            },
+            **_encode_body(response.content),
+        }
+        with self._lock:
+            self.recordings[recording["key"]].append(recording)
+            self.statistics["recorded"] += 1
+            self._dirty = True
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        """recorded response for request
+
+        Raises:
+            CassetteMiss: request was not recorded
+
+        """
+        key = interaction_key(request.method, request.url, request.body)
+        with self._lock:
+            recordings = self.recordings.get(key)
+            if not recordings:
+                self.statistics["missing"] += 1
+                raise CassetteMiss(self.describe_miss(key), request=request)
+            position = min(self._replay_positions[key], len(recordings) - 1)
+            self._replay_positions[key] += 1
+            self.statistics["replayed"] += 1
+        return build_replayed_response(request, recordings[position])
+
+    def describe_miss(self, key: str) -> str:
+        """error message for a missing request, with the closest recorded ones"""
+        close_keys = difflib.get_close_matches(key, list(self.recordings), n=3)
+        message = (
+            f"{key} is not in cassette {self.path} "
+            f"({len(self.recordings)} recorded requests); record it again with "
+            "--cassette-mode record"
+        )
+        if close_keys:
+            message += "; closest recorded: " + ", ".join(close_keys)
+        return message
+
+    def unused_keys(self) -> list[str]:
+        """recorded requests the replay never asked for"""
+        with self._lock:
+            return [key for key in self.recordings if not self._replay_positions[key]]
+
+
+def build_replayed_response(
+    request: requests.PreparedRequest, recording: dict
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = recording["status"]
+    response.reason = recording["reason"]
+    response.headers = CaseInsensitiveDict(recording["headers"])
+    response._content = _decode_body(recording)
+    response._content_consumed = True
+    response.url = recording["url"]
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.elapsed = datetime.timedelta(0)
+    response.from_cache = False
+    return response
+
+
+class CassetteAdapter(requests.adapters.HTTPAdapter):
+    """records what adapter sends and receives, or replays it without sending
+
+    Args:
+      cassette: Cassette to record to or replay from
+      adapter: transport adapter used while recording, e.g. a PooledAdapter
+    """
+
+    def __init__(self, cassette: Cassette, adapter: requests.adapters.HTTPAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    @property
+    def statistics(self):
+        """connection counters of the wrapped adapter"""
+        return self.adapter.statistics
+
+    @property
+    def response_cache(self):
+        return getattr(self.adapter, "response_cache", None)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.cassette.replaying:
+            return self.cassette.replay(request)
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(request, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+        super().close()
+
+
+class ReplayScheduler:
+    """stands in for RateLimitScheduler during replay: recorded rate limit
+    headers and recorded 403s must not make a replayed run wait"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statistics = {"requests": 0, "retries": 0, "waited_seconds": 0.0}
+
+    def acquire(self, resource: str = "core"):
+        with self._lock:
+            self.statistics["requests"] += 1
+
+    def release(self):
+        return
+
+    def record(self, resource: str, headers: dict, delay: float | None):
+        if delay is not None:
+            with self._lock:
+                self.statistics["retries"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.statistics)
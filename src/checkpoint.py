@@ -0,0 +1,273 @@
+"""
+module saves the progress of a report run, so a run stopped by a rate limit or a
+network error continues where it stopped (`--resume`) instead of crawling again.
+
+a checkpoint holds, for the PR and the issue pipeline, how far down its listing
+the run got (the sort timestamp of the last processed item, plus the numbers
+processed at that timestamp) and the items of interest found so far.  It is
+written every `checkpoint_every` items and whenever a pipeline stops, to a JSON
+file next to the report.
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+
+from page_seek import seek_window
+from pr_records import BranchRef
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+from pr_records import UserRef
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+checkpoint_format_version = 1
+checkpoint_every: int = 100  # listing items processed between checkpoint writes
+
+
+def _to_text(timestamp: datetime.datetime | None) -> str | None:
+    return None if timestamp is None else timestamp.isoformat()
+
+
+def _from_text(timestamp: str | None) -> datetime.datetime | None:
+    return None if timestamp is None else datetime.datetime.fromisoformat(timestamp)
+
+
+def _login(user) -> str | None:
+    return None if user is None else user.login
+
+
+def pull_request_to_json(pull_request) -> dict:
+    """fields summarize_pull_request reads, from a PR object or record"""
+    return {
+        "number": pull_request.number,
+        "title": pull_request.title,
+        "html_url": pull_request.html_url,
+        "state": pull_request.state,
+        "created_at": _to_text(pull_request.created_at),
+        "updated_at": _to_text(pull_request.updated_at),
+        "closed_at": _to_text(pull_request.closed_at),
+        "merged_at": _to_text(pull_request.merged_at),
+        "merged": pull_request.merged,
+        "user": _login(pull_request.user),
+        "base": pull_request.base.ref,
+    }
+
+
+def pull_request_from_json(fields: dict) -> PullRequestRecord:
+    return PullRequestRecord(
+        number=fields["number"],
+        title=fields["title"],
+        html_url=fields["html_url"],
+        state=fields["state"],
+        created_at=_from_text(fields["created_at"]),
+        updated_at=_from_text(fields["updated_at"]),
+        closed_at=_from_text(fields["closed_at"]),
+        merged_at=_from_text(fields["merged_at"]),
+        merged=fields["merged"],
+        user=UserRef(fields["user"]),
+        base=BranchRef(fields["base"]),
+    )
+
+
+def issue_to_json(issue) -> dict:
+    """fields format_issue reads, from an issue object or record"""
+    return {
+        "number": issue.number,
+        "title": issue.title,
+        "url": issue.url,
+        "html_url": issue.html_url,
+        "state": issue.state,
+        "user": _login(issue.user),
+        "closed_by": _login(issue.closed_by),
+        "created_at": _to_text(issue.created_at),
+        "updated_at": _to_text(issue.updated_at),
+        "closed_at": _to_text(issue.closed_at),
+    }
+
+
+def issue_from_json(fields: dict) -> IssueRecord:
+    return IssueRecord(
+        number=fields["number"],
+        title=fields["title"],
+        url=fields["url"],
+        html_url=fields["html_url"],
+        state=fields["state"],
+        user=UserRef(fields["user"]),
+        closed_by=None if fields["closed_by"] is None else UserRef(fields["closed_by"]),
+        created_at=_from_text(fields["created_at"]),
+        updated_at=_from_text(fields["updated_at"]),
+        closed_at=_from_text(fields["closed_at"]),
+    )
+
+
+class ListingProgress:
+    """how far down a listing sorted newest first on field a pipeline got
+
+    Args:
+      field: sort timestamp of the listing, e.g. "updated_at"
+      on_advance: called after each newly processed item
+    """
+
+    def __init__(self, field: str, on_advance=None):
+        self.field = field
+        self.on_advance = on_advance
+        self.last_value: datetime.datetime | None = None
+        self.numbers_at_last: set[int] = set()
+        self.done = False
+
+    def processed(self, item) -> bool:
+        """item was handled before the checkpoint; newer items came first"""
+        if self.last_value is None:
+            return False
+        value = getattr(item, self.field)
+        return value > self.last_value or (
+            value == self.last_value and item.number in self.numbers_at_last
+        )
+
+    def advance(self, item):
+        value = getattr(item, self.field)
+        if value != self.last_value:
+            self.last_value = value
+            self.numbers_at_last = set()
+        self.numbers_at_last.add(item.number)
+        if self.on_advance is not None:
+            self.on_advance()
+
+    def track(self, items, oldest: datetime.datetime, newest: datetime.datetime):
+        """items not processed yet; an item counts as processed once the next one
+        is asked for, i.e. once the caller finished with it
+
+        Args:
+          items: listing, sorted newest first on field
+          oldest: start of the report window
+          newest: end of the report window; a seekable listing skips straight to
+            the window, or to the resume point when that is older
+
+        Returns:
+            generator of items
+
+        """
+        if self.last_value is not None:
+            logging.info(f"resuming {self.field} listing at {self.last_value}")
+            newest = min(newest, self.last_value)
+        items = seek_window(items, self.field, oldest, newest)
+        for item in items:
+            if self.processed(item):
+                continue
+            yield item
+            self.advance(item)
+
+    def to_json(self) -> dict:
+        return {
+            "last_value": _to_text(self.last_value),
+            "numbers_at_last": sorted(self.numbers_at_last),
+            "done": self.done,
+        }
+
+    def load(self, state: dict):
+        self.last_value = _from_text(state["last_value"])
+        self.numbers_at_last = set(state["numbers_at_last"])
+        self.done = state["done"]
+
+
+class Checkpoint:
+    """progress and findings of one report run, saved to path
+
+    Args:
+      path: checkpoint file
+      run_key: search parameters of the run; a checkpoint only resumes the same run
+      resume: load path when it exists, instead of starting over
+    """
+
+    def __init__(self, path: str, run_key: dict, resume: bool = False):
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.pull_requests = ListingProgress("updated_at", self._advanced)
+        self.issues = ListingProgress("created_at", self._advanced)
+        # filled in by filter_prs_from_date_range and filter_issues
+        self.prs_of_interest: list = []
+        self.prs_reviewed: list[int] = []
+        self.issues_of_interest: list = []
+        if resume and os.path.exists(path):
+            self.load()
+        elif resume:
+            logging.info(f"no checkpoint at {path}, starting from the beginning")
+
+    @property
+    def complete(self) -> bool:
+        return self.pull_requests.done and self.issues.done
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as reader:
+            state = json.load(reader)
+        if state.get("version") != checkpoint_format_version:
+            raise ValueError(f"checkpoint {self.path} is from another version")
+        if state["run"] != self.run_key:
+            raise ValueError(
+                f"checkpoint {self.path} is for another run ({state['run']}); "
+                "run without --resume to start over"
+            )
+        self.pull_requests.load(state["pull_requests"])
+        self.issues.load(state["issues"])
+        self.prs_of_interest = [
+            pull_request_from_json(fields) for fields in state["prs_of_interest"]
+        ]
+        self.prs_reviewed = state["prs_reviewed"]
+        self.issues_of_interest = [
+            issue_from_json(fields) for fields in state["issues_of_interest"]
+        ]
+        logging.info(
+            f"resuming from checkpoint {self.path}: "
+            f"{len(self.prs_of_interest)} PR entries, "
+            f"{len(self.issues_of_interest)} issues found so far"
+        )
+
+    def save(self):
+        """write the checkpoint atomically; a crash mid-write keeps the old one"""
+        with self._lock:
+            state = {
+                "version": checkpoint_format_version,
+                "run": self.run_key,
+                "pull_requests": self.pull_requests.to_json(),
+                "issues": self.issues.to_json(),
+                "prs_of_interest": [
+                    pull_request_to_json(pull_request)
+                    for pull_request in self.prs_of_interest
+                ],
+                "prs_reviewed": list(self.prs_reviewed),
+                "issues_of_interest": [
+                    issue_to_json(issue) for issue in self.issues_of_interest
+                ],
+            }
+            partial_path = f"{self.path}.partial"
+            with open(partial_path, "w", encoding="utf-8") as writer:
+                json.dump(state, writer)
+            os.replace(partial_path, self.path)
+            self._unsaved = 0
+
+    def remove(self):
+        """delete the checkpoint once the report is written"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _advanced(self):
+        self._unsaved += 1
+        if self._unsaved >= checkpoint_every:
+            self.save()
+
+
+def run_key(settings) -> dict:
+    """search parameters that must match for a checkpoint to be resumed"""
+    return {
+        "target_repo": settings.target_repo,
+        "developer_ids": list(settings.developer_ids),
+        "start_date": _to_text(settings.start_date),
+        "end_date": _to_text(settings.end_date),
+        "end_date_buffer": settings.end_date_buffer,
+        "retrieval": settings.retrieval,
+        "fetcher": settings.fetcher,
+    }
@@ -1,36 +1,233 @@
 """"
 key configuration values
 """
+
+import dataclasses
 import datetime
+import functools
 import os
-
-from github import Github
+import threading
+import typing
 
 # change these values - user-set input search parameters
 # GITHUB_ACCESS_TOKEN must be set in env var
-target_repo: str = "python/cpython"
+target_repo: str | list[str] = "python/cpython"  # or a list, for a combined report
 developer_ids: list[str] = ["ambv"]  # list in case you want more than one;
 buildbot_ids: list[str] = ["miss-islington"]  # approved bots that  merge prs
 start_date = datetime.datetime(2021, 11, 15)  # change this (YYYY M DD)
 end_date = datetime.datetime(2021, 11, 21)  # change this
 end_date_buffer: int = 2  # change this; assume 2 days
 # num days added to end_date to capture updates by bots after DIR specified period
+workers: int = 2  # threads used to run the PR and issue pipelines side by side
+processes: int = 4  # worker processes when target_repo lists several repos
+concurrency: int = 8  # requests in flight at once for the asyncio pipeline
+# "list" walks all PRs sorted by update; "search" asks the Search API for the window
+retrieval: str = "list"
+# "rest" reads PR fields via PyGithub; "graphql" fetches them 100 PRs per request
+fetcher: str = "rest"
+# "api" reads PR timelines to find reviews; "html" scrapes the rendered PR page
+review_backend: str = "api"
+# "github" crawls the API for each report; "mirror" reads the local SQLite mirror;
+# "webhooks" reads the events stored by `python -m webhooks serve`
+source: str = "github"
+# webhook event store; "" keeps it next to the http cache
+event_store: str = ""
+# GitHub responses are cached here and revalidated with ETags; "" disables cache
+cache_dir: str = os.path.join(
+    os.path.expanduser("~"), ".cache", "python_weekly_dir_detail"
+)
+cache_max_mb: int = 512  # least recently used responses are evicted beyond this
+pool_size: int = 16  # keep-alive connections kept open per host
+http2: bool = False  # multiplex requests over HTTP/2; needs httpx[http2] installed
+max_request_rate: float = 10.0  # requests per second, all endpoints together
+rate_limit_retries: int = 3  # resends of a rate limited request after waiting
+# REST root; point at GitHub Enterprise, or at a local fake_github server
+base_url: str = "https://api.github.com"
+# record GitHub traffic to this compressed file, or replay it; "" disables
+cassette: str = ""
+# "auto" replays an existing cassette and records a missing one
+cassette_mode: str = "auto"
+# save report progress to this file, so a failed run can resume; "" disables
+checkpoint: str = ""
+resume: bool = False  # continue from an existing checkpoint instead of starting over
+watch_interval: float = 60.0  # shortest wait in seconds between --watch polls
 
 
 # computed parameters
 github_token = os.environ.get("GITHUB_ACCESS_TOKEN")
-github_host = Github(login_or_token=github_token, per_page=100)
-repo = github_host.get_repo(target_repo)
+# checks the signature of webhook deliveries, when set
+webhook_secret = os.environ.get("GITHUB_WEBHOOK_SECRET")
 # modify end_date to capture all 24 hours of the last day
 end_date = end_date + datetime.timedelta(days=1)
 
-# no date filter on get_pulls() method yet; state inputs must be single string
-# get all PRs, so we can capture closed, merged and reviewed together
-# sort via updated in reverse order; so we can stop iterating over API and
-# stay below our API rate limit
-pull_requests_all = repo.get_pulls(state="all", sort="updated", direction="descending")
 
-# pull all issues, filter down to report date start
-issues_all = repo.get_issues(
-    state="all", since=start_date, sort="updated", direction="desc"
-)
+_build_lock = threading.RLock()
+
+
+def built_once(function):
+    """functools.cached_property that is built once even when several threads
+    read it first at the same time, as the PR and issue workers do; in Python
+    3.12 cached_property lost its lock and each thread could build its own"""
+    name = function.__name__
+
+    @functools.wraps(function)
+    def build(self):
+        with _build_lock:
+            if name not in self.__dict__:
+                self.__dict__[name] = function(self)
+            return self.__dict__[name]
+
+    return functools.cached_property(build)
+
+
+@dataclasses.dataclass
+class Settings:
+    """search parameters plus the GitHub client objects built from them
+
+    client objects are created on first use, and the repo is fetched lazily,
+    so importing this module (or any module importing it) makes no API calls;
+    the network is only touched once a report starts iterating results
+    """
+
+    target_repo: str | list[str] = dataclasses.field(
+        default_factory=lambda: (
+            target_repo if isinstance(target_repo, str) else list(target_repo)
+        )
+    )
+    developer_ids: list[str] = dataclasses.field(
+        default_factory=lambda: list(developer_ids)
+    )
+    buildbot_ids: list[str] = dataclasses.field(
+        default_factory=lambda: list(buildbot_ids)
+    )
+    start_date: datetime.datetime = start_date
+    end_date: datetime.datetime = end_date
+    end_date_buffer: int = end_date_buffer
+    workers: int = workers
+    processes: int = processes
+    concurrency: int = concurrency
+    retrieval: str = retrieval
+    fetcher: str = fetcher
+    review_backend: str = review_backend
+    source: str = source
+    event_store: str = event_store
+    cache_dir: str = cache_dir
+    cache_max_mb: int = cache_max_mb
+    pool_size: int = pool_size
+    http2: bool = http2
+    max_request_rate: float = max_request_rate
+    rate_limit_retries: int = rate_limit_retries
+    base_url: str = base_url
+    cassette: str = cassette
+    cassette_mode: str = cassette_mode
+    checkpoint: str = checkpoint
+    resume: bool = resume
+    watch_interval: float = watch_interval
+    github_token: str | None = github_token
+    # shared RateLimitScheduler proxy for multi-repo worker processes
+    rate_limit_scheduler: typing.Any = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+
+    @property
+    def repositories(self) -> list[str]:
+        """target_repo as a list, whether one repo or several were given"""
+        if isinstance(self.target_repo, str):
+            return [self.target_repo]
+        return list(self.target_repo)
+
+    @built_once
+    def http_session(self):
+        """pooled requests.Session shared by PyGithub and direct requests"""
+        import transport
+
+        return transport.build_session(self)
+
+    @built_once
+    def discussion_memo(self):
+        """PR discussion analysis results, persisted next to the http cache"""
+        from discussion_memo import DiscussionMemo
+
+        if not self.cache_dir:
+            return DiscussionMemo()
+        return DiscussionMemo(os.path.join(self.cache_dir, "discussion_memo.sqlite3"))
+
+    @built_once
+    def report_checkpoint(self):
+        """progress of this report run, or None when checkpoints are off"""
+        from checkpoint import Checkpoint
+        from checkpoint import run_key
+
+        if not self.checkpoint:
+            return None
+        return Checkpoint(self.checkpoint, run_key(self), self.resume)
+
+    @built_once
+    def github_host(self):
+        """authenticated PyGithub client; constructing it makes no requests"""
+        from github import Github
+
+        import transport
+
+        transport.install_pygithub_transport(self.http_session)
+        return Github(
+            login_or_token=self.github_token, base_url=self.base_url, per_page=100
+        )
+
+    @functools.cached_property
+    def repo(self):
+        """lazy Repository object - no GET /repos/{owner}/{repo} round-trip"""
+        return self.github_host.get_repo(self.target_repo, lazy=True)
+
+    @functools.cached_property
+    def pull_requests_all(self):
+        """all PRs, most recently updated first
+
+        no date filter on the PR list endpoint; get all PRs, so we can capture
+        closed, merged and reviewed together
+        sort via updated in reverse order; so we can stop iterating over API and
+        stay below our API rate limit
+        records are built from the list payloads, unlike repo.get_pulls() objects
+        they don't fetch the full PR for every merged / merged_by / comments read
+        """
+        from pr_records import PullRequestListing
+
+        return PullRequestListing(self.target_repo)
+
+    @functools.cached_property
+    def issues_all(self):
+        """pull all issues, filter down to report date start; newest created
+        first, so filter_issues can seek to the report window"""
+        from weekly_issues_summary import issue_listing
+
+        return issue_listing(self.target_repo, self.start_date)
+
+
+settings = Settings()
+
+
+def configure(**changes) -> Settings:
+    """replace the active settings, e.g. with values parsed from the command line
+
+    Args:
+      **changes: Settings fields to override
+
+    Returns:
+      the new active Settings object; client objects are rebuilt on next use
+
+    """
+    global settings
+    settings = dataclasses.replace(settings, **changes)
+    return settings
+
+
+_lazy_attributes = ("github_host", "repo", "pull_requests_all", "issues_all")
+
+
+def __getattr__(name: str):
+    """keep `from config import repo` style imports working without import-time
+    API calls; attributes resolve against the active settings on first access
+    """
+    if name in _lazy_attributes:
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
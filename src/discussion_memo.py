@@ -0,0 +1,131 @@
+"""
+module memoizes PR discussion analysis - which of our developers reviewed,
+commented on or closed a PR - keyed by PR number and `updated_at`.  Any new
+comment or review bumps `updated_at`, so a stored answer is valid for as long as
+its key matches; unchanged PRs are analyzed once, no matter how many callers ask
+or, with a cache directory, how many runs.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+memo_schema = """
+CREATE TABLE IF NOT EXISTS discussion (
+    key TEXT PRIMARY KEY,
+    developers TEXT NOT NULL
+);
+"""
+
+
+def discussion_key(
+    target_repo: str, pr_object, backend: str, developer_ids: list[str]
+) -> str | None:
+    """memo key for one PR analysis, or None if the PR has no updated_at
+
+    the backend and developer list are part of the key, since both change
+    which developers an analysis finds
+    """
+    updated_at = getattr(pr_object, "updated_at", None)
+    if updated_at is None:
+        return None
+    return json.dumps(
+        [
+            target_repo,
+            pr_object.number,
+            updated_at.isoformat(),
+            backend,
+            sorted(developer_ids),
+        ]
+    )
+
+
+class DiscussionMemo:
+    """thread-safe memo of developers found in PR discussions
+
+    Args:
+      path: SQLite file to persist results across runs; None keeps them in memory
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.statistics = {"hits": 0, "misses": 0}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connection().executescript(memo_schema)
+
+    def _connection(self) -> sqlite3.Connection:
+        """one connection per thread; sqlite3 connections can't be shared"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _lookup(self, key: str) -> set | None:
+        if key in self._results:
+            return self._results[key]
+        if not self.path:
+            return None
+        row = (
+            self._connection()
+            .execute("SELECT developers FROM discussion WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        developers = set(json.loads(row[0]))
+        self._results[key] = developers
+        return developers
+
+    def _store(self, key: str, developers: set):
+        self._results[key] = developers
+        if self.path:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO discussion VALUES (?, ?)",
+                (key, json.dumps(sorted(developers))),
+            )
+            connection.commit()
+
+    def __contains__(self, key: str) -> bool:
+        return key is not None and self._lookup(key) is not None
+
+    def get_or_analyze(self, key: str | None, analyze) -> set:
+        """stored developers for key, or analyze() once and store its result
+
+        Args:
+          key: from discussion_key; None skips the memo
+          analyze: callable returning the set of developers found
+
+        Returns:
+            set of developer ids active in the discussion
+
+        """
+        if key is None:
+            return analyze()
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # concurrent callers for the same PR wait for the first analysis
+        with key_lock:
+            developers = self._lookup(key)
+            if developers is not None:
+                self._count("hits")
+                return developers
+            self._count("misses")
+            developers = set(analyze())
+            self._store(key, developers)
+            return developers
+
+    def _count(self, name: str):
+        with self._lock:
+            self.statistics[name] += 1
@@ -0,0 +1,1095 @@
+"""
+module serves a local stand-in for the GitHub REST API, filled with synthetic
+repos, so the report pipeline can be run, load tested and timed without
+github.com.  Point the tool at it with `--base-url`:
+
+    python -m fake_github --pull-requests 100000 --port 8765
+    python -m main --base-url http://127.0.0.1:8765 --cache-dir ""
+
+the server speaks the parts of the API this tool uses: paginated `/pulls` and
+`/issues` listings (with `Link` headers, state / sort / direction / since),
+single PRs and issues, reviews, comments, timelines, the repo's issue events,
+the search endpoint for `--retrieval search`, `/rate_limit`, rendered PR pages
+for `--review-backend html`, rate limit headers on every response and ETag
+revalidation.  GraphQL is not served.
+
+generated repos look like cpython: PR creation grows over the years, is lighter
+at weekends and follows working hours; lifetimes are log-normal; merged PRs
+often get backports opened and merged by a bot; activity comes mostly from a
+small group of core developers.  The same seed always builds the same repo.
+"""
+import argparse
+import bisect
+import datetime
+import hashlib
+import http.server
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+timestamp_format = "%Y-%m-%dT%H:%M:%SZ"
+max_per_page: int = 100
+search_result_limit: int = 1000  # like GitHub, searches stop at 1,000 results
+
+core_developers = (
+    "ambv",
+    "zooba",
+    "vstinner",
+    "serhiy-storchaka",
+    "pablogsal",
+    "tiran",
+    "erlend-aasland",
+    "corona10",
+    "rhettinger",
+    "gvanrossum",
+    "markshannon",
+    "iritkatriel",
+)
+backport_bot = "miss-islington"
+backport_branches = ("3.10", "3.9", "3.8")
+title_verbs = ("Fix", "Add", "Remove", "Improve", "Update", "Deprecate", "Speed up")
+title_subjects = (
+    "asyncio event loop shutdown",
+    "pathlib.Path.glob() on Windows",
+    "the tokenizer error messages",
+    "typing.ParamSpec documentation",
+    "ssl module for OpenSSL 3.0",
+    "unittest test discovery",
+    "the sqlite3 tutorial",
+    "dict resize in the free list",
+    "ctypes.util.find_library() on macOS",
+    "the pegen grammar actions",
+)
+
+
+def _timestamp(value: datetime.datetime | None) -> str | None:
+    return None if value is None else value.strftime(timestamp_format)
+
+
+class FakePullRequest:
+    """one synthetic PR; reviews and comments are (login, time) or
+    (login, state, time) tuples"""
+
+    __slots__ = (
+        "number",
+        "title",
+        "author",
+        "base",
+        "created_at",
+        "updated_at",
+        "closed_at",
+        "merged_at",
+        "merged_by",
+        "closed_by",
+        "reviews",
+        "comments",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def state(self) -> str:
+        return "open" if self.closed_at is None else "closed"
+
+
+class FakeIssue:
+    """one synthetic issue"""
+
+    __slots__ = (
+        "number",
+        "title",
+        "author",
+        "created_at",
+        "updated_at",
+        "closed_at",
+        "closed_by",
+        "comments",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def state(self) -> str:
+        return "open" if self.closed_at is None else "closed"
+
+
+class _SortedItems:
+    """items sorted by one timestamp, newest first, with the times kept for
+    bisecting `since`"""
+
+    def __init__(self, items: list, key: str):
+        self.items = sorted(
+            items, key=lambda item: (getattr(item, key), item.number), reverse=True
+        )
+        self.negated_times = [-getattr(item, key).timestamp() for item in self.items]
+
+    def updated_since(self, since: datetime.datetime) -> list:
+        return self.items[: bisect.bisect_right(self.negated_times, -since.timestamp())]
+
+
+class FakeRepo:
+    """synthetic repo contents; build one with generate_repo
+
+    Args:
+      full_name: owner/name
+      pull_requests: list of FakePullRequest
+      issues: list of FakeIssue
+    """
+
+    def __init__(self, full_name: str, pull_requests: list, issues: list):
+        self.full_name = full_name
+        self.pull_requests = {pr.number: pr for pr in pull_requests}
+        self.issues = {issue.number: issue for issue in issues}
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def listing(self, kind: str, sort: str, state: str) -> list:
+        """PRs ("pulls") or issues and PRs ("issues") for a listing, newest first"""
+        cache_key = (kind, sort, state)
+        with self._lock:
+            if cache_key not in self._listings:
+                items = list(self.pull_requests.values())
+                if kind == "issues":
+                    items += list(self.issues.values())
+                if state != "all":
+                    items = [item for item in items if item.state == state]
+                self._listings[cache_key] = _SortedItems(items, f"{sort}_at")
+            return self._listings[cache_key]
+
+    def issue_events(self) -> list:
+        """(time, event, actor, item) of every merge and close, newest first,
+        like GET /issues/events"""
+        with self._lock:
+            if "events" not in self._listings:
+                events = []
+                for item in [*self.pull_requests.values(), *self.issues.values()]:
+                    if getattr(item, "merged_at", None) is not None:
+                        events.append((item.merged_at, "merged", item.merged_by, item))
+                    if item.closed_at is not None:
+                        events.append((item.closed_at, "closed", item.closed_by, item))
+                self._listings["events"] = sorted(
+                    events,
+                    # closed sorts before merged at the same time: ids are newer
+                    key=lambda event: (event[0], event[1] == "closed", event[3].number),
+                    reverse=True,
+                )
+            return self._listings["events"]
+
+    def changed(self):
+        """forget the sorted listings, after items were edited in place or added"""
+        with self._lock:
+            self._listings = {}
+
+    def discussion_logins(self, pull_request: FakePullRequest) -> set:
+        """users the timeline shows reviewing, commenting on or closing a PR"""
+        logins = {review[0] for review in pull_request.reviews}
+        logins.update(comment[0] for comment in pull_request.comments)
+        if pull_request.closed_by is not None:
+            logins.add(pull_request.closed_by)
+        return logins
+
+    # payloads, shaped like the GitHub REST API v3
+
+    def _user(self, login: str | None, base_url: str) -> dict | None:
+        if login is None:
+            return None
+        return {
+            "login": login,
+            "type": "Bot" if login == backport_bot else "User",
+            "url": f"{base_url}/users/{login}",
+        }
+
+    def pull_request_payload(
+        self, pull_request: FakePullRequest, base_url: str, full: bool = False
+    ) -> dict:
+        """list item of GET /pulls, or with full=True, GET /pulls/{number}"""
+        api_url = f"{base_url}/repos/{self.full_name}/pulls/{pull_request.number}"
+        payload = {
+            "number": pull_request.number,
+            "title": pull_request.title,
+            "url": api_url,
+            "html_url": f"{base_url}/{self.full_name}/pull/{pull_request.number}",
+            "issue_url": f"{base_url}/repos/{self.full_name}/issues/"
+            f"{pull_request.number}",
+            "review_comments_url": f"{api_url}/comments",
+            "comments_url": f"{base_url}/repos/{self.full_name}/issues/"
+            f"{pull_request.number}/comments",
+            "state": pull_request.state,
+            "user": self._user(pull_request.author, base_url),
+            "created_at": _timestamp(pull_request.created_at),
+            "updated_at": _timestamp(pull_request.updated_at),
+            "closed_at": _timestamp(pull_request.closed_at),
+            "merged_at": _timestamp(pull_request.merged_at),
+            "base": {"ref": pull_request.base, "label": f"python:{pull_request.base}"},
+            "head": {"ref": f"pr-{pull_request.number}"},
+        }
+        if full:
+            payload.update(
+                {
+                    "merged": pull_request.merged_at is not None,
+                    "merged_by": self._user(pull_request.merged_by, base_url),
+                    "comments": len(pull_request.comments),
+                    "review_comments": sum(
+                        1 for review in pull_request.reviews if review[1] == "COMMENTED"
+                    ),
+                }
+            )
+        return payload
+
+    def issue_payload(self, item, base_url: str, full: bool = False) -> dict:
+        """list item of GET /issues (PRs included, as on GitHub), or with
+        full=True, GET /issues/{number}, which adds closed_by"""
+        api_url = f"{base_url}/repos/{self.full_name}/issues/{item.number}"
+        is_pull_request = isinstance(item, FakePullRequest)
+        kind = "pull" if is_pull_request else "issues"
+        payload = {
+            "number": item.number,
+            "title": item.title,
+            "url": api_url,
+            "html_url": f"{base_url}/{self.full_name}/{kind}/{item.number}",
+            "comments_url": f"{api_url}/comments",
+            "state": item.state,
+            "user": self._user(item.author, base_url),
+            "labels": [],
+            "comments": len(item.comments),
+            "created_at": _timestamp(item.created_at),
+            "updated_at": _timestamp(item.updated_at),
+            "closed_at": _timestamp(item.closed_at),
+        }
+        if is_pull_request:
+            payload["pull_request"] = {
+                "url": f"{base_url}/repos/{self.full_name}/pulls/{item.number}"
+            }
+        if full:
+            payload["closed_by"] = self._user(item.closed_by, base_url)
+        return payload
+
+    def issue_event_payload(self, event: tuple, base_url: str) -> dict:
+        """list item of GET /issues/events, which embeds the issue"""
+        created_at, name, actor, item = event
+        return {
+            "event": name,
+            "actor": self._user(actor, base_url),
+            "created_at": _timestamp(created_at),
+            "issue": self.issue_payload(item, base_url),
+        }
+
+    def reviews_payload(self, pull_request: FakePullRequest, base_url: str) -> list:
+        return [
+            {
+                "user": self._user(login, base_url),
+                "state": state,
+                "submitted_at": _timestamp(submitted_at),
+            }
+            for login, state, submitted_at in pull_request.reviews
+        ]
+
+    def comments_payload(self, item, base_url: str) -> list:
+        return [
+            {
+                "user": self._user(login, base_url),
+                "created_at": _timestamp(created_at),
+                "body": "Thanks, looks good to me.",
+            }
+            for login, created_at in item.comments
+        ]
+
+    def timeline_payload(self, item, base_url: str) -> list:
+        """GET /issues/{number}/timeline: reviews, comments and state changes"""
+        entries = []
+        for login, state, submitted_at in getattr(item, "reviews", ()):
+            entries.append(
+                {
+                    "event": "reviewed",
+                    "user": self._user(login, base_url),
+                    "state": state,
+                    "submitted_at": _timestamp(submitted_at),
+                }
+            )
+        for login, created_at in item.comments:
+            entries.append(
+                {
+                    "event": "commented",
+                    "actor": self._user(login, base_url),
+                    "created_at": _timestamp(created_at),
+                }
+            )
+        if getattr(item, "merged_at", None) is not None:
+            entries.append(
+                {
+                    "event": "merged",
+                    "actor": self._user(item.merged_by, base_url),
+                    "created_at": _timestamp(item.merged_at),
+                }
+            )
+        if item.closed_at is not None:
+            entries.append(
+                {
+                    "event": "closed",
+                    "actor": self._user(item.closed_by, base_url),
+                    "created_at": _timestamp(item.closed_at),
+                }
+            )
+        return sorted(
+            entries,
+            key=lambda entry: entry.get("created_at") or entry.get("submitted_at"),
+        )
+
+    def webhook_deliveries(self, base_url: str) -> list:
+        """the repo's history as GitHub webhook deliveries, oldest first
+
+        payloads carry the items' current state, as if every delivery had been
+        sent just now
+
+        Args:
+          base_url: REST root used in payload urls
+
+        Returns:
+            list of (event name, payload) tuples
+
+        """
+        repository = {"full_name": self.full_name}
+        deliveries = []
+
+        def deliver(when, event, action, sender, **fields):
+            payload = {
+                "action": action,
+                "repository": repository,
+                "sender": self._user(sender, base_url),
+                **fields,
+            }
+            deliveries.append((when, len(deliveries), event, payload))
+
+        for pull_request in self.pull_requests.values():
+            full = self.pull_request_payload(pull_request, base_url, full=True)
+            deliver(
+                pull_request.created_at,
+                "pull_request",
+                "opened",
+                pull_request.author,
+                pull_request=full,
+            )
+            for (login, _, submitted_at), review in zip(
+                pull_request.reviews, self.reviews_payload(pull_request, base_url)
+            ):
+                deliver(
+                    submitted_at,
+                    "pull_request_review",
+                    "submitted",
+                    login,
+                    review=review,
+                    pull_request=self.pull_request_payload(pull_request, base_url),
+                )
+            if pull_request.closed_at is not None:
+                deliver(
+                    pull_request.closed_at,
+                    "pull_request",
+                    "closed",
+                    pull_request.closed_by,
+                    pull_request=full,
+                )
+
+        for item in [*self.pull_requests.values(), *self.issues.values()]:
+            issue = self.issue_payload(item, base_url)
+            if isinstance(item, FakeIssue):
+                deliver(item.created_at, "issues", "opened", item.author, issue=issue)
+                if item.closed_at is not None:
+                    deliver(
+                        item.closed_at, "issues", "closed", item.closed_by, issue=issue
+                    )
+            for (login, created_at), comment in zip(
+                item.comments, self.comments_payload(item, base_url)
+            ):
+                deliver(
+                    created_at,
+                    "issue_comment",
+                    "created",
+                    login,
+                    issue=issue,
+                    comment=comment,
+                )
+
+        return [(event, payload) for _, _, event, payload in sorted(deliveries)]
+
+    def pull_request_page(self, pull_request: FakePullRequest) -> str:
+        """rendered PR page, with the activity lines the html backend scans for"""
+        phrases = {
+            "APPROVED": "approved these changes",
+            "COMMENTED": "left a comment",
+            "CHANGES_REQUESTED": "requested changes",
+        }
+        lines = [f"<h1>{pull_request.title} #{pull_request.number}</h1>"]
+        lines += [
+            f'<a class="author">{login}</a> {phrases[state]}'
+            for login, state, _ in pull_request.reviews
+        ]
+        lines += [
+            f'<a class="author">{login}</a> commented'
+            for login, _ in pull_request.comments
+        ]
+        if pull_request.closed_by is not None and pull_request.merged_at is None:
+            lines.append(f'<a class="author">{pull_request.closed_by}</a> closed this')
+        return "<html><body>\n" + "\n".join(lines) + "\n</body></html>\n"
+
+    def involves(self, item, login: str) -> bool:
+        """search `involves:` - author, commenter, reviewer, closer or merger"""
+        return (
+            item.author == login
+            or item.closed_by == login
+            or getattr(item, "merged_by", None) == login
+            or any(comment[0] == login for comment in item.comments)
+            or any(review[0] == login for review in getattr(item, "reviews", ()))
+        )
+
+
+def _working_time(
+    generator: random.Random, start: datetime.datetime, span_seconds: float
+) -> datetime.datetime:
+    """creation time: activity grows over the span (density rises linearly),
+    weekends are half as busy and hours cluster around the European afternoon"""
+    while True:
+        day = start + datetime.timedelta(
+            seconds=span_seconds * math.sqrt(generator.random())
+        )
+        if day.weekday() < 5 or generator.random() < 0.5:
+            break
+    hour = min(max(generator.gauss(14, 4.5), 0), 23.99)
+    return datetime.datetime.combine(day.date(), datetime.time()) + (
+        datetime.timedelta(seconds=int(hour * 3600))
+    )
+
+
+def _lifetime(generator: random.Random) -> datetime.timedelta:
+    """log-normal time to close; median about two days, long tail of months"""
+    return datetime.timedelta(hours=generator.lognormvariate(math.log(48), 1.6))
+
+
+def _weighted_logins(count: int) -> tuple[list, list]:
+    """core developers plus `count` contributors with Zipf-like weights"""
+    logins = list(core_developers) + [f"contributor{n}" for n in range(count)]
+    weights = [30.0] * len(core_developers) + [
+        10.0 / (rank + 1) ** 0.8 for rank in range(count)
+    ]
+    return logins, weights
+
+
+def generate_repo(
+    full_name: str = "python/cpython",
+    pull_requests: int = 1000,
+    issues: int | None = None,
+    end_date: datetime.datetime = datetime.datetime(2021, 12, 1),
+    years: float | None = None,
+    seed: int = 0,
+) -> FakeRepo:
+    """builds a synthetic repo with cpython-like activity
+
+    Args:
+      full_name: owner/name
+      pull_requests: PRs to create, backports included
+      issues: issues to create, default a quarter of the PRs
+      end_date: nothing happens after this; open items stay open
+      years: history length, default about 3,000 PRs per year like cpython
+      seed: random seed; the same arguments always give the same repo
+
+    Returns:
+        FakeRepo
+
+    """
+    generator = random.Random(seed)
+    issues = pull_requests // 4 if issues is None else issues
+    years = years or max(pull_requests / 3000, 0.25)
+    span_seconds = years * 365.25 * 24 * 3600
+    start_date = end_date - datetime.timedelta(seconds=span_seconds)
+    logins, weights = _weighted_logins(max(pull_requests // 50, 20))
+
+    def pick_login():
+        return generator.choices(logins, weights)[0]
+
+    def pick_core_developer():
+        return generator.choice(core_developers)
+
+    def activity_between(first, last, count) -> list:
+        seconds = max((last - first).total_seconds(), 1)
+        return sorted(
+            first + datetime.timedelta(seconds=int(generator.random() * seconds))
+            for _ in range(count)
+        )
+
+    def finish(item, created_at: datetime.datetime, closing: float):
+        """closed / merged time, last update, and discussion times for an item"""
+        closed_at = (created_at + _lifetime(generator)).replace(microsecond=0)
+        if generator.random() > closing or closed_at > end_date:
+            closed_at = None
+        last_activity = closed_at or min(
+            created_at + _lifetime(generator) * 2, end_date
+        )
+        item.created_at = created_at
+        item.closed_at = closed_at
+        # labels, bots and late comments bump updated_at after the last event
+        bump = datetime.timedelta(minutes=generator.expovariate(1 / 30))
+        item.updated_at = min(max(last_activity, created_at) + bump, end_date)
+        item.updated_at = item.updated_at.replace(microsecond=0)
+        return last_activity
+
+    # (created_at, item) for every PR and issue; numbers follow creation order
+    created = []
+    backport_of = {}  # backport PR: the PR it was cherry-picked from
+    while len(created) < pull_requests:
+        created_at = _working_time(generator, start_date, span_seconds)
+        original = FakePullRequest(
+            title=f"bpo-{generator.randint(30000, 46000)}: "
+            f"{generator.choice(title_verbs)} {generator.choice(title_subjects)}",
+            author=pick_login(),
+            base="main",
+        )
+        last_activity = finish(original, created_at, closing=0.85)
+        original.reviews = [
+            (pick_core_developer(), state, moment)
+            for state, moment in zip(
+                generator.choices(
+                    ("APPROVED", "COMMENTED", "CHANGES_REQUESTED"), (5, 3, 1), k=3
+                ),
+                activity_between(created_at, last_activity, generator.randint(0, 3)),
+            )
+        ]
+        original.comments = [
+            (pick_login(), moment)
+            for moment in activity_between(
+                created_at, last_activity, generator.randint(0, 6)
+            )
+        ]
+        if original.closed_at is not None:
+            if generator.random() < 0.75:
+                original.merged_at = original.closed_at
+                original.merged_by = pick_core_developer()
+                original.closed_by = original.merged_by
+            else:
+                original.closed_by = generator.choice(
+                    [original.author, pick_core_developer()]
+                )
+        created.append((created_at, original))
+
+        # merged fixes are often backported by the bot, and merged by it
+        if original.merged_at is None or generator.random() > 0.3:
+            continue
+        for branch in backport_branches[: generator.randint(1, 2)]:
+            opened_at = original.merged_at + datetime.timedelta(
+                seconds=generator.randint(120, 3600)
+            )
+            if opened_at > end_date or len(created) == pull_requests:
+                continue
+            backport = FakePullRequest(
+                title=f"[{branch}] {original.title}",
+                author=backport_bot,
+                base=branch,
+                reviews=[],
+                comments=[],
+            )
+            finish(backport, opened_at, closing=0.95)
+            if backport.closed_at is not None:
+                backport.merged_at = backport.closed_at
+                backport.merged_by = backport_bot
+                backport.closed_by = backport_bot
+            backport.reviews.append((original.merged_by, "APPROVED", opened_at))
+            created.append((opened_at, backport))
+            backport_of[backport] = original
+
+    for _ in range(issues):
+        created_at = _working_time(generator, start_date, span_seconds)
+        issue = FakeIssue(
+            title=f"{generator.choice(title_subjects).capitalize()} is broken",
+            author=pick_login(),
+            comments=[],
+        )
+        last_activity = finish(issue, created_at, closing=0.7)
+        issue.comments = [
+            (pick_login(), moment)
+            for moment in activity_between(
+                created_at, last_activity, generator.randint(0, 4)
+            )
+        ]
+        if issue.closed_at is not None:
+            issue.closed_by = generator.choice([issue.author, pick_core_developer()])
+        created.append((created_at, issue))
+
+    created.sort(key=lambda entry: entry[0])
+    for number, (_, item) in enumerate(created, start=1):
+        item.number = number
+    for backport, original in backport_of.items():
+        backport.title += f" (GH-{original.number})"
+
+    return FakeRepo(
+        full_name,
+        [item for _, item in created if isinstance(item, FakePullRequest)],
+        [item for _, item in created if isinstance(item, FakeIssue)],
+    )
+
+
+class RateLimit:
+    """hourly request budget per resource, reported in X-RateLimit-* headers
+
+    Args:
+      limit: requests per hour and resource; search gets 30 per minute like GitHub
+    """
+
+    def __init__(self, limit: int = 5000):
+        self.limits = {"core": limit, "search": 30, "graphql": limit}
+        self.windows = {"core": 3600, "search": 60, "graphql": 3600}
+        self.used = {resource: 0 for resource in self.limits}
+        self.resets = {resource: 0 for resource in self.limits}
+        self._lock = threading.Lock()
+
+    def _refill(self, resource: str, now: float):
+        if now >= self.resets[resource]:
+            self.used[resource] = 0
+            self.resets[resource] = int(now) + self.windows[resource]
+
+    def take(self, resource: str, count: bool = True) -> tuple[bool, dict]:
+        """spends one request, unless count is False (304s and /rate_limit)
+
+        Returns:
+            tuple of bool, False when the budget is exhausted, and response headers
+
+        """
+        with self._lock:
+            self._refill(resource, time.time())
+            allowed = self.used[resource] < self.limits[resource]
+            if allowed and count:
+                self.used[resource] += 1
+            return allowed, {
+                "X-RateLimit-Limit": str(self.limits[resource]),
+                "X-RateLimit-Remaining": str(
+                    self.limits[resource] - self.used[resource]
+                ),
+                "X-RateLimit-Reset": str(self.resets[resource]),
+                "X-RateLimit-Used": str(self.used[resource]),
+                "X-RateLimit-Resource": resource,
+            }
+
+    def payload(self) -> dict:
+        """body of GET /rate_limit"""
+        with self._lock:
+            resources = {}
+            for resource, limit in self.limits.items():
+                self._refill(resource, time.time())
+                resources[resource] = {
+                    "limit": limit,
+                    "remaining": limit - self.used[resource],
+                    "reset": self.resets[resource],
+                    "used": self.used[resource],
+                }
+        return {"resources": resources, "rate": resources["core"]}
+
+
+def _parse_search_query(query: str) -> dict:
+    """qualifiers of a search query, e.g. {"repo": ..., "is": ..., "updated": ...}"""
+    return dict(
+        term.split(":", 1) for term in query.split() if ":" in term and term[0] != "-"
+    )
+
+
+def _parse_search_time(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+class FakeGitHubHandler(http.server.BaseHTTPRequestHandler):
+    """routes GET requests to the repos of the server"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    routes = [
+        (re.compile(r"^/rate_limit$"), "rate_limit"),
+        (re.compile(r"^/search/issues$"), "search_issues"),
+        (re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)$"), "repository"),
+        (re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/pulls$"), "pulls"),
+        (re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/pulls/(?P<number>\d+)$"), "pull"),
+        (
+            re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/pulls/(?P<number>\d+)/reviews$"),
+            "reviews",
+        ),
+        (
+            re.compile(
+                r"^/repos/(?P<repo>[^/]+/[^/]+)/pulls/(?P<number>\d+)/comments$"
+            ),
+            "review_comments",
+        ),
+        (re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/issues$"), "issues"),
+        (re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/issues/events$"), "issue_events"),
+        (re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/issues/(?P<number>\d+)$"), "issue"),
+        (
+            re.compile(
+                r"^/repos/(?P<repo>[^/]+/[^/]+)/issues/(?P<number>\d+)/comments$"
+            ),
+            "issue_comments",
+        ),
+        (
+            re.compile(
+                r"^/repos/(?P<repo>[^/]+/[^/]+)/issues/(?P<number>\d+)/timeline$"
+            ),
+            "timeline",
+        ),
+        (re.compile(r"^/(?P<repo>[^/]+/[^/]+)/(pull|issues)/(?P<number>\d+)$"), "page"),
+    ]
+
+    def log_message(self, format, *args):
+        logging.debug(f"fake github: {format % args}")
+
+    @property
+    def base_url(self) -> str:
+        return self.server.base_url
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urllib.parse.urlsplit(self.path)
+        self.query = dict(urllib.parse.parse_qsl(url.query))
+        for pattern, name in self.routes:
+            route_match = pattern.match(url.path)
+            if route_match:
+                break
+        else:
+            return self.send_json(404, {"message": "Not Found"})
+
+        fields = route_match.groupdict()
+        repo = None
+        if "repo" in fields:
+            repo = self.server.repos.get(fields["repo"])
+            if repo is None:
+                return self.send_json(404, {"message": "Not Found"})
+        if name == "rate_limit":
+            return self.send_json(200, self.server.rate_limit.payload(), count=False)
+        if name == "page":
+            return self.send_page(repo, int(fields["number"]))
+
+        resource = "search" if name == "search_issues" else "core"
+        allowed, self.rate_headers = self.server.rate_limit.take(resource, count=False)
+        if not allowed:
+            return self.send_json(
+                403,
+                {
+                    "message": "API rate limit exceeded",
+                    "documentation_url": "https://docs.github.com/rest/rate-limit",
+                },
+                count=False,
+            )
+        self.resource = resource
+        if "number" in fields:
+            return getattr(self, f"get_{name}")(repo, int(fields["number"]))
+        return getattr(self, f"get_{name}")(repo)
+
+    # responses
+
+    def send_json(self, status: int, payload, headers: dict = None, count=True):
+        body = json.dumps(payload).encode()
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            # revalidated responses are free, as on GitHub
+            status, body = 304, b""
+            count = False
+        if count:
+            _, self.rate_headers = self.server.rate_limit.take(self.resource)
+        # counted before answering, so a client never sees a response not counted
+        self.server.count_request()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        for name, value in {
+            **getattr(self, "rate_headers", {}),
+            **(headers or {}),
+        }.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_page(self, repo: FakeRepo, number: int):
+        pull_request = repo.pull_requests.get(number)
+        if pull_request is None:
+            return self.send_json(404, {"message": "Not Found"}, count=False)
+        body = repo.pull_request_page(pull_request).encode()
+        self.server.count_request()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_page_of(self, items: list, payload, path: str, extra: dict = None):
+        """one page of a listing, with Link headers for the other pages"""
+        per_page = min(int(self.query.get("per_page", 30)), max_per_page)
+        page = max(int(self.query.get("page", 1)), 1)
+        last_page = max(math.ceil(len(items) / per_page), 1)
+        links = []
+        for relation, number in (
+            ("next", page + 1),
+            ("last", last_page),
+            ("first", 1),
+            ("prev", page - 1),
+        ):
+            if (relation in ("next", "last") and page < last_page) or (
+                relation in ("first", "prev") and page > 1
+            ):
+                query = urllib.parse.urlencode(
+                    {**self.query, "per_page": per_page, "page": number}
+                )
+                links.append(f'<{self.base_url}{path}?{query}>; rel="{relation}"')
+        selected = [
+            payload(item) for item in items[(page - 1) * per_page : page * per_page]
+        ]
+        body = selected if extra is None else {**extra, "items": selected}
+        self.send_json(200, body, {"Link": ", ".join(links)} if links else None)
+
+    def _listing(self, repo: FakeRepo, kind: str) -> list:
+        sort = self.query.get("sort", "created")
+        sort = sort if sort in ("created", "updated") else "created"
+        listing = repo.listing(kind, sort, self.query.get("state", "open"))
+        items = listing.items
+        if "since" in self.query:
+            since = datetime.datetime.strptime(self.query["since"], timestamp_format)
+            items = repo.listing(
+                kind, "updated", self.query.get("state", "open")
+            ).updated_since(since)
+            if sort == "created":
+                items = sorted(
+                    items, key=lambda item: (item.created_at, item.number), reverse=True
+                )
+        if self.query.get("direction", "desc") == "asc":
+            items = items[::-1]
+        return items
+
+    def get_repository(self, repo: FakeRepo):
+        owner, name = repo.full_name.split("/")
+        self.send_json(
+            200,
+            {
+                "name": name,
+                "full_name": repo.full_name,
+                "owner": {"login": owner},
+                "url": f"{self.base_url}/repos/{repo.full_name}",
+                "default_branch": "main",
+            },
+        )
+
+    def get_pulls(self, repo: FakeRepo):
+        self.send_page_of(
+            self._listing(repo, "pulls"),
+            lambda item: repo.pull_request_payload(item, self.base_url),
+            f"/repos/{repo.full_name}/pulls",
+        )
+
+    def get_issues(self, repo: FakeRepo):
+        self.send_page_of(
+            self._listing(repo, "issues"),
+            lambda item: repo.issue_payload(item, self.base_url),
+            f"/repos/{repo.full_name}/issues",
+        )
+
+    def get_issue_events(self, repo: FakeRepo):
+        self.send_page_of(
+            repo.issue_events(),
+            lambda event: repo.issue_event_payload(event, self.base_url),
+            f"/repos/{repo.full_name}/issues/events",
+        )
+
+    def _item(self, repo: FakeRepo, number: int, pull_requests_only: bool = False):
+        item = repo.pull_requests.get(number)
+        if item is None and not pull_requests_only:
+            item = repo.issues.get(number)
+        if item is None:
+            self.send_json(404, {"message": "Not Found"})
+        return item
+
+    def get_pull(self, repo: FakeRepo, number: int):
+        pull_request = self._item(repo, number, pull_requests_only=True)
+        if pull_request is not None:
+            self.send_json(
+                200, repo.pull_request_payload(pull_request, self.base_url, full=True)
+            )
+
+    def get_reviews(self, repo: FakeRepo, number: int):
+        pull_request = self._item(repo, number, pull_requests_only=True)
+        if pull_request is not None:
+            self.send_page_of(
+                repo.reviews_payload(pull_request, self.base_url),
+                lambda review: review,
+                self.path.split("?")[0],
+            )
+
+    def get_review_comments(self, repo: FakeRepo, number: int):
+        pull_request = self._item(repo, number, pull_requests_only=True)
+        if pull_request is not None:
+            self.send_page_of([], lambda comment: comment, self.path.split("?")[0])
+
+    def get_issue(self, repo: FakeRepo, number: int):
+        item = self._item(repo, number)
+        if item is not None:
+            self.send_json(200, repo.issue_payload(item, self.base_url, full=True))
+
+    def get_issue_comments(self, repo: FakeRepo, number: int):
+        item = self._item(repo, number)
+        if item is not None:
+            self.send_page_of(
+                repo.comments_payload(item, self.base_url),
+                lambda comment: comment,
+                self.path.split("?")[0],
+            )
+
+    def get_timeline(self, repo: FakeRepo, number: int):
+        item = self._item(repo, number)
+        if item is not None:
+            self.send_page_of(
+                repo.timeline_payload(item, self.base_url),
+                lambda entry: entry,
+                self.path.split("?")[0],
+            )
+
+    def get_search_issues(self, repo: None):
+        """`repo:`, `is:pr` / `is:issue`, `updated:A..B` and `involves:` only"""
+        qualifiers = _parse_search_query(self.query.get("q", ""))
+        repo = self.server.repos.get(qualifiers.get("repo"))
+        if repo is None:
+            return self.send_json(
+                422, {"message": "Validation Failed", "errors": [{"code": "invalid"}]}
+            )
+        kind = "pulls" if qualifiers.get("is") == "pr" else "issues"
+        items = repo.listing(kind, "updated", "all").items
+        if qualifiers.get("is") == "issue":
+            items = [item for item in items if isinstance(item, FakeIssue)]
+        if "updated" in qualifiers:
+            first, last = map(_parse_search_time, qualifiers["updated"].split(".."))
+            items = [item for item in items if first <= item.updated_at <= last]
+        if "involves" in qualifiers:
+            items = [
+                item for item in items if repo.involves(item, qualifiers["involves"])
+            ]
+        if self.query.get("order", "desc") == "asc":
+            items = items[::-1]
+        self.send_page_of(
+            items[:search_result_limit],
+            lambda item: repo.issue_payload(item, self.base_url),
+            "/search/issues",
+            {"total_count": len(items), "incomplete_results": False},
+        )
+
+
+class FakeGitHub(http.server.ThreadingHTTPServer):
+    """threaded server for one or more FakeRepo
+
+    Args:
+      repos: FakeRepo objects to serve
+      host: interface to listen on
+      port: 0 picks a free port
+      rate_limit: requests per hour before answering 403
+      latency: seconds added to every response, to imitate a network
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        repos: list,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate_limit: int = 5000,
+        latency: float = 0.0,
+    ):
+        super().__init__((host, port), FakeGitHubHandler)
+        self.repos = {repo.full_name: repo for repo in repos}
+        self.rate_limit = RateLimit(rate_limit)
+        self.latency = latency
+        self.requests_served = 0
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._count_lock:
+            self.requests_served += 1
+
+    def start(self) -> str:
+        """serve in a background thread
+
+        Returns:
+            base url to pass as --base-url / Settings.base_url
+
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    """generate a repo and serve it until interrupted"""
+    parser = argparse.ArgumentParser(
+        prog="python -m fake_github",
+        description="serve a synthetic repo through a local GitHub REST stand-in",
+    )
+    parser.add_argument("--repo", nargs="+", default=["python/cpython"])
+    parser.add_argument("--pull-requests", type=int, default=100000)
+    parser.add_argument("--issues", type=int, help="default a quarter of the PRs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--end-date",
+        type=datetime.datetime.fromisoformat,
+        default=datetime.datetime(2021, 12, 1),
+        help="last day with activity, YYYY-MM-DD",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="per hour")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    args = parser.parse_args(argv)
+
+    repos = []
+    for position, full_name in enumerate(args.repo):
+        started = time.perf_counter()
+        repos.append(
+            generate_repo(
+                full_name,
+                args.pull_requests,
+                args.issues,
+                args.end_date,
+                seed=args.seed + position,
+            )
+        )
+        logging.info(
+            f"generated {full_name}: {len(repos[-1].pull_requests)} PRs, "
+            f"{len(repos[-1].issues)} issues in {time.perf_counter() - started:.1f}s"
+        )
+
+    server = FakeGitHub(repos, args.host, args.port, args.rate_limit, args.latency)
+    logging.info(f"serving on {server.base_url}; use --base-url {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
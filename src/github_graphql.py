@@ -0,0 +1,179 @@
+"""
+module fetches PR classification fields in batches from the GitHub GraphQL API.
+One request returns up to 100 PRs with merged status, merger, author, comment
+count, base branch, key dates, plus review / comment / closer logins, instead of
+several REST round-trips per PR.  Results are PullRequestRecord objects that
+filter_prs_from_date_range and summarize_pr_info consume like PyGithub PRs.
+"""
+
+import datetime
+import logging
+
+import config
+import transport
+from pr_records import PullRequestRecord
+from utilities import parse_github_timestamp
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+graphql_page_size: int = 100  # GitHub maximum for a connection
+# reviews / comments per PR; keeps query cost low.  PRs with more leave
+# discussion_authors unset, and their discussion is read from the timeline
+discussion_page_size: int = 50
+
+pull_request_fields = f"""
+    number
+    title
+    url
+    state
+    createdAt
+    updatedAt
+    closedAt
+    mergedAt
+    merged
+    mergedBy {{ login }}
+    author {{ login }}
+    baseRefName
+    comments(first: {discussion_page_size}) {{
+        totalCount
+        nodes {{ author {{ login }} }}
+    }}
+    reviews(first: {discussion_page_size}) {{
+        totalCount
+        nodes {{ author {{ login }} state submittedAt }}
+    }}
+    timelineItems(itemTypes: [CLOSED_EVENT], last: 1) {{
+        nodes {{ ... on ClosedEvent {{ actor {{ login }} }} }}
+    }}
+"""
+
+pull_requests_by_update_query = f"""
+query($owner: String!, $name: String!, $cursor: String) {{
+    rateLimit {{ cost remaining }}
+    repository(owner: $owner, name: $name) {{
+        pullRequests(
+            first: {graphql_page_size}
+            after: $cursor
+            orderBy: {{ field: UPDATED_AT, direction: DESC }}
+        ) {{
+            pageInfo {{ hasNextPage endCursor }}
+            nodes {{ {pull_request_fields} }}
+        }}
+    }}
+}}
+"""
+
+
+class GraphQLError(Exception):
+    """GitHub answered a GraphQL request with errors"""
+
+
+def run_graphql_query(query: str, variables: dict) -> dict:
+    """posts one query to the GraphQL endpoint
+
+    Args:
+      query: GraphQL document
+      variables: values for the query variables
+
+    Returns:
+        dict from the `data` member of the response
+
+    """
+    github_token = config.settings.github_token
+    if not github_token:
+        raise GraphQLError("GitHub GraphQL API requires GITHUB_ACCESS_TOKEN")
+
+    response = transport.get_session().post(
+        f"{config.settings.base_url}/graphql",
+        json={"query": query, "variables": variables},
+        headers={"Authorization": f"bearer {github_token}"},
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("errors"):
+        raise GraphQLError(payload["errors"])
+
+    rate_limit = payload["data"].get("rateLimit")
+    if rate_limit:
+        logging.debug(f"graphql query cost {rate_limit}")
+    return payload["data"]
+
+
+def iter_pull_requests_by_update(
+    target_repo: str, report_start_date: datetime.datetime
+):
+    """yields PR records, most recently updated first, until older than start date
+
+    Args:
+      target_repo: owner/name of repo
+      report_start_date: stop paging once PRs were last updated before this
+
+    Returns:
+        generator of PullRequestRecord; same order as pull_requests_all
+
+    """
+    owner, name = target_repo.split("/")
+    cursor = None
+
+    while True:
+        data = run_graphql_query(
+            pull_requests_by_update_query,
+            {"owner": owner, "name": name, "cursor": cursor},
+        )
+        pull_requests = data["repository"]["pullRequests"]
+
+        for node in pull_requests["nodes"]:
+            yield PullRequestRecord.from_graphql_node(node, target_repo)
+            # include first PR older than window; filter_prs_from_date_range
+            # uses it to break out of its loop, exactly as with REST lists
+            if parse_github_timestamp(node["updatedAt"]) < report_start_date:
+                return
+
+        if not pull_requests["pageInfo"]["hasNextPage"]:
+            return
+        cursor = pull_requests["pageInfo"]["endCursor"]
+
+
+def build_pull_requests_by_number_query(pr_numbers: list[int]) -> str:
+    """one query with an aliased pullRequest lookup per PR number"""
+    lookups = "\n".join(
+        f"pr{number}: pullRequest(number: {int(number)}) {{ {pull_request_fields} }}"
+        for number in pr_numbers
+    )
+    return f"""
+query($owner: String!, $name: String!) {{
+    rateLimit {{ cost remaining }}
+    repository(owner: $owner, name: $name) {{
+        {lookups}
+    }}
+}}
+"""
+
+
+def fetch_pull_requests_by_number(target_repo: str, pr_numbers: list[int]) -> list:
+    """fetches PR records for arbitrary PR numbers, 100 per request
+
+    Args:
+      target_repo: owner/name of repo
+      pr_numbers: PR numbers to fetch
+
+    Returns:
+        list of PullRequestRecord in the same order as pr_numbers
+
+    """
+    owner, name = target_repo.split("/")
+    records = []
+
+    for batch_start in range(0, len(pr_numbers), graphql_page_size):
+        batch = pr_numbers[batch_start : batch_start + graphql_page_size]
+        data = run_graphql_query(
+            build_pull_requests_by_number_query(batch), {"owner": owner, "name": name}
+        )
+        for number in batch:
+            node = data["repository"][f"pr{int(number)}"]
+            if node is None:
+                logging.warning(f"PR# {number} not found in {target_repo}")
+                continue
+            records.append(PullRequestRecord.from_graphql_node(node, target_repo))
+
+    return records
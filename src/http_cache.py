@@ -0,0 +1,282 @@
+"""
+persistent on-disk cache for GitHub GET responses, revalidated with conditional
+requests.  Stored ETag / Last-Modified values are sent back as If-None-Match /
+If-Modified-Since; GitHub answers unchanged resources with 304 Not Modified,
+which does not count against the 5,000 call/hour rate limit, and the stored
+body is served instead.
+
+Entries live in one SQLite file (WAL mode), so threads in main and parallel
+pytest workers can read and write the same cache safely; the least recently
+used entries are evicted once the cache grows past its size limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+cache_file_name: str = "http_cache.sqlite3"
+# eviction brings the cache down to this fraction of its size limit
+eviction_target_ratio: float = 0.8
+# stores between exact recounts of the cache size; the running total misses
+# entries other processes write to the same file
+size_recount_interval: int = 100
+
+
+class ResponseCache:
+    """SQLite-backed store of cacheable GET responses, keyed per url and token"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, cache_file_name)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._size_lock = threading.Lock()
+        self._size_estimate: int | None = None  # bytes, None until counted
+        self._stores_since_recount = 0
+        self._connection().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_used
+                ON responses (last_used);
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """one connection per thread; sqlite3 connections can't be shared"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    @staticmethod
+    def cache_key(request: requests.PreparedRequest) -> str:
+        """url plus the headers that change the response body"""
+        key_parts = [
+            request.method,
+            request.url,
+            request.headers.get("Accept", ""),
+            request.headers.get("Authorization", ""),
+        ]
+        return hashlib.sha256("\n".join(key_parts).encode()).hexdigest()
+
+    def lookup(self, key: str) -> dict | None:
+        """stored entry for key, or None
+
+        Returns:
+            dict with etag, last_modified, headers and body
+
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT etag, last_modified, headers, body FROM responses "
+                "WHERE key = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "headers": json.loads(row[2]),
+            "body": row[3],
+        }
+
+    def touch(self, key: str):
+        """mark entry as recently used, so eviction keeps it"""
+        self._connection().execute(
+            "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+
+    def store(self, key: str, response: requests.Response):
+        """save response when GitHub gave us a validator to revalidate it with"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag is None and last_modified is None:
+            return
+
+        body = response.content
+        connection = self._connection()
+        replaced = connection.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, url, etag, last_modified, headers, body, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                response.url,
+                etag,
+                last_modified,
+                json.dumps(dict(response.headers)),
+                body,
+                len(body),
+                time.time(),
+            ),
+        )
+        self._count("stores")
+        with self._size_lock:
+            self._stores_since_recount += 1
+            if self._size_estimate is not None:
+                self._size_estimate += len(body) - (replaced[0] if replaced else 0)
+        self.evict()
+
+    def total_bytes(self) -> int:
+        """size of all stored bodies; a full table scan, see evict"""
+        return (
+            self._connection()
+            .execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+            .fetchone()[0]
+        )
+
+    def evict(self):
+        """drop least recently used entries while cache is over its size limit
+
+        checked against a running total of stored bytes, so a store doesn't scan
+        the whole table; the total is recounted every size_recount_interval
+        stores and before anything is evicted
+        """
+        with self._size_lock:
+            if (
+                self._size_estimate is None
+                or self._stores_since_recount >= size_recount_interval
+            ):
+                self._size_estimate = self.total_bytes()
+                self._stores_since_recount = 0
+            if self._size_estimate <= self.max_bytes:
+                return
+            self._size_estimate = self._evict_to_target()
+
+    def _evict_to_target(self) -> int:
+        """deletes least recently used entries down to the eviction target
+
+        Returns:
+            bytes left in the cache
+
+        """
+        total_bytes = self.total_bytes()
+        if total_bytes <= self.max_bytes:
+            return total_bytes
+
+        target_bytes = self.max_bytes * eviction_target_ratio
+        connection = self._connection()
+        rows = connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        ).fetchall()
+        evicted_keys = []
+        for key, size in rows:
+            if total_bytes <= target_bytes:
+                break
+            evicted_keys.append((key,))
+            total_bytes -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+        self._count("evictions", len(evicted_keys))
+        logging.info(f"http cache evicted {len(evicted_keys)} entries")
+        return total_bytes
+
+    def clear(self):
+        """remove every entry"""
+        self._connection().execute("DELETE FROM responses")
+        with self._size_lock:
+            self._size_estimate = 0
+
+
+def build_cached_response(
+    request: requests.PreparedRequest, entry: dict, not_modified: requests.Response
+) -> requests.Response:
+    """turns a 304 into the stored 200 response; fresh headers (e.g. rate limit
+    counters) from the 304 are layered over the stored ones
+
+    Args:
+      request: request that was revalidated
+      entry: stored cache entry
+      not_modified: the 304 response from GitHub
+
+    Returns:
+        requests.Response with status 200 and the stored body
+
+    """
+    # read the (empty) 304 body to its end, so urllib3 hands the connection back
+    # to the pool for keep-alive instead of opening a new one for the next request
+    not_modified.content
+    not_modified.close()
+
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.headers.update(not_modified.headers)
+    # stored body is already decoded; drop transfer headers that no longer apply
+    response.headers.pop("Content-Encoding", None)
+    response.headers.pop("Content-Length", None)
+    response._content = entry["body"]
+    response.url = request.url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.reason = "OK"
+    response.elapsed = not_modified.elapsed
+    response.connection = not_modified.connection
+    response.from_cache = True
+    return response
+
+
+class CachingAdapter(requests.adapters.HTTPAdapter):
+    """transport adapter adding conditional requests and the response cache"""
+
+    def __init__(self, response_cache: ResponseCache, **kwargs):
+        super().__init__(**kwargs)
+        self.response_cache = response_cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = self.response_cache.cache_key(request)
+        entry = self.response_cache.lookup(key)
+        if entry is not None:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.response_cache._count("hits")
+            self.response_cache.touch(key)
+            return build_cached_response(request, entry, response)
+
+        self.response_cache._count("misses")
+        if response.status_code == 200:
+            self.response_cache.store(key, response)
+        response.from_cache = False
+        return response
@@ -0,0 +1,112 @@
+"""
+module finds who closed each issue from the repository's issue events,
+GET /repos/{owner}/{repo}/issues/events.  The issues listing leaves closed_by out,
+so reading it used to cost one GET per closed issue; one paginated pass over the
+events since the report start, joined in memory by issue number, answers it for
+every issue closed in that time.
+"""
+import datetime
+import logging
+import threading
+import typing
+
+import config
+from utilities import iter_json_pages
+from utilities import parse_github_timestamp
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+
+class Close(typing.NamedTuple):
+    """the newest close of an issue in the events listing"""
+
+    actor: str | None
+    closed_at: datetime.datetime
+
+
+class IssueClosers:
+    """closers of a repo's issues, read from the issue events listing on demand
+
+    events come newest first, so pages are read only until the oldest close asked
+    about, never past since, and never more pages than closers were asked for:
+    the events pass costs at most as many requests as fetching each closed issue
+
+    Args:
+      target_repo: owner/name of repo
+      since: oldest event worth reading, usually the report start date
+    """
+
+    def __init__(self, target_repo: str, since: datetime.datetime):
+        self.target_repo = target_repo
+        self.since = since
+        # number: newest close, or None when the issue was reopened after it
+        self.closes: dict[int, Close | None] = {}
+        self.oldest_read: datetime.datetime | None = None
+        self.exhausted = False
+        self.pages_read = 0
+        self.lookups = 0
+        self._pages = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"{config.settings.base_url}/repos/{self.target_repo}/issues/events"
+
+    def add_events(self, events: list):
+        """record the newest close / reopen of each issue in a page of events"""
+        for event in events:
+            created_at = parse_github_timestamp(event["created_at"])
+            self.oldest_read = created_at
+            if event["event"] not in ("closed", "reopened") or not event.get("issue"):
+                continue
+            number = event["issue"]["number"]
+            if number in self.closes:
+                continue  # a newer close or reopen was already read
+            actor = (event.get("actor") or {}).get("login")
+            self.closes[number] = (
+                Close(actor, created_at) if event["event"] == "closed" else None
+            )
+
+    def covers(self, closed_at: datetime.datetime) -> bool:
+        """all events at or after closed_at have been read"""
+        return self.exhausted or (
+            self.oldest_read is not None and self.oldest_read < closed_at
+        )
+
+    def read_page(self) -> bool:
+        """reads the next page of events; False once the listing is done"""
+        if self._pages is None:
+            self._pages = iter_json_pages(self.url)
+        page = next(self._pages, None)
+        if not page:
+            self.exhausted = True
+            return False
+        self.pages_read += 1
+        self.add_events(page)
+        if self.oldest_read < self.since:
+            self.exhausted = True
+        return not self.exhausted
+
+    def closer(self, number: int, closed_at: datetime.datetime | None) -> Close | None:
+        """the close of an issue that ended at closed_at, from the events
+
+        Args:
+          number: issue (or PR) number
+          closed_at: closed_at of the issue payload
+
+        Returns:
+            Close, or None when the events read don't show that close; the
+            caller then fetches the issue itself
+
+        """
+        if closed_at is None:
+            return None
+        with self._lock:
+            self.lookups += 1
+            while closed_at >= self.since and not self.covers(closed_at):
+                if self.pages_read >= self.lookups or not self.read_page():
+                    break
+            close = self.closes.get(number)
+        if close is None or close.closed_at != closed_at:
+            return None
+        return close
@@ -1,65 +1,705 @@
 """
 main file to configure and execute GitHub searches to summarize
 PR and Issue data for Developer In Residence blog
+
+run from the src directory, e.g.:
+    python -m main --repo python/cpython --developers ambv \
+        --start-date 2021-11-15 --end-date 2021-11-21
+any option left out falls back to the values set in config.py
 """
+
+import argparse
+import concurrent.futures
+import cProfile
+import dataclasses
+import datetime
 import logging
+import os
 
-from config import developer_ids
-from config import end_date
-from config import end_date_buffer
-from config import issues_all
-from config import pull_requests_all
-from config import start_date
+import config
+import tracing
+import webhooks
+from async_pipeline import run_async_report
+from backfill import build_weekly_reports
+from backfill import iso_weeks
+from backfill import weekly_report_path
+from cassette import cassette_modes
+from github_graphql import fetch_pull_requests_by_number
+from github_graphql import iter_pull_requests_by_update
+from mirror import load_issues
+from mirror import load_pull_requests
+from mirror import mirror_covers
+from mirror import mirror_path
+from mirror import open_mirror
+from mirror import sync_mirror
+from pr_search import search_pull_request_numbers
+from pr_search import search_pull_requests
+from pr_records import completion_statistics
+from rate_limit import SchedulerManager
+from streaming import stream_report_items
+from team_report import build_team_reports
+from team_report import developer_report_path
+from transport import active_cassette
+from transport import pool_statistics
+from transport import save_cassette
+from transport import scheduler_statistics
 from utilities import check_github_rate_limit
 from utilities import timer_decorator
+from watch import watch_report
 from weekly_issues_summary import get_final_issues
 from weekly_pr_summary import format_final_html_block
 from weekly_pr_summary import get_final_summary
+from weekly_pr_summary import iter_html_block
 from weekly_pr_summary import sort_final_data
 
 logging.basicConfig(encoding="utf-8", level=logging.INFO)
 
 
-@timer_decorator
-def main():
-    """main program to pull data and produce blog-ready output"""
+def parse_date(input_date: str) -> datetime.datetime:
+    """argparse type for YYYY-MM-DD dates
+
+    Args:
+      input_date: date string from the command line
+
+    Returns:
+        datetime.datetime at midnight of the given day
+
+    """
+    try:
+        return datetime.datetime.strptime(input_date, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {input_date!r}")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """command line options; defaults come from config.py"""
+    parser = argparse.ArgumentParser(
+        prog="python -m main",
+        description="summarize GitHub PR and issue activity for a date range",
+    )
+    parser.add_argument(
+        "--repo",
+        nargs="+",
+        metavar="OWNER/NAME",
+        help="repo, or several repos for one combined report "
+        f"(default {config.target_repo})",
+    )
+    parser.add_argument(
+        "--developers",
+        nargs="+",
+        metavar="ID",
+        help=f"GitHub ids to report on (default {' '.join(config.developer_ids)})",
+    )
+    parser.add_argument(
+        "--start-date", type=parse_date, help="first day of report, YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--end-date", type=parse_date, help="last day of report, YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--buffer",
+        type=int,
+        help="days added to end date to catch bot merges "
+        f"(default {config.end_date_buffer})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=f"threads running PR and issue pipelines (default {config.workers})",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help=f"worker processes for several repos (default {config.processes})",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_asyncio",
+        action="store_true",
+        help="fetch pages, PR details and timelines concurrently with asyncio",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help=f"requests in flight for --async (default {config.concurrency})",
+    )
+    parser.add_argument(
+        "--retrieval",
+        choices=("list", "search"),
+        help="walk all PRs by update date, or use the Search API for the window "
+        f"(default {config.retrieval})",
+    )
+    parser.add_argument(
+        "--fetcher",
+        choices=("rest", "graphql"),
+        help="read PR fields per PR over REST, or in batches of 100 over GraphQL "
+        f"(default {config.fetcher})",
+    )
+    parser.add_argument(
+        "--review-backend",
+        choices=("api", "html"),
+        help="find reviews via PR timeline API, or by scraping PR pages "
+        f"(default {config.review_backend})",
+    )
+    parser.add_argument(
+        "--source",
+        choices=("github", "mirror", "webhooks"),
+        help="crawl GitHub, report from the local SQLite mirror, or from the "
+        f"events stored by `python -m webhooks serve` (default {config.source})",
+    )
+    parser.add_argument(
+        "--event-store",
+        help="webhook event store for --source webhooks "
+        "(default webhook_events.jsonl in the cache directory)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="bring the local mirror up to date before reporting",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"http response cache; '' disables it (default {config.cache_dir})",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        help=f"http cache size limit (default {config.cache_max_mb})",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        help=f"keep-alive connections per host (default {config.pool_size})",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        default=None,
+        help="multiplex requests over HTTP/2 (needs httpx[http2] installed)",
+    )
+    parser.add_argument(
+        "--max-request-rate",
+        type=float,
+        help=f"requests per second to GitHub (default {config.max_request_rate})",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="GitHub REST API root, e.g. a fake_github server "
+        f"(default {config.base_url})",
+    )
+    parser.add_argument(
+        "--cassette",
+        help="record GitHub traffic to this file, or replay it without network "
+        "access, e.g. tests/cassettes/weekly.jsonl.gz",
+    )
+    parser.add_argument(
+        "--cassette-mode",
+        choices=cassette_modes,
+        help="replay an existing cassette and record a missing one, always "
+        f"record, or only replay (default {config.cassette_mode})",
+    )
+    parser.add_argument(
+        "--output", default="GitHub_summary.txt", help="report file to write"
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="write one report per ISO week of the date range, e.g. "
+        "GitHub_summary_2021-W46.txt, from a single scan",
+    )
+    parser.add_argument(
+        "--team",
+        action="store_true",
+        help="also write one report per developer, e.g. GitHub_summary_ambv.txt, "
+        "from the same crawl; --output gets the team report",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read GitHub one page at a time and append report items to "
+        "<output>.partial as they are found",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep --output up to date for the current week (or the given dates) "
+        "until interrupted, reading only what changed since the last poll",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        help="shortest wait in seconds between --watch polls; longer when the "
+        f"rate limit budget runs low (default {config.watch_interval})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run from its checkpoint, "
+        "<output>.checkpoint.json, instead of starting over",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="write a Chrome / Perfetto trace (<output>.trace.json) and a cProfile "
+        "dump (<output>.pstats), and log the most expensive PRs",
+    )
+    return parser
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """parse command line and activate the matching config.settings
+
+    Args:
+      argv: list of arguments, defaults to sys.argv[1:]
+
+    Returns:
+        argparse.Namespace with the parsed options
+
+    """
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.backfill and args.use_asyncio:
+        parser.error("--backfill can not be combined with --async")
+    if args.team and (args.backfill or args.use_asyncio):
+        parser.error("--team can not be combined with --backfill or --async")
+    if args.stream and (args.backfill or args.team or args.use_asyncio):
+        parser.error("--stream can not be combined with --backfill, --team or --async")
+    if args.watch and (args.backfill or args.team or args.stream or args.use_asyncio):
+        parser.error(
+            "--watch can not be combined with --backfill, --team, --stream or --async"
+        )
+
+    changes = {}
+    if args.repo is not None:
+        changes["target_repo"] = args.repo[0] if len(args.repo) == 1 else args.repo
+    if args.developers is not None:
+        changes["developer_ids"] = args.developers
+    if args.start_date is not None:
+        changes["start_date"] = args.start_date
+    if args.end_date is not None:
+        # capture all 24 hours of the last day, same as config.py
+        changes["end_date"] = args.end_date + datetime.timedelta(days=1)
+    if args.buffer is not None:
+        changes["end_date_buffer"] = args.buffer
+    if args.workers is not None:
+        changes["workers"] = args.workers
+    if args.processes is not None:
+        changes["processes"] = args.processes
+    if args.concurrency is not None:
+        changes["concurrency"] = args.concurrency
+    if args.retrieval is not None:
+        changes["retrieval"] = args.retrieval
+    if args.fetcher is not None:
+        changes["fetcher"] = args.fetcher
+    if args.review_backend is not None:
+        changes["review_backend"] = args.review_backend
+    if args.source is not None:
+        changes["source"] = args.source
+    if args.event_store is not None:
+        changes["event_store"] = args.event_store
+    if args.cache_dir is not None:
+        changes["cache_dir"] = args.cache_dir
+    if args.cache_max_mb is not None:
+        changes["cache_max_mb"] = args.cache_max_mb
+    if args.pool_size is not None:
+        changes["pool_size"] = args.pool_size
+    if args.http2 is not None:
+        changes["http2"] = args.http2
+    if args.max_request_rate is not None:
+        changes["max_request_rate"] = args.max_request_rate
+    if args.base_url is not None:
+        changes["base_url"] = args.base_url.rstrip("/")
+    if args.cassette is not None:
+        changes["cassette"] = args.cassette
+    if args.cassette_mode is not None:
+        changes["cassette_mode"] = args.cassette_mode
+    if args.watch_interval is not None:
+        changes["watch_interval"] = args.watch_interval
+    config.configure(**changes)
+    for mode in ("backfill", "team", "stream", "watch"):
+        if getattr(args, mode) and len(config.settings.repositories) > 1:
+            parser.error(f"--{mode} reports on one repo at a time")
+    if config.settings.cassette and len(config.settings.repositories) > 1:
+        # worker processes would each write the same cassette file
+        parser.error("--cassette records one repo at a time")
+
+    if args.watch and config.settings.source != "github":
+        parser.error(f"--watch reads GitHub, not --source {config.settings.source}")
+
+    # plain single repo runs against GitHub save their progress as they go
+    checkpointed = (
+        not (
+            args.backfill or args.team or args.stream or args.use_asyncio or args.watch
+        )
+        and len(config.settings.repositories) == 1
+        and config.settings.source == "github"
+    )
+    if args.resume and not checkpointed:
+        parser.error(
+            "--resume continues a plain report of one repo read from GitHub; "
+            "not --backfill, --team, --stream, --async, --watch or another --source"
+        )
+    config.configure(
+        checkpoint=f"{args.output}.checkpoint.json" if checkpointed else "",
+        resume=args.resume,
+    )
+
+    return args
+
+
+def write_report(filename: str, report_lines):
+    """write to local file for convenience & persistence
+
+    Args:
+      filename: output file
+      report_lines: formatted lines from format_final_html_block, or a generator
+        such as iter_html_block
+
+    """
+    with open(filename, "wb") as writer:
+        for item in report_lines:
+            writer.write(f"{item}\n".encode())
+
+
+def select_pull_requests(settings: config.Settings):
+    """PR source for the report, per the retrieval and fetcher settings
+
+    Args:
+      settings: active config.Settings
+
+    Returns:
+        iterable of PR objects or records, most recently updated first
+
+    """
+    if settings.retrieval == "search":
+        search_args = (
+            settings.developer_ids,
+            settings.start_date,
+            settings.end_date,
+            settings.end_date_buffer,
+        )
+        if settings.fetcher == "graphql":
+            return fetch_pull_requests_by_number(
+                settings.target_repo, search_pull_request_numbers(*search_args)
+            )
+        return search_pull_requests(*search_args)
+
+    if settings.fetcher == "graphql":
+        return iter_pull_requests_by_update(settings.target_repo, settings.start_date)
+    return settings.pull_requests_all
+
+
+def finish_checkpoint(settings: config.Settings):
+    """drop the checkpoint of a finished report; keep it when a pipeline stopped
+    early, so the run can be resumed"""
+    checkpoint = settings.report_checkpoint
+    if checkpoint is None:
+        return
+    if checkpoint.complete:
+        checkpoint.remove()
+    else:
+        logging.warning(
+            f"report is incomplete; progress saved to {checkpoint.path}, "
+            "run again with --resume to finish it"
+        )
+
+
+def log_run_statistics(settings: config.Settings):
+    """connection reuse, rate limit waits, discussion memo hits and full PR
+    fetches of the run"""
+    logging.info(f"http connections: {pool_statistics()}")
+    logging.info(f"rate limit scheduler: {scheduler_statistics()}")
+    logging.info(f"discussion memo: {settings.discussion_memo.statistics}")
+    logging.info(f"PR snapshot completions: {completion_statistics}")
+    cassette = active_cassette()
+    if cassette is not None:
+        logging.info(f"cassette: {cassette.statistics}")
+
+
+def load_report_inputs(settings: config.Settings) -> tuple:
+    """PRs and issues for the report, from the local mirror, the webhook event
+    store or from GitHub
+
+    Args:
+      settings: active config.Settings
+
+    Returns:
+        tuple of PR iterable and issue iterable, most recently updated first
+
+    """
+    if settings.source == "mirror":
+        connection = open_mirror(mirror_path(settings))
+        for table in ("pull_requests", "issues"):
+            if not mirror_covers(connection, table, settings.start_date):
+                logging.warning(
+                    f"mirror {table} not synced back to {settings.start_date}, "
+                    "the report may miss items; run with --sync"
+                )
+        pull_requests = load_pull_requests(
+            connection,
+            settings.start_date,
+            settings.end_date + datetime.timedelta(days=settings.end_date_buffer),
+        )
+        issues_all = load_issues(connection, settings.start_date)
+        connection.close()
+        return pull_requests, issues_all
+
+    if settings.source == "webhooks":
+        # everything comes from the stored deliveries, no GitHub calls
+        return webhooks.load_report_inputs(
+            webhooks.EventStore(webhooks.event_store_path(settings)),
+            settings.target_repo,
+            settings.start_date,
+            settings.end_date + datetime.timedelta(days=settings.end_date_buffer),
+        )
+
     check_github_rate_limit()
+    return select_pull_requests(settings), settings.issues_all
 
-    # threading may help speed up due to lots of I/O with GitHub
-    import concurrent.futures
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+def collect_report_items(settings: config.Settings, use_asyncio: bool = False):
+    """unsorted report tuples for the PRs and issues of one repo
+
+    Args:
+      settings: active config.Settings
+      use_asyncio: fetch through the asyncio pipeline
+
+    Returns:
+        list of report tuples
+
+    """
+    if use_asyncio:
+        check_github_rate_limit()
+        return run_async_report(settings)
+
+    pull_requests, issues_all = load_report_inputs(settings)
+
+    # threading may help speed up due to lots of I/O with GitHub
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=settings.workers
+    ) as executor:
         prs = executor.submit(
             get_final_summary,
-            pull_requests_all,
-            developer_ids,
-            start_date,
-            end_date
+            pull_requests,
+            settings.developer_ids,
+            settings.start_date,
+            settings.end_date,
         )
 
         issues = executor.submit(
             get_final_issues,
             issues_all,
-            developer_ids,
-            start_date,
-            end_date,
-            end_date_buffer,
+            settings.developer_ids,
+            settings.start_date,
+            settings.end_date,
+            settings.end_date_buffer,
+        )
+
+    return prs.result() + issues.result()
+
+
+def collect_repo_report_items(
+    settings: config.Settings, use_asyncio: bool, sync: bool
+) -> list:
+    """report tuples for one repo of a multi-repo report, with the repo appended
+    as an extra column; runs in a worker process
+
+    Args:
+      settings: config.Settings for this repo only
+      use_asyncio: fetch through the asyncio pipeline
+      sync: bring the repo's mirror up to date first
+
+    Returns:
+        list of report tuples ending with the repo name
+
+    """
+    # worker processes start with config.py defaults, activate this repo's settings
+    config.settings = settings
+    if sync:
+        sync_mirror(settings)
+    report_items = collect_report_items(settings, use_asyncio)
+    log_run_statistics(settings)
+    return [report_item + (settings.target_repo,) for report_item in report_items]
+
+
+@timer_decorator
+def run_multi_repo_report(
+    settings: config.Settings, use_asyncio: bool = False, sync: bool = False
+) -> list:
+    """report tuples for every repo in settings.target_repo, one process per repo
+
+    all processes send their requests through one rate limit scheduler, served
+    by a SchedulerManager, so together they stay inside the GitHub budget
+
+    Args:
+      settings: config.Settings listing several repos
+      use_asyncio: fetch through the asyncio pipeline
+      sync: bring each repo's mirror up to date first
+
+    Returns:
+        list of report tuples from all repos, each ending with its repo name
+
+    """
+    repositories = settings.repositories
+    processes = min(settings.processes, len(repositories))
+    pool_size = max(settings.pool_size, settings.concurrency, settings.workers)
+    with SchedulerManager() as manager:
+        scheduler = manager.RateLimitScheduler(
+            settings.max_request_rate,
+            pool_size * processes,
+            settings.rate_limit_retries,
         )
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(
+                    collect_repo_report_items,
+                    dataclasses.replace(
+                        settings, target_repo=repo, rate_limit_scheduler=scheduler
+                    ),
+                    use_asyncio,
+                    sync,
+                )
+                for repo in repositories
+            ]
+            combined_results = [
+                report_item for future in futures for report_item in future.result()
+            ]
+        logging.info(f"shared rate limit scheduler: {scheduler.snapshot()}")
+    return combined_results
+
+
+@timer_decorator
+def run_report(args: argparse.Namespace) -> bool:
+    """writes the report(s) the command line asked for
 
-    combined_results = prs.result() + issues.result()
+    Args:
+      args: parsed command line, config.settings already activated
+
+    Returns:
+        True once the report is written
+
+    """
+    settings = config.settings
+
+    if len(settings.repositories) > 1:
+        combined_results = run_multi_repo_report(settings, args.use_asyncio, args.sync)
+        write_report(
+            args.output, format_final_html_block(sort_final_data(combined_results))
+        )
+        return True
+
+    weeks = None
+    if args.backfill:
+        # scan from the first week's Monday through the last week's Sunday
+        weeks = iso_weeks(settings.start_date, settings.end_date)
+        settings = config.configure(start_date=weeks[0].start, end_date=weeks[-1].end)
+
+    if args.sync:
+        sync_mirror(settings)
+
+    if args.backfill:
+        pull_requests, issues_all = load_report_inputs(settings)
+        reports = build_weekly_reports(pull_requests, issues_all, weeks, settings)
+        for week, report_lines in reports.items():
+            write_report(weekly_report_path(args.output, week), report_lines)
+        log_run_statistics(settings)
+        return True
+
+    if args.team:
+        pull_requests, issues_all = load_report_inputs(settings)
+        developer_reports, team_report = build_team_reports(
+            pull_requests, issues_all, settings
+        )
+        for developer, report_lines in developer_reports.items():
+            write_report(developer_report_path(args.output, developer), report_lines)
+        write_report(args.output, team_report)
+        log_run_statistics(settings)
+        return True
+
+    if args.watch:
+        # dates given on the command line pin the window; otherwise follow the
+        # current week
+        fixed_window = None
+        if args.start_date is not None or args.end_date is not None:
+            fixed_window = (settings.start_date, settings.end_date)
+        try:
+            watch_report(args.output, fixed_window)
+        except KeyboardInterrupt:
+            logging.info(f"watch stopped, {args.output} is up to date")
+        log_run_statistics(settings)
+        return True
+
+    if args.stream:
+        progress_path = f"{args.output}.partial"
+        pull_requests, issues_all = load_report_inputs(settings)
+        report_items = stream_report_items(
+            pull_requests, issues_all, settings, progress_path
+        )
+        # the report is sorted by day, so it can only be rendered once all
+        # items are in; render it straight into the file
+        write_report(args.output, iter_html_block(sort_final_data(report_items)))
+        os.remove(progress_path)
+        log_run_statistics(settings)
+        return True
+
+    combined_results = collect_report_items(settings, args.use_asyncio)
 
     combined_results = sort_final_data(combined_results)
 
     combined_results = format_final_html_block(combined_results)
 
-    # write to local file for convenience & persistence
-    with open("GitHub_summary.txt", "wb") as writer:
-        for item in combined_results:
-            writer.write(f"{item}\n".encode())
+    write_report(args.output, combined_results)
+    log_run_statistics(settings)
+    finish_checkpoint(settings)
 
     return True
 
 
+def run_profiled(args: argparse.Namespace) -> bool:
+    """run_report with tracing and cProfile on; writes the trace and profile next
+    to the report and logs totals and the most expensive PRs
+
+    Args:
+      args: parsed command line
+
+    Returns:
+        result of run_report
+
+    """
+    profiler = cProfile.Profile()
+    tracing.tracer.enable()
+    profiler.enable()
+    try:
+        return run_report(args)
+    finally:
+        profiler.disable()
+        tracing.tracer.disable()
+        profiler.dump_stats(f"{args.output}.pstats")
+        tracing.tracer.write_chrome_trace(f"{args.output}.trace.json")
+        logging.info(f"traced totals: {tracing.tracer.totals}")
+        for span in tracing.tracer.expensive_spans("pull_request"):
+            logging.info(
+                f"{span.name}: {span.duration:.2f}s, "
+                f"{span.args['http_calls']} http calls, "
+                f"{span.args['bytes_received']} bytes, "
+                f"{span.args['cache_hits']} cache hits"
+            )
+        logging.info(f"trace and profile written to {args.output}.trace.json/.pstats")
+
+
+@timer_decorator
+def main(argv=None):
+    """main program to pull data and produce blog-ready output"""
+    args = parse_args(argv)
+    try:
+        if args.profile:
+            return run_profiled(args)
+        return run_report(args)
+    finally:
+        # keep what was recorded, even when the run failed part way
+        save_cassette()
+
+
 if __name__ == "__main__":
-    """before you execute this - please modify search parameters in config.py"""
+    """search parameters come from the command line, or config.py defaults"""
     main()
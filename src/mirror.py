@@ -0,0 +1,393 @@
+"""
+module keeps a local SQLite mirror of PR and issue metadata for a repo, so reports
+run against the mirror instead of re-crawling GitHub.  Each sync only asks GitHub
+for items updated since the last sync (the `updated_at` watermark), which for a
+weekly report is a few pages; reports then use indexed date-range queries.  The
+oldest update time ever synced (the low-water mark) is kept too: a sync for a
+report starting before it reads back to the report start instead.
+"""
+import datetime
+import json
+import logging
+import os
+import sqlite3
+
+import config
+from github_graphql import iter_pull_requests_by_update
+from issue_events import IssueClosers
+from pr_records import BranchRef
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+from pr_records import UserRef
+from utilities import get_json
+from utilities import iter_json_pages
+from utilities import parse_github_timestamp
+from utilities import timer_decorator
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+# re-read a few minutes before the watermark; items updated in the same second
+# as the last sync could otherwise be missed
+sync_overlap = datetime.timedelta(minutes=5)
+commit_every: int = 100  # rows per transaction while syncing
+
+mirror_schema = """
+CREATE TABLE IF NOT EXISTS pull_requests (
+    number INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    state TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    closed_at TEXT,
+    merged_at TEXT,
+    merged_by TEXT,
+    base_ref TEXT,
+    comments INTEGER NOT NULL,
+    html_url TEXT NOT NULL,
+    review_comments_url TEXT,
+    discussion_authors TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pull_requests_updated_at ON pull_requests (updated_at);
+CREATE INDEX IF NOT EXISTS pull_requests_created_at ON pull_requests (created_at);
+CREATE INDEX IF NOT EXISTS pull_requests_closed_at ON pull_requests (closed_at);
+CREATE INDEX IF NOT EXISTS pull_requests_merged_at ON pull_requests (merged_at);
+
+CREATE TABLE IF NOT EXISTS issues (
+    number INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    state TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    closed_at TEXT,
+    closed_by TEXT,
+    url TEXT NOT NULL,
+    html_url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_updated_at ON issues (updated_at);
+CREATE INDEX IF NOT EXISTS issues_closed_at ON issues (closed_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL
+);
+"""
+
+
+def mirror_path(settings) -> str:
+    """mirror file for the settings' repo, stored next to the http cache"""
+    file_name = f"mirror_{settings.target_repo.replace('/', '_')}.sqlite3"
+    return os.path.join(settings.cache_dir or ".", file_name)
+
+
+def open_mirror(path: str) -> sqlite3.Connection:
+    """opens (and creates if needed) a mirror database"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(mirror_schema)
+    return connection
+
+
+def _to_text(timestamp: datetime.datetime | None) -> str | None:
+    """stores datetimes as sortable `YYYY-MM-DD HH:MM:SS` text"""
+    return None if timestamp is None else str(timestamp)
+
+
+def _from_text(timestamp: str | None) -> datetime.datetime | None:
+    return None if timestamp is None else datetime.datetime.fromisoformat(timestamp)
+
+
+def get_watermark(connection: sqlite3.Connection, name: str):
+    """latest updated_at synced for a table, or None before the first sync"""
+    row = connection.execute(
+        "SELECT watermark FROM sync_state WHERE name = ?", (name,)
+    ).fetchone()
+    return None if row is None else _from_text(row[0])
+
+
+def set_watermark(
+    connection: sqlite3.Connection, name: str, watermark: datetime.datetime
+):
+    connection.execute(
+        "INSERT OR REPLACE INTO sync_state (name, watermark) VALUES (?, ?)",
+        (name, _to_text(watermark)),
+    )
+
+
+def low_water_name(table: str) -> str:
+    """sync_state name of a table's low-water mark, the oldest update synced"""
+    return f"{table}_low_water"
+
+
+def mirror_covers(
+    connection: sqlite3.Connection, table: str, since: datetime.datetime
+) -> bool:
+    """every item of table updated since a date has been synced at some point"""
+    low_water = get_watermark(connection, low_water_name(table))
+    return low_water is not None and low_water <= since
+
+
+def store_pull_request(connection: sqlite3.Connection, record):
+    """insert or update one PR from a PullRequestRecord"""
+    connection.execute(
+        "INSERT OR REPLACE INTO pull_requests VALUES "
+        "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            record.number,
+            record.title,
+            record.user.login,
+            record.state,
+            _to_text(record.created_at),
+            _to_text(record.updated_at),
+            _to_text(record.closed_at),
+            _to_text(record.merged_at),
+            None if record.merged_by is None else record.merged_by.login,
+            record.base.ref,
+            record.comments,
+            record.html_url,
+            record.review_comments_url,
+            # null when only part of the discussion was fetched, see
+            # PullRequestRecord; the column predates it and is NOT NULL
+            json.dumps(
+                None
+                if record.discussion_authors is None
+                else sorted(record.discussion_authors)
+            ),
+        ),
+    )
+
+
+def store_issue(connection: sqlite3.Connection, record):
+    """insert or update one issue from an IssueRecord"""
+    connection.execute(
+        "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            record.number,
+            record.title,
+            record.user.login,
+            record.state,
+            _to_text(record.created_at),
+            _to_text(record.updated_at),
+            _to_text(record.closed_at),
+            None if record.closed_by is None else record.closed_by.login,
+            record.url,
+            record.html_url,
+        ),
+    )
+
+
+def sync_pull_requests(
+    connection: sqlite3.Connection, target_repo: str, since: datetime.datetime
+) -> int:
+    """copies PRs updated since a date into the mirror, 100 per GraphQL request
+
+    Args:
+      connection: open mirror
+      target_repo: owner/name of repo
+      since: oldest update time to sync
+
+    Returns:
+        int number of PRs stored
+
+    """
+    watermark = get_watermark(connection, "pull_requests")
+    stored = 0
+    for record in iter_pull_requests_by_update(target_repo, since):
+        store_pull_request(connection, record)
+        watermark = max(filter(None, (watermark, record.updated_at)))
+        stored += 1
+        if stored % commit_every == 0:
+            connection.commit()
+
+    if watermark is not None:
+        set_watermark(connection, "pull_requests", watermark)
+    connection.commit()
+    return stored
+
+
+def _known_closer(connection: sqlite3.Connection, payload: dict) -> str | None:
+    """closer already in the mirror for this close, to skip refetching the issue"""
+    row = connection.execute(
+        "SELECT closed_by FROM issues WHERE number = ? AND closed_at = ?",
+        (payload["number"], _to_text(parse_github_timestamp(payload["closed_at"]))),
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def sync_issues(
+    connection: sqlite3.Connection, target_repo: str, since: datetime.datetime
+) -> int:
+    """copies issues updated since a date into the mirror
+
+    the issues listing includes PRs, exactly like repo.get_issues(), and does not
+    carry closed_by; the closer of a close the mirror doesn't know yet comes from
+    the issue events, and the item is fetched only when the events don't show it
+
+    Args:
+      connection: open mirror
+      target_repo: owner/name of repo
+      since: oldest update time to sync
+
+    Returns:
+        int number of issues stored
+
+    """
+    watermark = get_watermark(connection, "issues")
+    params = {"state": "all", "sort": "updated", "direction": "desc"}
+    if since is not None:
+        params["since"] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    stored = 0
+    closers = IssueClosers(target_repo, since or datetime.datetime.min)
+    issues_url = f"{config.settings.base_url}/repos/{target_repo}/issues"
+    for page in iter_json_pages(issues_url, params):
+        for payload in page:
+            closed_by = None
+            if payload["state"] == "closed":
+                closed_by = _known_closer(connection, payload)
+                if closed_by is None:
+                    close = closers.closer(
+                        payload["number"], parse_github_timestamp(payload["closed_at"])
+                    )
+                    if close is not None:
+                        closed_by = close.actor
+                    else:
+                        payload = get_json(payload["url"])
+            record = IssueRecord.from_rest_payload(payload, closed_by)
+            store_issue(connection, record)
+            watermark = max(filter(None, (watermark, record.updated_at)))
+            stored += 1
+        connection.commit()
+
+    if watermark is not None:
+        set_watermark(connection, "issues", watermark)
+    connection.commit()
+    return stored
+
+
+@timer_decorator
+def sync_mirror(settings, since: datetime.datetime | None = None) -> dict:
+    """brings the mirror up to date with GitHub
+
+    Args:
+      settings: config.Settings for repo and mirror location
+      since: oldest update time the report needs, defaults to the report start
+        date.  Syncs start at the stored watermark, unless since is older than
+        the low-water mark; that sync reads everything updated since `since`.
+
+    Returns:
+        dict with the number of PRs and issues stored
+
+    """
+    connection = open_mirror(mirror_path(settings))
+    try:
+        results = {}
+        for table, sync_function in (
+            ("pull_requests", sync_pull_requests),
+            ("issues", sync_issues),
+        ):
+            watermark = get_watermark(connection, table)
+            report_since = since or settings.start_date
+            if watermark is not None and mirror_covers(connection, table, report_since):
+                table_since = watermark - sync_overlap
+            else:
+                table_since = report_since
+            logging.info(f"syncing {table} updated since {table_since}")
+            results[table] = sync_function(
+                connection, settings.target_repo, table_since
+            )
+            if not mirror_covers(connection, table, table_since):
+                set_watermark(connection, low_water_name(table), table_since)
+                connection.commit()
+    finally:
+        connection.close()
+
+    logging.info(f"mirror sync stored {results}")
+    return results
+
+
+def load_pull_requests(
+    connection: sqlite3.Connection,
+    report_start_date: datetime.datetime,
+    report_end_date: datetime.datetime,
+) -> list:
+    """PR records updated inside a window, newest first like pull_requests_all
+
+    Args:
+      connection: open mirror
+      report_start_date: beginning of window
+      report_end_date: end of window, including any end_date_buffer
+
+    Returns:
+        list of PullRequestRecord
+
+    """
+    rows = connection.execute(
+        "SELECT number, title, author, state, created_at, updated_at, closed_at, "
+        "merged_at, merged_by, base_ref, comments, html_url, review_comments_url, "
+        "discussion_authors FROM pull_requests "
+        "WHERE updated_at BETWEEN ? AND ? ORDER BY updated_at DESC",
+        (_to_text(report_start_date), _to_text(report_end_date)),
+    )
+    return [
+        PullRequestRecord(
+            number=row[0],
+            title=row[1],
+            user=UserRef(row[2]),
+            state=row[3],
+            created_at=_from_text(row[4]),
+            updated_at=_from_text(row[5]),
+            closed_at=_from_text(row[6]),
+            merged_at=_from_text(row[7]),
+            merged=row[7] is not None,
+            merged_by=None if row[8] is None else UserRef(row[8]),
+            base=BranchRef(row[9]),
+            comments=row[10],
+            html_url=row[11],
+            review_comments_url=row[12],
+            discussion_authors=_authors_from_text(row[13]),
+        )
+        for row in rows
+    ]
+
+
+def _authors_from_text(authors: str) -> set | None:
+    """stored discussion_authors; None (read the timeline) when truncated"""
+    logins = json.loads(authors)
+    return None if logins is None else set(logins)
+
+
+def load_issues(connection: sqlite3.Connection, since: datetime.datetime) -> list:
+    """issue records updated since a date, newest first like issues_all
+
+    Args:
+      connection: open mirror
+      since: oldest update time, the report start date
+
+    Returns:
+        list of IssueRecord
+
+    """
+    rows = connection.execute(
+        "SELECT number, title, author, state, created_at, updated_at, closed_at, "
+        "closed_by, url, html_url FROM issues "
+        "WHERE updated_at >= ? ORDER BY updated_at DESC",
+        (_to_text(since),),
+    )
+    return [
+        IssueRecord(
+            number=row[0],
+            title=row[1],
+            user=UserRef(row[2]),
+            state=row[3],
+            created_at=_from_text(row[4]),
+            updated_at=_from_text(row[5]),
+            closed_at=_from_text(row[6]),
+            closed_by=None if row[7] is None else UserRef(row[7]),
+            url=row[8],
+            html_url=row[9],
+        )
+        for row in rows
+    ]
@@ -0,0 +1,133 @@
+"""
+module jumps straight to the pages of a sorted GitHub listing that cover the
+report window.  Listings sorted newest first put every item changed since the
+window ahead of it; for a week a year ago that is hundreds of pages.  The page
+count comes from the `Link: rel="last"` header, pages can be fetched by number,
+and the pages are in order, so a binary search finds the first page reaching
+into the window in O(log pages) requests; only the window's pages are read
+after that.
+
+listings that support this carry a sort_field and a seek() method; see
+PullRequestListing and IssueListing.  seek_window() applies it when
+the listing's order matches the field a filter looks at, and hands any other
+iterable back unchanged.
+"""
+import logging
+
+import tracing
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+
+def find_first_page(page_count: int, pages, field: str, newest) -> int | None:
+    """binary search for the first page with an item no newer than newest
+
+    pages are sorted newest first, so "the page's last item is no newer than
+    newest" is false for some leading pages and true for all the rest
+
+    Args:
+      page_count: pages in the listing
+      pages: PageCache of the listing
+      field: attribute holding the sort timestamp, e.g. "updated_at"
+      newest: latest timestamp of interest
+
+    Returns:
+        page number, or None when every item is newer than newest
+
+    """
+    first_page = pages(1)
+    if first_page and getattr(first_page[-1], field) <= newest:
+        return 1  # recent windows, the usual case, cost no extra requests
+    low, high = 2, page_count
+    found = None
+    while low <= high:
+        middle = (low + high) // 2
+        page = pages(middle)
+        if page and getattr(page[-1], field) <= newest:
+            found = middle
+            high = middle - 1
+        elif page:
+            low = middle + 1
+        else:
+            # the listing shrank while we searched; look at earlier pages
+            high = middle - 1
+    return found
+
+
+def iter_window(page_count: int, pages, field: str, oldest, newest):
+    """items with oldest <= field <= newest, read from the first page that
+    reaches into the window onwards
+
+    Args:
+      page_count: pages in the listing
+      pages: PageCache of the listing
+      field: attribute holding the sort timestamp
+      oldest: earliest timestamp of interest; reading stops past it
+      newest: latest timestamp of interest
+
+    Returns:
+        generator of items, in listing order
+
+    """
+    with tracing.span("find_first_page", "seek", pages=page_count):
+        first_page = find_first_page(page_count, pages, field, newest)
+    if first_page is None:
+        return
+    logging.info(f"window starts on page {first_page} of {page_count}")
+
+    # items updated while we read move to page 1 and push the rest down, so an
+    # item can show up on two consecutive pages
+    seen = set()
+    page_number = first_page
+    while page := pages(page_number):
+        for item in page:
+            value = getattr(item, field)
+            if value < oldest:
+                return
+            if value <= newest and item.number not in seen:
+                seen.add(item.number)
+                yield item
+        pages.release(page_number)
+        page_number += 1
+
+
+def seek_window(items, field: str, oldest, newest):
+    """items restricted to a window when the listing can seek on field
+
+    Args:
+      items: listing, list or any other iterable
+      field: attribute a filter compares against the window, e.g. "updated_at"
+      oldest: earliest timestamp of interest
+      newest: latest timestamp of interest
+
+    Returns:
+        generator over the window's pages, or items unchanged
+
+    """
+    if getattr(items, "sort_field", None) != field:
+        return items
+    return items.seek(oldest, newest)
+
+
+class PageCache:
+    """pages of one listing, fetched by number on first use and kept until
+    released, so the binary search and the scan never fetch a page twice
+
+    Args:
+      fetch: page number (1 based) to list of items
+    """
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.pages = {}
+        self.requests = 0
+
+    def __call__(self, page_number: int) -> list:
+        if page_number not in self.pages:
+            self.pages[page_number] = self.fetch(page_number)
+            self.requests += 1
+        return self.pages[page_number]
+
+    def release(self, page_number: int):
+        """forget a page once its items are processed"""
+        self.pages.pop(page_number, None)
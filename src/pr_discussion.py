@@ -0,0 +1,163 @@
+"""
+module detects developer review / comment activity on PRs from the GitHub REST API.
+Reviews, issue comments and timeline entries are normalized into small
+actor / action / timestamp records, so checking a developer is a set lookup
+instead of a text search through the rendered html page of every PR.
+"""
+import datetime
+import logging
+import threading
+import typing
+
+import config
+from utilities import iter_json_pages
+from utilities import parse_github_timestamp
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+# actions that count as a developer reviewing a PR; replaces searching the page
+# for "approved these changes", "left a comment", "commented" and "closed this"
+review_actions = frozenset(
+    {"approved", "changes_requested", "reviewed", "commented", "closed"}
+)
+
+
+class DiscussionEvent(typing.NamedTuple):
+    """one thing a GitHub user did on a PR"""
+
+    actor: str | None
+    action: str
+    timestamp: datetime.datetime | None
+
+
+def _login(user: dict | None) -> str | None:
+    """login from a REST user dict; deleted (ghost) users come back as None"""
+    return user.get("login") if user else None
+
+
+def _review_action(review_state: str) -> str:
+    """maps review state (APPROVED, COMMENTED, ...) to a DiscussionEvent action"""
+    review_state = review_state.lower()
+    return "reviewed" if review_state == "commented" else review_state
+
+
+def events_from_reviews(reviews: list[dict]) -> list[DiscussionEvent]:
+    """normalize payload from GET /repos/{owner}/{repo}/pulls/{number}/reviews"""
+    return [
+        DiscussionEvent(
+            _login(review.get("user")),
+            _review_action(review["state"]),
+            parse_github_timestamp(review.get("submitted_at")),
+        )
+        for review in reviews
+    ]
+
+
+def events_from_issue_comments(comments: list[dict]) -> list[DiscussionEvent]:
+    """normalize payload from GET /repos/{owner}/{repo}/issues/{number}/comments
+    (also fits review comments from /pulls/{number}/comments)"""
+    return [
+        DiscussionEvent(
+            _login(comment.get("user")),
+            "commented",
+            parse_github_timestamp(comment.get("created_at")),
+        )
+        for comment in comments
+    ]
+
+
+def events_from_timeline(timeline: list[dict]) -> list[DiscussionEvent]:
+    """normalize payload from GET /repos/{owner}/{repo}/issues/{number}/timeline
+
+    the timeline embeds reviews and comments next to state changes, so one
+    listing covers everything the three separate endpoints would return
+
+    Args:
+      timeline: list of timeline entries
+
+    Returns:
+        list of DiscussionEvent; entries without a GitHub user are dropped
+
+    """
+    events = []
+    for entry in timeline:
+        event_type = entry.get("event")
+        if event_type == "reviewed":
+            events.extend(events_from_reviews([entry]))
+        elif event_type in ("line-commented", "commit-commented"):
+            events.extend(events_from_issue_comments(entry.get("comments", [])))
+        else:
+            actor = _login(entry.get("actor") or entry.get("user"))
+            if actor is None or event_type is None:
+                continue
+            events.append(
+                DiscussionEvent(
+                    actor, event_type, parse_github_timestamp(entry.get("created_at"))
+                )
+            )
+    return events
+
+
+def fetch_discussion_events(pr_number: int) -> list[DiscussionEvent]:
+    """downloads and normalizes all timeline entries for a PR, 100 per request
+
+    Args:
+      pr_number: PR number in config.settings.target_repo
+
+    Returns:
+        list of DiscussionEvent
+
+    """
+    url = (
+        f"{config.settings.base_url}/repos/{config.settings.target_repo}"
+        f"/issues/{pr_number}/timeline"
+    )
+    events = []
+    for page in iter_json_pages(url):
+        events.extend(events_from_timeline(page))
+    return events
+
+
+_discussion_events_by_pr: dict = {}
+_discussion_lock = threading.Lock()
+
+
+def get_discussion_events(pr_number: int) -> list[DiscussionEvent]:
+    """discussion events for a PR; each PR is fetched at most once per run"""
+    # a worker process may report on several repos, key by repo as well
+    key = (config.settings.target_repo, pr_number)
+    with _discussion_lock:
+        if key in _discussion_events_by_pr:
+            return _discussion_events_by_pr[key]
+
+    events = fetch_discussion_events(pr_number)
+    with _discussion_lock:
+        return _discussion_events_by_pr.setdefault(key, events)
+
+
+def forget_discussion_events(pr_number: int):
+    """drop a PR's fetched events, so the next get_discussion_events reads them
+    again; for long running watches, after the PR changed"""
+    with _discussion_lock:
+        _discussion_events_by_pr.pop((config.settings.target_repo, pr_number), None)
+
+
+def developers_active_in_discussion(
+    events: list[DiscussionEvent], developer_ids: list[str]
+) -> set[str]:
+    """which of our developers reviewed, commented on or closed a PR
+
+    Args:
+      events: DiscussionEvents for one PR
+      developer_ids: GitHub ids we report on
+
+    Returns:
+        set of matching developer ids
+
+    """
+    developers = set(developer_ids)
+    return {
+        event.actor
+        for event in events
+        if event.action in review_actions and event.actor in developers
+    }
@@ -0,0 +1,406 @@
+"""
+lightweight PR and issue records that mirror the PyGithub PullRequest / Issue
+attributes our classification code reads (number, state, merged, merged_by.login,
+user.login, closed_by.login, comments, base.ref, created/updated/closed/merged
+dates, title and urls).  Records are built from API payloads or local mirror rows
+we already hold, so reading an attribute never triggers another request to GitHub.
+
+PullRequestSnapshot records come straight from the PR list endpoint, which leaves
+out merged_by and comments; those two are read with one GET of the full PR the
+first time a snapshot needs them, and counted in completion_statistics.
+IssueSnapshot records likewise lack closed_by, which comes from the repo's issue
+events (see issue_events) or, failing that, from a GET of the issue.
+"""
+import datetime
+import threading
+import typing
+
+import config
+from issue_events import IssueClosers
+from page_seek import PageCache
+from page_seek import iter_window
+from utilities import get_json
+from utilities import get_json_page
+from utilities import iter_json_pages
+from utilities import parse_github_timestamp
+
+# full PR / issue fetches for snapshots
+completion_statistics = {"pull_requests": 0, "issues": 0}
+_completion_lock = threading.Lock()
+
+
+class UserRef(typing.NamedTuple):
+    """stands in for a PyGithub NamedUser; only login is used"""
+
+    login: str | None
+
+
+class BranchRef(typing.NamedTuple):
+    """stands in for a PyGithub PullRequestPart; only ref is used"""
+
+    ref: str | None
+
+
+def user_ref(actor: dict | None) -> UserRef | None:
+    """UserRef from a GraphQL actor / REST user dict; deleted accounts are None"""
+    if not actor:
+        return None
+    return UserRef(actor.get("login"))
+
+
+class PullRequestRecord:
+    """PR fields needed to classify and summarize a PR for the report
+
+    discussion_authors holds logins that reviewed, commented on or closed the PR,
+    when the payload included all of them; None means discussion was not
+    prefetched, or only partly, and has to be read from the timeline
+    """
+
+    __slots__ = (
+        "number",
+        "title",
+        "html_url",
+        "review_comments_url",
+        "state",
+        "created_at",
+        "updated_at",
+        "closed_at",
+        "merged_at",
+        "merged",
+        "merged_by",
+        "user",
+        "comments",
+        "base",
+        "discussion_authors",
+    )
+
+    def __init__(self, **fields):
+        for name in PullRequestRecord.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self):
+        return f"PullRequestRecord(number={self.number}, title={self.title!r})"
+
+    @classmethod
+    def from_graphql_node(cls, node: dict, target_repo: str):
+        """builds record from a GraphQL PullRequest node
+
+        Args:
+          node: dict for one PR, fields as in github_graphql.pull_request_fields
+          target_repo: owner/name, used to rebuild REST urls
+
+        Returns:
+            PullRequestRecord
+
+        """
+        discussion_authors = set()
+        for connection in ("reviews", "comments", "timelineItems"):
+            items = (node.get(connection) or {}).get("nodes", [])
+            if (node.get(connection) or {}).get("totalCount", 0) > len(items):
+                # only the first page of a busy PR's discussion was fetched
+                discussion_authors = None
+                break
+            for item in items:
+                author = user_ref(item.get("author") or item.get("actor"))
+                if author is not None:
+                    discussion_authors.add(author.login)
+
+        return cls(
+            number=node["number"],
+            title=node["title"],
+            html_url=node["url"],
+            review_comments_url=(
+                f"{config.settings.base_url}/repos/{target_repo}"
+                f"/pulls/{node['number']}/comments"
+            ),
+            # REST has no MERGED state; merged PRs are "closed" with merged True
+            state="open" if node["state"] == "OPEN" else "closed",
+            created_at=parse_github_timestamp(node["createdAt"]),
+            updated_at=parse_github_timestamp(node["updatedAt"]),
+            closed_at=parse_github_timestamp(node["closedAt"]),
+            merged_at=parse_github_timestamp(node["mergedAt"]),
+            merged=node["merged"],
+            merged_by=user_ref(node.get("mergedBy")),
+            user=user_ref(node.get("author")) or UserRef(None),
+            comments=node["comments"]["totalCount"],
+            base=BranchRef(node["baseRefName"]),
+            discussion_authors=discussion_authors,
+        )
+
+    @classmethod
+    def from_rest_payload(cls, payload: dict):
+        """builds record from a REST PR payload
+
+        Args:
+          payload: dict from GET /repos/{owner}/{repo}/pulls/{number}
+
+        Returns:
+            PullRequestRecord; discussion is not part of REST PR payloads
+
+        """
+        merged_at = parse_github_timestamp(payload.get("merged_at"))
+        return cls(
+            number=payload["number"],
+            title=payload["title"],
+            html_url=payload["html_url"],
+            review_comments_url=payload["review_comments_url"],
+            state=payload["state"],
+            created_at=parse_github_timestamp(payload["created_at"]),
+            updated_at=parse_github_timestamp(payload["updated_at"]),
+            closed_at=parse_github_timestamp(payload.get("closed_at")),
+            merged_at=merged_at,
+            merged=payload.get("merged", merged_at is not None),
+            merged_by=user_ref(payload.get("merged_by")),
+            user=user_ref(payload.get("user")) or UserRef(None),
+            comments=payload.get("comments"),
+            base=BranchRef(payload["base"]["ref"]),
+        )
+
+
+class PullRequestSnapshot(PullRequestRecord):
+    """PullRequestRecord built from a PR list payload
+
+    the listing carries everything classification reads except merged_by and
+    comments; merged status comes from merged_at.  Those two fields stay unset
+    until first read, which fetches the full PR once; merged_by of an unmerged
+    PR is known to be None without a fetch
+    """
+
+    __slots__ = ("url",)
+    completed_fields = ("merged_by", "comments")
+
+    def __init__(self, url: str | None = None, **fields):
+        super().__init__(**fields)
+        self.url = url
+
+    def __repr__(self):
+        return f"PullRequestSnapshot(number={self.number}, title={self.title!r})"
+
+    @classmethod
+    def from_list_payload(cls, payload: dict):
+        """builds snapshot from one item of GET /repos/{owner}/{repo}/pulls
+
+        Args:
+          payload: dict from the PR list endpoint
+
+        Returns:
+            PullRequestSnapshot
+
+        """
+        snapshot = cls.from_rest_payload(payload)
+        snapshot.url = payload["url"]
+        for name in cls.completed_fields:
+            if name not in payload and not (
+                name == "merged_by" and not snapshot.merged
+            ):
+                delattr(snapshot, name)
+        return snapshot
+
+    def __getattr__(self, name: str):
+        # only called for unset slots, i.e. fields the listing did not carry
+        if name not in self.completed_fields:
+            raise AttributeError(name)
+        self.complete()
+        return getattr(self, name)
+
+    def complete(self):
+        """fills in the fields missing from the list payload with a GET of the PR"""
+        full_record = PullRequestRecord.from_rest_payload(get_json(self.url))
+        with _completion_lock:
+            completion_statistics["pull_requests"] += 1
+        for name in self.completed_fields:
+            setattr(self, name, getattr(full_record, name))
+
+
+class PullRequestListing:
+    """all PRs of a repo, most recently updated first, as PullRequestSnapshot
+
+    pages are read from the list endpoint while iterating, like a PyGithub
+    PaginatedList, and the listing can be iterated again; seek() reads only the
+    pages of a date window, see page_seek
+
+    Args:
+      target_repo: owner/name of repo
+    """
+
+    sort_field = "updated_at"
+    params = {"state": "all", "sort": "updated", "direction": "desc"}
+
+    def __init__(self, target_repo: str):
+        self.target_repo = target_repo
+
+    @property
+    def url(self) -> str:
+        return f"{config.settings.base_url}/repos/{self.target_repo}/pulls"
+
+    def __iter__(self):
+        for page in iter_json_pages(self.url, self.params):
+            for payload in page:
+                yield PullRequestSnapshot.from_list_payload(payload)
+
+    def get_page(self, page: int) -> tuple[list, int]:
+        """page of PullRequestSnapshot by number, 1 based, and the last page number"""
+        payloads, last_page = get_json_page(self.url, self.params, page)
+        return [PullRequestSnapshot.from_list_payload(item) for item in payloads], (
+            last_page
+        )
+
+    def seek(self, oldest: datetime.datetime, newest: datetime.datetime):
+        """PRs updated between oldest and newest, newest first; see iter_window"""
+        first_page, page_count = self.get_page(1)
+        pages = PageCache(lambda page_number: self.get_page(page_number)[0])
+        pages.pages[1] = first_page
+        return iter_window(page_count, pages, self.sort_field, oldest, newest)
+
+
+class IssueRecord:
+    """issue fields needed by filter_issues and format_issues
+
+    like PyGithub list results, last_modified (a response header) is always None
+    """
+
+    __slots__ = (
+        "number",
+        "title",
+        "url",
+        "html_url",
+        "state",
+        "user",
+        "closed_by",
+        "created_at",
+        "updated_at",
+        "closed_at",
+        "last_modified",
+    )
+
+    def __init__(self, **fields):
+        for name in IssueRecord.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self):
+        return f"IssueRecord(number={self.number}, title={self.title!r})"
+
+    @classmethod
+    def from_rest_payload(cls, payload: dict, closed_by: str | None = None):
+        """builds record from a REST issue payload
+
+        Args:
+          payload: dict from GET /repos/{owner}/{repo}/issues(/{number})
+          closed_by: closer login, when known from elsewhere; list payloads
+            don't include closed_by
+
+        Returns:
+            IssueRecord
+
+        """
+        closer = user_ref(payload.get("closed_by"))
+        if closer is None and closed_by is not None:
+            closer = UserRef(closed_by)
+
+        return cls(
+            number=payload["number"],
+            title=payload["title"],
+            url=payload["url"],
+            html_url=payload["html_url"],
+            state=payload["state"],
+            user=user_ref(payload.get("user")) or UserRef(None),
+            closed_by=closer,
+            created_at=parse_github_timestamp(payload["created_at"]),
+            updated_at=parse_github_timestamp(payload["updated_at"]),
+            closed_at=parse_github_timestamp(payload.get("closed_at")),
+        )
+
+
+class IssueSnapshot(IssueRecord):
+    """IssueRecord built from an issues list payload
+
+    the listing leaves out closed_by; a closed snapshot looks its closer up in
+    the listing's IssueClosers on first read, and fetches the issue only when
+    the events don't show the close
+    """
+
+    __slots__ = ("closers",)
+
+    def __repr__(self):
+        return f"IssueSnapshot(number={self.number}, title={self.title!r})"
+
+    @classmethod
+    def from_list_payload(cls, payload: dict, closers: IssueClosers):
+        """builds snapshot from one item of GET /repos/{owner}/{repo}/issues
+
+        Args:
+          payload: dict from the issue list endpoint
+          closers: IssueClosers of the repo, shared by the listing's snapshots
+
+        Returns:
+            IssueSnapshot
+
+        """
+        snapshot = cls.from_rest_payload(payload)
+        snapshot.closers = closers
+        if snapshot.state == "closed" and snapshot.closed_by is None:
+            delattr(snapshot, "closed_by")
+        return snapshot
+
+    def __getattr__(self, name: str):
+        # only called for unset slots, i.e. closed_by of a closed issue
+        if name != "closed_by":
+            raise AttributeError(name)
+        self.complete()
+        return self.closed_by
+
+    def complete(self):
+        """fills in closed_by from the issue events, or with a GET of the issue"""
+        close = self.closers.closer(self.number, self.closed_at)
+        if close is not None:
+            self.closed_by = None if close.actor is None else UserRef(close.actor)
+            return
+        self.closed_by = IssueRecord.from_rest_payload(get_json(self.url)).closed_by
+        with _completion_lock:
+            completion_statistics["issues"] += 1
+
+
+class IssueListing:
+    """issues (PRs included, like repo.get_issues) updated since a date, most
+    recently created first, as IssueSnapshot; seek() reads only the pages
+    created in a date window, see page_seek
+
+    Args:
+      target_repo: owner/name of repo
+      since: oldest update time listed, the report start date
+    """
+
+    sort_field = "created_at"
+
+    def __init__(self, target_repo: str, since: datetime.datetime):
+        self.target_repo = target_repo
+        self.params = {
+            "state": "all",
+            "since": since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "sort": "created",
+            "direction": "desc",
+        }
+        self.closers = IssueClosers(target_repo, since)
+
+    @property
+    def url(self) -> str:
+        return f"{config.settings.base_url}/repos/{self.target_repo}/issues"
+
+    def __iter__(self):
+        for page in iter_json_pages(self.url, self.params):
+            for payload in page:
+                yield IssueSnapshot.from_list_payload(payload, self.closers)
+
+    def get_page(self, page: int) -> tuple[list, int]:
+        """page of IssueSnapshot by number, 1 based, and the last page number"""
+        payloads, last_page = get_json_page(self.url, self.params, page)
+        return [
+            IssueSnapshot.from_list_payload(item, self.closers) for item in payloads
+        ], last_page
+
+    def seek(self, oldest: datetime.datetime, newest: datetime.datetime):
+        """issues created between oldest and newest, newest first; see iter_window"""
+        first_page, page_count = self.get_page(1)
+        pages = PageCache(lambda page_number: self.get_page(page_number)[0])
+        pages.pages[1] = first_page
+        return iter_window(page_count, pages, self.sort_field, oldest, newest)
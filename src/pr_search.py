@@ -0,0 +1,158 @@
+"""
+module retrieves PRs for a report window with the GitHub Search API, instead of
+walking every PR in the repo sorted by update date.  The search asks GitHub for
+exactly the PRs updated inside the window that involve one of our developers,
+so reports for older weeks cost the same as reports for the current week.
+"""
+import datetime
+import logging
+
+import config
+from utilities import timer_decorator
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+# GitHub never returns more than 1,000 results for a single search query
+search_result_limit: int = 1000
+# stop splitting windows below this size; very busy hours are reported as-is
+smallest_search_window = datetime.timedelta(minutes=10)
+
+
+def build_search_query(
+    target_repo: str,
+    developer_id: str,
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+) -> str:
+    """builds `is:pr updated:A..B involves:user` search string for one developer
+
+    Args:
+      target_repo: owner/name of repo to search
+      developer_id: GitHub id that authored, commented on, or was mentioned in PRs
+      window_start: earliest update time, naive datetime in UTC like PyGithub
+      window_end: latest update time, inclusive
+
+    Returns:
+        str query for the GitHub issue/PR search endpoint
+
+    """
+    time_format = "%Y-%m-%dT%H:%M:%S+00:00"
+    return (
+        f"repo:{target_repo} is:pr "
+        f"updated:{window_start.strftime(time_format)}.."
+        f"{window_end.strftime(time_format)} "
+        f"involves:{developer_id}"
+    )
+
+
+def search_windows(
+    github_host,
+    target_repo: str,
+    developer_id: str,
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+):
+    """yields search results for a window, halving it while results hit the cap
+
+    Args:
+      github_host: PyGithub client
+      target_repo: owner/name of repo to search
+      developer_id: GitHub id to search for
+      window_start: earliest update time
+      window_end: latest update time
+
+    Returns:
+        generator of PaginatedLists of issues; newest window first
+
+    """
+    query = build_search_query(target_repo, developer_id, window_start, window_end)
+    results = github_host.search_issues(query, sort="updated", order="desc")
+
+    if (
+        results.totalCount >= search_result_limit
+        and window_end - window_start > smallest_search_window
+    ):
+        window_middle = window_start + (window_end - window_start) / 2
+        logging.info(
+            f"{results.totalCount} results for {developer_id}; splitting window "
+            f"{window_start} - {window_end} at {window_middle}"
+        )
+        yield from search_windows(
+            github_host, target_repo, developer_id, window_middle, window_end
+        )
+        yield from search_windows(
+            github_host, target_repo, developer_id, window_start, window_middle
+        )
+    else:
+        if results.totalCount >= search_result_limit:
+            logging.warning(f"search capped at {search_result_limit} results: {query}")
+        yield results
+
+
+def search_pull_request_numbers(
+    developer_ids: list[str],
+    report_start_date: datetime.datetime,
+    report_end_date: datetime.datetime,
+    end_date_buffer: int = 0,
+) -> list[int]:
+    """finds numbers of PRs updated in [start, end + buffer] involving our developers
+
+    Args:
+      developer_ids: GitHub developer ids
+      report_start_date: beginning of report period
+      report_end_date: end of report period
+      end_date_buffer: days added to end date, matches filter_prs_from_date_range
+
+    Returns:
+        list of PR numbers, most recently updated first
+
+    """
+    settings = config.settings
+    window_end = report_end_date + datetime.timedelta(days=end_date_buffer)
+    logging.info(f"searching PRs updated {report_start_date} - {window_end}")
+
+    issues_found = {}
+    for developer_id in developer_ids:
+        for results in search_windows(
+            settings.github_host,
+            settings.target_repo,
+            developer_id,
+            report_start_date,
+            window_end,
+        ):
+            for issue in results:
+                # adjacent windows share their boundary second, so dedupe
+                issues_found.setdefault(issue.number, issue)
+
+    return [
+        issue.number
+        for issue in sorted(
+            issues_found.values(), key=lambda issue: issue.updated_at, reverse=True
+        )
+    ]
+
+
+@timer_decorator
+def search_pull_requests(
+    developer_ids: list[str],
+    report_start_date: datetime.datetime,
+    report_end_date: datetime.datetime,
+    end_date_buffer: int = 0,
+) -> list:
+    """finds PRs updated in [start, end + buffer] that involve our developers
+
+    Args:
+      developer_ids: GitHub developer ids
+      report_start_date: beginning of report period
+      report_end_date: end of report period
+      end_date_buffer: days added to end date, matches filter_prs_from_date_range
+
+    Returns:
+        list of PR objects sorted by updated_at, newest first, so results can
+        be passed to filter_prs_from_date_range in place of pull_requests_all
+
+    """
+    pr_numbers = search_pull_request_numbers(
+        developer_ids, report_start_date, report_end_date, end_date_buffer
+    )
+    return [config.settings.repo.get_pull(number) for number in pr_numbers]
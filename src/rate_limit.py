@@ -0,0 +1,276 @@
+"""
+module schedules every GitHub request against one shared rate limit budget.
+Each response's `X-RateLimit-Remaining` / `X-RateLimit-Reset` headers update the
+budget of its API resource (core, search, graphql); once a budget runs low the
+remaining requests are spread out until the reset, and an exhausted budget or a
+secondary limit (`Retry-After`) pauses requests and retries them instead of
+failing the run.  A token bucket caps the overall request rate, and the number
+of requests in flight shrinks when GitHub pushes back and grows again after
+successful requests.
+"""
+import logging
+import multiprocessing.managers
+import threading
+import time
+
+import requests
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+# GitHub asks clients to wait at least a minute after a secondary limit without
+# a Retry-After header
+secondary_limit_wait: int = 60
+# share of a budget below which requests are spread out until the reset
+low_budget_share: float = 0.1
+
+
+def rate_limit_resource(url: str) -> str:
+    """API resource whose budget a request counts against"""
+    if "/search/" in url:
+        return "search"
+    if url.endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+class RateLimitScheduler:
+    """token bucket plus adaptive concurrency limit, shared by all threads
+
+    Args:
+      max_rate: requests per second over all resources; also the bucket size
+      max_concurrency: upper bound for requests in flight
+      max_retries: resends of a rate limited request before giving up
+    """
+
+    def __init__(self, max_rate: float, max_concurrency: int, max_retries: int = 3):
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.capacity = max(max_rate, 1)
+        self.tokens = self.capacity
+        self.budgets = {}  # resource: (remaining, limit, reset epoch seconds)
+        self.statistics = {"requests": 0, "retries": 0, "waited_seconds": 0.0}
+
+        self._condition = threading.Condition()
+        self._refilled = time.monotonic()
+        self._not_before = {}  # resource: monotonic time of its next allowed request
+        self._successes = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._refilled) * self.max_rate
+        )
+        self._refilled = now
+
+    def acquire(self, resource: str = "core"):
+        """blocks until the bucket, the concurrency limit and the resource's
+        budget all allow one more request"""
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._not_before.get(resource, 0) - now
+                if wait <= 0 and self.in_flight < self.concurrency:
+                    if self.tokens >= 1:
+                        break
+                    wait = (1 - self.tokens) / self.max_rate
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+            self.tokens -= 1
+            self.in_flight += 1
+            self._pace(resource, now)
+            self.statistics["requests"] += 1
+            self.statistics["waited_seconds"] += now - started
+
+    def _pace(self, resource: str, now: float):
+        """spread a low budget evenly over the time left until its reset"""
+        budget = self.budgets.get(resource)
+        if budget is None:
+            return
+        remaining, limit, reset = budget
+        if remaining > limit * low_budget_share:
+            return
+        seconds_to_reset = max(reset - time.time(), 1)
+        interval = seconds_to_reset / max(remaining, 1)
+        self._not_before[resource] = max(
+            self._not_before.get(resource, 0), now + interval
+        )
+        self.budgets[resource] = (remaining - 1, limit, reset)
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, resource: str, headers: dict, delay: float | None):
+        """updates budgets and concurrency from a response's headers
+
+        Args:
+          resource: resource the request counted against
+          headers: response headers, as a plain dict so it can pass a manager
+            proxy; names are matched case-insensitively, as GitHub (and HTTP/2
+            always) may send them in lowercase
+          delay: from rate_limit_delay; None when the request went through
+
+        """
+        headers = {name.lower(): value for name, value in headers.items()}
+        with self._condition:
+            if "x-ratelimit-remaining" in headers:
+                self.budgets[headers.get("x-ratelimit-resource", resource)] = (
+                    int(headers["x-ratelimit-remaining"]),
+                    int(headers.get("x-ratelimit-limit", 5000)),
+                    int(headers.get("x-ratelimit-reset", time.time())),
+                )
+
+            if delay is None:
+                self._successes += 1
+                if (
+                    self.concurrency < self.max_concurrency
+                    and self._successes >= self.concurrency
+                ):
+                    self.concurrency += 1
+                    self._successes = 0
+                return
+
+            # GitHub pushed back: halve the requests in flight and pause the resource
+            self.concurrency = max(1, self.concurrency // 2)
+            self._successes = 0
+            self._not_before[resource] = max(
+                self._not_before.get(resource, 0), time.monotonic() + delay
+            )
+            self.statistics["retries"] += 1
+
+    def observe(self, resource: str, response: requests.Response) -> float | None:
+        """records a response
+
+        Returns:
+            seconds to wait before resending, or None when not rate limited
+
+        """
+        delay = rate_limit_delay(response)
+        self.record(resource, dict(response.headers), delay)
+        return delay
+
+    def snapshot(self) -> dict:
+        """copy of the statistics, also readable through a manager proxy"""
+        with self._condition:
+            return dict(self.statistics)
+
+    def send(self, send_function, request: requests.PreparedRequest, **kwargs):
+        """see send_with_scheduler"""
+        return send_with_scheduler(
+            self, self.max_retries, send_function, request, **kwargs
+        )
+
+
+def send_with_scheduler(
+    scheduler,
+    max_retries: int,
+    send_function,
+    request: requests.PreparedRequest,
+    **kwargs,
+) -> requests.Response:
+    """sends request with send_function, waiting out and retrying rate limits
+
+    only acquire / release / record are called on the scheduler, so it can also
+    be a SchedulerManager proxy shared by several processes
+
+    Args:
+      scheduler: RateLimitScheduler or proxy of one
+      max_retries: resends of a rate limited request before giving up
+      send_function: sends a PreparedRequest, e.g. requests.Session.send
+      request: request to send
+      **kwargs: passed to send_function
+
+    Returns:
+        requests.Response; the last rate limited response once retries run out
+
+    """
+    resource = rate_limit_resource(request.url)
+    for attempt in range(max_retries + 1):
+        scheduler.acquire(resource)
+        try:
+            response = send_function(request, **kwargs)
+        finally:
+            scheduler.release()
+
+        delay = rate_limit_delay(response)
+        scheduler.record(resource, dict(response.headers), delay)
+        if delay is None or attempt == max_retries:
+            return response
+        logging.warning(
+            f"GitHub {resource} rate limit reached; retrying in {delay:.0f}s"
+        )
+        response.close()
+    return response
+
+
+def rate_limit_delay(response: requests.Response) -> float | None:
+    """seconds GitHub asks us to wait, or None if the response isn't rate limited
+
+    primary limits are 403/429 with no remaining budget, waited out until
+    X-RateLimit-Reset; secondary limits carry Retry-After, or only a message
+    """
+    if response.status_code not in (403, 429):
+        return None
+    headers = response.headers
+    if "Retry-After" in headers:
+        return float(headers["Retry-After"])
+    if headers.get("X-RateLimit-Remaining") == "0":
+        return max(int(headers.get("X-RateLimit-Reset", 0)) - time.time(), 0) + 1
+    if response.status_code == 429 or b"rate limit" in response.content.lower():
+        return secondary_limit_wait
+    return None
+
+
+class SchedulerManager(multiprocessing.managers.BaseManager):
+    """serves one RateLimitScheduler to several worker processes, so parallel
+    per-repo reports draw from a single GitHub budget"""
+
+
+SchedulerManager.register(
+    "RateLimitScheduler",
+    RateLimitScheduler,
+    exposed=("acquire", "release", "record", "snapshot"),
+)
+
+
+class ScheduledSession(requests.Session):
+    """requests.Session whose requests (and redirects) all pass the scheduler
+
+    requests.Session.send follows redirects inside the send, which would ask
+    the scheduler for a second slot while holding the first; each hop is sent
+    on its own instead, so a request never holds more than one slot
+
+    Args:
+      scheduler: RateLimitScheduler, or a SchedulerManager proxy of one
+      max_retries: resends of a rate limited request before giving up
+    """
+
+    def __init__(self, scheduler, max_retries: int = 3):
+        super().__init__()
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        allow_redirects = kwargs.pop("allow_redirects", True)
+        response = send_with_scheduler(
+            self.scheduler,
+            self.max_retries,
+            super().send,
+            request,
+            allow_redirects=False,
+            **kwargs,
+        )
+        if not allow_redirects:
+            return response
+        # resolve_redirects sends each hop through self.send, like Session.send
+        history = list(self.resolve_redirects(response, request, **kwargs))
+        if history:
+            history.insert(0, response)
+            response = history.pop()
+            response.history = history
+        return response
@@ -0,0 +1,212 @@
+"""
+module runs the report as a chain of generators: fetch a page of PRs or issues,
+classify each item, summarize it into report items and append those to a progress
+file straight away.  Only the current page of GitHub objects and the small report
+tuples are held in memory, so memory stays flat on long runs, and the progress
+file shows how far the run got.  The report itself is sorted by day, so it is
+rendered once all items are in, line by line from iter_html_block.
+"""
+import concurrent.futures
+import datetime
+import logging
+import threading
+
+import github
+
+from page_seek import seek_window
+from utilities import timer_decorator
+from weekly_issues_summary import format_issue
+from weekly_issues_summary import issue_of_interest
+from weekly_pr_summary import iter_prs_of_interest
+from weekly_pr_summary import summarize_pull_request
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+
+def iter_pages(items):
+    """items one page at a time
+
+    iterating a PyGithub PaginatedList keeps every element it has fetched; reading
+    it with get_page() lets each page go once its items are processed
+
+    Args:
+      items: PaginatedList, or any other iterable
+
+    Returns:
+        generator of items, in input order
+
+    """
+    if not isinstance(items, github.PaginatedList.PaginatedList):
+        yield from items
+        return
+    page_number = 0
+    while page := items.get_page(page_number):
+        yield from page
+        page_number += 1
+
+
+def iter_pr_report_items(
+    pull_requests,
+    developer_ids: list,
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+):
+    """report items for PRs, each PR summarized as soon as it is classified;
+    same items as get_final_summary
+
+    Args:
+      pull_requests: PRs, most recently updated first
+      developer_ids: GitHub developer ids
+      start_date: begin report period
+      end_date: end of report period
+
+    Returns:
+        generator of report tuples
+
+    """
+    # a seekable listing is handed over as is: it reads only the window's pages,
+    # one at a time
+    if not hasattr(pull_requests, "seek"):
+        pull_requests = iter_pages(pull_requests)
+    for pull_request_entries, reviewed in iter_prs_of_interest(
+        pull_requests, developer_ids, start_date, end_date
+    ):
+        reviewed_pull_requests = [pull_request_entries[0].number] if reviewed else []
+        for each_pull_request in pull_request_entries:
+            yield from summarize_pull_request(
+                each_pull_request,
+                reviewed_pull_requests,
+                developer_ids,
+                start_date,
+                end_date,
+            )
+
+
+def iter_issue_report_entries(
+    issues,
+    developer_ids: list,
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    end_date_buffer: int = 0,
+):
+    """report items for issues, each issue formatted as soon as it is read, with
+    the issue's updated_at; get_final_issues orders issues by updated_at, which
+    the listing (newest created first) doesn't, so callers sort on it
+
+    Args:
+      issues: issues updated since the report start
+      developer_ids: GitHub developer ids
+      start_date: begin report period
+      end_date: end of report period
+      end_date_buffer: days added to end date
+
+    Returns:
+        generator of (updated_at, report tuple)
+
+    """
+    window_end = end_date + datetime.timedelta(days=int(end_date_buffer))
+    for issue in iter_pages(seek_window(issues, "created_at", start_date, window_end)):
+        if issue_of_interest(
+            issue, developer_ids, start_date, end_date, end_date_buffer
+        ):
+            for report_item in format_issue(
+                issue, developer_ids, start_date, end_date, end_date_buffer
+            ):
+                yield issue.updated_at, report_item
+
+
+def iter_issue_report_items(
+    issues,
+    developer_ids: list,
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    end_date_buffer: int = 0,
+):
+    """report items for issues, each issue formatted as soon as it is read;
+    the items of get_final_issues, in listing order rather than by updated_at
+
+    Args:
+      issues: issues updated since the report start
+      developer_ids: GitHub developer ids
+      start_date: begin report period
+      end_date: end of report period
+      end_date_buffer: days added to end date
+
+    Returns:
+        generator of report tuples
+
+    """
+    for _, report_item in iter_issue_report_entries(
+        issues, developer_ids, start_date, end_date, end_date_buffer
+    ):
+        yield report_item
+
+
+@timer_decorator
+def stream_report_items(pull_requests, issues, settings, progress_path: str) -> list:
+    """runs the PR and issue generators side by side, writing every report item
+    to progress_path the moment it is final
+
+    Args:
+      pull_requests: PRs, most recently updated first
+      issues: issues updated since the report start
+      settings: active config.Settings
+      progress_path: file receiving one tab separated line per report item
+
+    Returns:
+        list of report tuples in the order get_final_summary + get_final_issues
+        return them, so the sorted report matches a normal run
+
+    """
+    pr_items, issue_entries = [], []
+    lock = threading.Lock()
+
+    with open(progress_path, "w", encoding="utf-8") as progress:
+
+        def write(report_item: tuple):
+            with lock:
+                progress.write("\t".join(report_item) + "\n")
+                progress.flush()
+
+        def drain_pull_requests(generator):
+            for report_item in generator:
+                pr_items.append(report_item)
+                write(report_item)
+
+        def drain_issues(generator):
+            for entry in generator:
+                issue_entries.append(entry)
+                write(entry[1])
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.workers
+        ) as executor:
+            futures = [
+                executor.submit(
+                    drain_pull_requests,
+                    iter_pr_report_items(
+                        pull_requests,
+                        settings.developer_ids,
+                        settings.start_date,
+                        settings.end_date,
+                    ),
+                ),
+                executor.submit(
+                    drain_issues,
+                    iter_issue_report_entries(
+                        issues,
+                        settings.developer_ids,
+                        settings.start_date,
+                        settings.end_date,
+                        settings.end_date_buffer,
+                    ),
+                ),
+            ]
+            for future in futures:
+                future.result()
+
+    # stable, like filter_issues: issues updated together keep listing order
+    issue_entries.sort(key=lambda entry: entry[0])
+    report_items = pr_items + [report_item for _, report_item in issue_entries]
+    logging.info(f"streamed {len(report_items)} report items to {progress_path}")
+    return report_items
@@ -0,0 +1,97 @@
+"""
+module builds per-developer reports for a team from a single crawl.  PRs and issues
+in the report window are read once into lists; each developer's events are then
+classified from those lists, and PR discussion is analyzed once for the whole
+team (see check_developer_wrote_comments), so a ten person report costs about
+the same GitHub requests as a one person report.  A combined team report lists
+every developer's events with a developer column.
+"""
+import datetime
+import logging
+import os
+
+from page_seek import seek_window
+from utilities import timer_decorator
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import get_final_summary
+from weekly_pr_summary import sort_final_data
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+
+def materialize_window(
+    pull_requests, report_start_date: datetime.datetime, report_end_date
+) -> list:
+    """one pass over newest-first PRs, keeping those updated inside the window
+
+    Args:
+      pull_requests: PRs, most recently updated first
+      report_start_date: stop at the first PR updated before this
+      report_end_date: end of window, including end_date_buffer
+
+    Returns:
+        list of PRs, in input order
+
+    """
+    window = []
+    pull_requests = seek_window(
+        pull_requests, "updated_at", report_start_date, report_end_date
+    )
+    for pull_request in pull_requests:
+        if pull_request.updated_at < report_start_date:
+            break
+        if pull_request.updated_at <= report_end_date:
+            window.append(pull_request)
+    return window
+
+
+def developer_report_path(output: str, developer: str) -> str:
+    """GitHub_summary.txt becomes GitHub_summary_ambv.txt"""
+    root, extension = os.path.splitext(output)
+    return f"{root}_{developer}{extension}"
+
+
+@timer_decorator
+def build_team_reports(pull_requests, issues, settings) -> tuple[dict, list]:
+    """formatted reports for each developer and for the team, from one crawl
+
+    Args:
+      pull_requests: PRs, most recently updated first
+      issues: issues updated since the report start
+      settings: config.Settings; developer_ids is the team
+
+    Returns:
+        tuple of dict developer id to report lines, and the team report lines
+        with a developer column
+
+    """
+    pull_requests = materialize_window(
+        pull_requests,
+        settings.start_date,
+        settings.end_date + datetime.timedelta(days=settings.end_date_buffer),
+    )
+    window_end = settings.end_date + datetime.timedelta(days=settings.end_date_buffer)
+    issues = list(seek_window(issues, "created_at", settings.start_date, window_end))
+    logging.info(
+        f"team of {len(settings.developer_ids)}: "
+        f"{len(pull_requests)} PRs, {len(issues)} issues to classify"
+    )
+
+    developer_reports, team_items = {}, []
+    for developer in settings.developer_ids:
+        developer_items = get_final_summary(
+            pull_requests, [developer], settings.start_date, settings.end_date
+        ) + get_final_issues(
+            issues,
+            [developer],
+            settings.start_date,
+            settings.end_date,
+            settings.end_date_buffer,
+        )
+        developer_reports[developer] = format_final_html_block(
+            sort_final_data(developer_items)
+        )
+        team_items.extend(report_item + (developer,) for report_item in developer_items)
+
+    return developer_reports, format_final_html_block(sort_final_data(team_items))
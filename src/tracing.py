@@ -0,0 +1,182 @@
+"""
+module records nested spans for a report run - phases, per PR work, JSON parsing,
+regex scans and sorting - with the HTTP calls, bytes received and cache hits made
+inside each span.  Spans export as Chrome trace JSON, which chrome://tracing and
+https://ui.perfetto.dev open directly.
+
+tracing is off unless `--profile` is given; while off, span() hands back one
+shared no-op context manager and count() returns at once, so instrumented code
+costs an attribute check.  Worker processes of multi-repo reports are not traced.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+counter_names = ("http_calls", "bytes_received", "cache_hits", "http_seconds")
+_disabled_span = contextlib.nullcontext()
+
+
+class Span:
+    """one finished or open span; counters include those of nested spans"""
+
+    __slots__ = ("name", "category", "args", "start", "duration", "thread_id")
+
+    def __init__(self, name: str, category: str, args: dict):
+        self.name = name
+        self.category = category
+        self.args = dict.fromkeys(counter_names, 0) | args
+        self.start = time.perf_counter()
+        self.duration = None
+        self.thread_id = threading.get_ident()
+
+
+class Tracer:
+    """collects spans and counters from every thread of the process"""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.totals = dict.fromkeys(counter_names, 0)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        """start recording; spans of an earlier run are dropped"""
+        with self._lock:
+            self.spans = []
+            self.totals = dict.fromkeys(counter_names, 0)
+            self._origin = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, category: str = "function", **args):
+        """context manager timing the enclosed block as a span nested in the
+        thread's current span
+
+        Args:
+          name: shown in the trace, e.g. a function name or "PR 29601"
+          category: groups spans, e.g. "function", "pull_request", "json"
+          args: extra values stored with the span, e.g. number=29601
+
+        Returns:
+            context manager
+
+        """
+        if not self.enabled:
+            return _disabled_span
+        return self._open_span(name, category, args)
+
+    @contextlib.contextmanager
+    def _open_span(self, name: str, category: str, args: dict):
+        span = Span(name, category, args)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.start
+            stack.pop()
+            with self._lock:
+                self.spans.append(span)
+
+    def count(self, **amounts):
+        """adds amounts to the run totals and to every open span of this thread
+
+        Args:
+          amounts: counter name to amount, names from counter_names
+
+        """
+        if not self.enabled:
+            return
+        for span in self._stack():
+            for name, amount in amounts.items():
+                span.args[name] += amount
+        with self._lock:
+            for name, amount in amounts.items():
+                self.totals[name] += amount
+
+    def record_http(self, started: float, duration: float, method: str, url: str):
+        """an HTTP call as its own span, for the timeline view"""
+        span = Span(f"{method} {urllib.parse.urlsplit(url).path}", "http", {})
+        span.args["url"] = url
+        span.start, span.duration = started, duration
+        with self._lock:
+            self.spans.append(span)
+
+    def expensive_spans(self, category: str, limit: int = 10) -> list[Span]:
+        """longest spans of a category, e.g. the most expensive PRs"""
+        with self._lock:
+            spans = [span for span in self.spans if span.category == category]
+        return sorted(spans, key=lambda span: span.duration, reverse=True)[:limit]
+
+    def chrome_trace(self) -> dict:
+        """spans in Chrome trace event format, times in microseconds"""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start - self._origin) * 1e6),
+                    "dur": round(span.duration * 1e6),
+                    "pid": os.getpid(),
+                    "tid": span.thread_id,
+                    "args": span.args,
+                }
+                for span in sorted(spans, key=lambda span: span.start)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as writer:
+            json.dump(self.chrome_trace(), writer)
+
+
+tracer = Tracer()
+
+
+def span(name: str, category: str = "function", **args):
+    """tracer.span of the process wide tracer"""
+    return tracer.span(name, category, **args)
+
+
+def count(**amounts):
+    """tracer.count of the process wide tracer"""
+    tracer.count(**amounts)
+
+
+def response_hook(response, *args, **kwargs):
+    """requests response hook counting each HTTP call against the open spans
+
+    responses served from the http cache count as cache hits; their body was
+    not received again, only the 304 answer
+    """
+    if not tracer.enabled:
+        return response
+    from_cache = getattr(response, "from_cache", False)
+    elapsed = response.elapsed.total_seconds()
+    tracer.count(
+        http_calls=1,
+        bytes_received=0 if from_cache else len(response.content),
+        cache_hits=int(from_cache),
+        http_seconds=elapsed,
+    )
+    tracer.record_http(
+        time.perf_counter() - elapsed, elapsed, response.request.method, response.url
+    )
+    return response
@@ -0,0 +1,343 @@
+"""
+shared HTTP transport for every outbound GitHub call.  PyGithub requests and our
+direct `requests` calls (timelines, html pages, GraphQL) go through the same
+requests.Session, so they share the on-disk response cache in http_cache and one
+pool of keep-alive connections; each host pays its TCP + TLS handshake once per
+pooled connection instead of once per request.
+
+connections are counted as they are opened, so pool_statistics() shows how many
+requests reused an existing connection.  HTTP/2 is optional: with `httpx` and
+`h2` installed, --http2 multiplexes requests over a single connection per host.
+With a cassette set, the session records its traffic or replays it (see cassette).
+"""
+import importlib.util
+import logging
+import threading
+
+import requests
+import requests.adapters
+from github.Requester import Requester
+from github.Requester import RequestsResponse
+from requests.structures import CaseInsensitiveDict
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.connectionpool import HTTPSConnectionPool
+
+import config
+import tracing
+from cassette import Cassette
+from cassette import CassetteAdapter
+from cassette import ReplayScheduler
+from http_cache import CachingAdapter
+from http_cache import ResponseCache
+from rate_limit import RateLimitScheduler
+from rate_limit import ScheduledSession
+
+try:
+    import httpx  # optional, only needed for http2
+except ImportError:
+    httpx = None
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request
+
+# HTTP/1.1 connection-specific headers; not allowed on HTTP/2 requests
+hop_by_hop_headers = ("connection", "keep-alive", "transfer-encoding", "upgrade")
+
+
+class PoolStatistics:
+    """thread-safe counts of requests sent and connections opened to send them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        """counters plus the share of requests sent on an already open connection"""
+        with self._lock:
+            requests_sent, connections = self.requests, self.connections
+        reused = max(requests_sent - connections, 0)
+        return {
+            "requests": requests_sent,
+            "connections_opened": connections,
+            "reuse_rate": round(reused / requests_sent, 3) if requests_sent else 0.0,
+        }
+
+
+def _counting_pool(pool_class, statistics: PoolStatistics):
+    """urllib3 pool class that counts every new connection it opens"""
+
+    def _new_conn(self):
+        statistics.count("connections")
+        return pool_class._new_conn(self)
+
+    return type(
+        f"Counting{pool_class.__name__}", (pool_class,), {"_new_conn": _new_conn}
+    )
+
+
+class PooledAdapter(requests.adapters.HTTPAdapter):
+    """HTTP/1.1 keep-alive adapter whose pools report to a PoolStatistics"""
+
+    def __init__(self, statistics: PoolStatistics | None = None, **kwargs):
+        # set before HTTPAdapter.__init__, which builds the pool manager
+        self.statistics = statistics or PoolStatistics()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.statistics),
+            "https": _counting_pool(HTTPSConnectionPool, self.statistics),
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.statistics.count("requests")
+        return super().send(request, **kwargs)
+
+
+def http2_available() -> bool:
+    """httpx with its h2 extra is installed"""
+    return httpx is not None and importlib.util.find_spec("h2") is not None
+
+
+def _httpx_timeout(timeout):
+    """requests-style timeout (seconds or (connect, read) tuple) for httpx"""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class HTTP2Adapter(PooledAdapter):
+    """sends requests through an httpx HTTP/2 client, so concurrent requests to a
+    host share one multiplexed connection; responses come back as
+    requests.Response objects, so callers and the cache can't tell the difference
+    """
+
+    def __init__(self, statistics: PoolStatistics | None = None, **kwargs):
+        super().__init__(statistics, **kwargs)
+        limits = httpx.Limits(
+            max_connections=self._pool_maxsize,
+            max_keepalive_connections=self._pool_maxsize,
+        )
+        self.client = httpx.Client(http2=True, limits=limits)
+
+    def _trace(self, event_name: str, info: dict):
+        """httpcore trace hook; a TCP connect means a new connection"""
+        if event_name == "connection.connect_tcp.complete":
+            self.statistics.count("connections")
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream=False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        self.statistics.count("requests")
+        headers = [
+            (name, value)
+            for name, value in request.headers.items()
+            if name.lower() not in hop_by_hop_headers
+        ]
+        try:
+            reply = self.client.request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=request.body,
+                timeout=_httpx_timeout(timeout),
+                extensions={"trace": self._trace},
+            )
+        except httpx.TimeoutException as error:
+            raise requests.exceptions.Timeout(error, request=request)
+        except httpx.TransportError as error:
+            raise requests.exceptions.ConnectionError(error, request=request)
+        return self.build_http2_response(request, reply)
+
+    def build_http2_response(self, request, reply) -> requests.Response:
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response.headers = CaseInsensitiveDict(reply.headers)
+        # httpx already decompressed the body
+        response.headers.pop("Content-Encoding", None)
+        response.headers.pop("Content-Length", None)
+        response._content = reply.content
+        response._content_consumed = True
+        response.url = str(reply.url)
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.reason = reply.reason_phrase
+        response.elapsed = reply.elapsed
+        response.connection = self
+        return response
+
+    def close(self):
+        self.client.close()
+        super().close()
+
+
+class CachingPooledAdapter(CachingAdapter, PooledAdapter):
+    """response cache in front of the HTTP/1.1 keep-alive pool"""
+
+
+class CachingHTTP2Adapter(CachingAdapter, HTTP2Adapter):
+    """response cache in front of the HTTP/2 client"""
+
+
+def build_session(settings) -> requests.Session:
+    """requests.Session for a Settings object; cache disabled when cache_dir is empty
+
+    Args:
+      settings: config.Settings with cache_dir, cache_max_mb, pool_size, http2,
+        the rate limit settings and cassette / cassette_mode
+
+    Returns:
+        ScheduledSession with the pooled (and caching) adapter mounted, behind
+        a CassetteAdapter when a cassette is set
+
+    """
+    # enough connections per host that no worker or async request waits on, or
+    # throws away, a pooled connection
+    pool_size = max(settings.pool_size, settings.concurrency, settings.workers)
+    cassette = (
+        Cassette(settings.cassette, settings.cassette_mode)
+        if settings.cassette
+        else None
+    )
+    # one scheduler per session, so the PR and issue pipelines share a budget;
+    # multi-repo runs hand every process a proxy of the same scheduler
+    if cassette is not None and cassette.replaying:
+        scheduler = ReplayScheduler()  # nothing is sent, nothing to wait for
+    else:
+        scheduler = settings.rate_limit_scheduler or RateLimitScheduler(
+            settings.max_request_rate, pool_size, settings.rate_limit_retries
+        )
+    session = ScheduledSession(scheduler, settings.rate_limit_retries)
+    # gzip bodies are decompressed transparently by urllib3 / httpx
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    session.hooks["response"].append(tracing.response_hook)
+
+    use_http2 = settings.http2 and http2_available()
+    if settings.http2 and not use_http2:
+        logging.warning("http2 needs `pip install httpx[http2]`; using HTTP/1.1")
+
+    # pool_connections is the number of hosts kept: api.github.com and github.com
+    adapter_kwargs = {"pool_connections": 4, "pool_maxsize": pool_size}
+    if settings.cache_dir:
+        response_cache = ResponseCache(
+            settings.cache_dir, settings.cache_max_mb * 1024 * 1024
+        )
+        adapter_class = CachingHTTP2Adapter if use_http2 else CachingPooledAdapter
+        adapter = adapter_class(response_cache, **adapter_kwargs)
+        logging.info(f"http cache at {response_cache.path}")
+    else:
+        adapter_class = HTTP2Adapter if use_http2 else PooledAdapter
+        adapter = adapter_class(**adapter_kwargs)
+    if cassette is not None:
+        adapter = CassetteAdapter(cassette, adapter)
+        action = "replaying" if cassette.replaying else "recording"
+        logging.info(f"{action} GitHub traffic, cassette {cassette.path}")
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """session of the active settings, for direct REST / GraphQL / html requests"""
+    return config.settings.http_session
+
+
+def response_cache() -> ResponseCache | None:
+    """cache behind the active session, if enabled"""
+    adapter = get_session().get_adapter("https://")
+    return getattr(adapter, "response_cache", None)
+
+
+def active_cassette() -> Cassette | None:
+    """cassette behind the active session, if recording or replaying"""
+    adapter = get_session().get_adapter("https://")
+    return getattr(adapter, "cassette", None)
+
+
+def save_cassette():
+    """write what the active session recorded; no-op when not recording"""
+    if not config.settings.cassette:
+        return
+    cassette = active_cassette()
+    if cassette is not None:
+        cassette.save()
+
+
+def pool_statistics() -> dict:
+    """requests sent, connections opened and reuse rate of the active session"""
+    adapter = get_session().get_adapter("https://")
+    return adapter.statistics.snapshot()
+
+
+def scheduler_statistics() -> dict:
+    """requests scheduled, rate limit retries and time spent waiting"""
+    return get_session().scheduler.snapshot()
+
+
+class SessionConnection:
+    """mimics the httplib-style connection PyGithub's Requester expects, sending
+    through a shared requests.Session instead of a private one per Requester
+    """
+
+    session: requests.Session = None
+
+    def __init__(self, host, port=None, strict=False, timeout=None, **kwargs):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+
+    def request(self, verb, url, input, headers):
+        self.verb = verb
+        self.url = url
+        self.input = input
+        self.headers = headers
+
+    def getresponse(self):
+        port = f":{self.port}" if self.port else ""
+        response = self.session.request(
+            self.verb,
+            f"{self.protocol}://{self.host}{port}{self.url}",
+            headers=self.headers,
+            data=self.input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+        )
+        return RequestsResponse(response)
+
+    def close(self):
+        return
+
+
+def install_pygithub_transport(session: requests.Session):
+    """route every PyGithub request through session
+
+    Args:
+      session: shared requests.Session from build_session
+
+    """
+    https_connection = type(
+        "HTTPSSessionConnection",
+        (SessionConnection,),
+        {"session": session, "protocol": "https"},
+    )
+    http_connection = type(
+        "HTTPSessionConnection",
+        (SessionConnection,),
+        {"session": session, "protocol": "http"},
+    )
+    Requester.injectConnectionClasses(http_connection, https_connection)
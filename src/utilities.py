@@ -1,16 +1,20 @@
 """
 general project utilities
 """
+
 import datetime
 import hashlib
 import logging
 import os
+import urllib.parse
 from time import time
 
 from github import GithubException
 from github import RateLimitExceededException
 
-from config import github_host
+import config
+import tracing
+import transport
 
 logging.basicConfig(encoding="utf-8", level=logging.INFO)
 
@@ -28,7 +32,7 @@ def check_github_rate_limit():
     github_ratelimit: int = 5000
 
     try:
-        github_ratelimit = github_host.get_rate_limit()
+        github_ratelimit = config.settings.github_host.get_rate_limit()
     except RateLimitExceededException:
         logging.error(f"GitHub API rate limit exceeded: {github_ratelimit}")
     except GithubException:
@@ -39,6 +43,93 @@ def check_github_rate_limit():
     return github_ratelimit
 
 
+def github_request_headers() -> dict:
+    """headers for direct REST calls, authenticated with our token when we have one
+    to get the 5,000 call/hour rate limit instead of 60
+
+    Returns:
+        dict of request headers
+
+    """
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if config.settings.github_token:
+        headers["Authorization"] = f"token {config.settings.github_token}"
+    return headers
+
+
+def iter_json_pages(url: str, params: dict | None = None):
+    """yields JSON pages from a paginated GitHub REST endpoint, following the
+    `Link: <...>; rel="next"` headers until the last page
+
+    Args:
+      url: full endpoint url
+      params: query parameters for the first page; later pages carry their own
+
+    Returns:
+        generator of decoded JSON pages (usually lists)
+
+    """
+    params = {"per_page": 100, **(params or {})}
+    while url:
+        response = transport.get_session().get(
+            url, params=params, headers=github_request_headers()
+        )
+        response.raise_for_status()
+        with tracing.span("json", "json"):
+            page = response.json()
+        yield page
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def get_json_page(url: str, params: dict, page: int) -> tuple:
+    """one page of a paginated GitHub REST endpoint, fetched by number
+
+    Args:
+      url: full endpoint url
+      params: query parameters, without page
+      page: page number, 1 based
+
+    Returns:
+        tuple of decoded JSON page and the number of the last page, read from
+        the `Link: <...>; rel="last"` header
+
+    """
+    response = transport.get_session().get(
+        url,
+        params={"per_page": 100, **params, "page": page},
+        headers=github_request_headers(),
+    )
+    response.raise_for_status()
+    with tracing.span("json", "json"):
+        json_page = response.json()
+    # the last page itself carries no rel="last" link
+    last_url = response.links.get("last", {}).get("url")
+    if last_url is None:
+        return json_page, page
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(last_url).query)
+    return json_page, int(query["page"][0])
+
+
+def get_json(url: str, params: dict | None = None):
+    """GET a single GitHub REST resource
+
+    Args:
+      url: full endpoint url
+      params: optional query parameters
+
+    Returns:
+        decoded JSON payload
+
+    """
+    response = transport.get_session().get(
+        url, params=params, headers=github_request_headers()
+    )
+    response.raise_for_status()
+    with tracing.span("json", "json"):
+        return response.json()
+
+
 def create_date_object(input_standard_date: str):
     """given input string of form YYYY-MM-DD HH:MM:SS; convert to datetime object
 
@@ -52,6 +143,22 @@ def create_date_object(input_standard_date: str):
     return datetime.datetime.strptime(input_standard_date, "%Y-%m-%d %H:%M:%S")
 
 
+def parse_github_timestamp(input_timestamp: str | None):
+    """given ISO 8601 timestamp from GitHub JSON (e.g. 2021-11-16T10:09:01Z), convert
+    to naive UTC datetime object, matching the datetimes PyGithub returns
+
+    Args:
+      input_timestamp: timestamp string from REST or GraphQL payloads, or None
+
+    Returns:
+        datetime.datetime object, or None when input is None
+
+    """
+    if input_timestamp is None:
+        return None
+    return datetime.datetime.strptime(input_timestamp, "%Y-%m-%dT%H:%M:%SZ")
+
+
 def timer_decorator(function):
     """
     timer decorator to track elapsed runtime for functions
@@ -63,6 +170,7 @@ def timer_decorator(function):
         wrapped function
 
     """
+
     # This function shows the execution time of
     # the function object passed
     def wrapped_function(*args, **kwargs):
@@ -70,7 +178,9 @@ def timer_decorator(function):
         wrapped function for timer decorator
         """
         time_start = time()
-        result = function(*args, **kwargs)
+        # nested spans, http calls and bytes show up in --profile traces
+        with tracing.span(function.__name__):
+            result = function(*args, **kwargs)
         time_done = time()
         logging.info(
             f"function {function.__name__!r} executed in"
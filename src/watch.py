@@ -0,0 +1,318 @@
+"""
+module keeps the report of the current week up to date in a long running loop.
+
+the first cycle builds the report from the PR and issue listings like a normal
+run, remembering the report items of every PR and issue.  Each later cycle asks
+GitHub for the first page of both `updated`-sorted listings with the ETag of the
+previous poll; an unchanged listing answers 304 Not Modified, which costs no rate
+limit.  Otherwise only the items updated since the previous poll are read and
+classified again, their report items replaced, and the report rewritten
+atomically.  Cycles are spaced so that polling uses at most half of the rate
+limit budget left until it resets.
+"""
+import datetime
+import logging
+import os
+import time
+
+import config
+import transport
+from backfill import iso_weeks
+from issue_events import IssueClosers
+from pr_discussion import forget_discussion_events
+from pr_records import IssueRecord
+from pr_records import PullRequestSnapshot
+from streaming import iter_issue_report_items
+from streaming import iter_pr_report_items
+from utilities import get_json
+from utilities import github_request_headers
+from utilities import parse_github_timestamp
+from weekly_issues_summary import check_if_issue_date_interesting
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import sort_final_data
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+watch_budget_share = 0.5  # share of the remaining rate limit polling may use
+max_poll_seconds = 900.0  # poll at least every 15 minutes
+
+
+def current_week() -> tuple[datetime.datetime, datetime.datetime]:
+    """start and end (the following Monday) of this ISO week, naive UTC like
+    GitHub timestamps"""
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    week = iso_weeks(now, now)[0]
+    return week.start, week.end
+
+
+def poll_seconds(budget: tuple | None, cycle_cost: int, minimum: float) -> float:
+    """seconds to sleep before the next cycle
+
+    Args:
+      budget: (remaining, limit, reset epoch seconds) of the core rate limit,
+        None before GitHub reported it
+      cycle_cost: requests the last cycle took from the budget
+      minimum: shortest sleep, --watch-interval
+
+    Returns:
+        sleep that spends at most watch_budget_share of the remaining budget
+        before it resets
+
+    """
+    if budget is None:
+        return minimum
+    remaining, _, reset = budget
+    seconds_to_reset = max(reset - time.time(), 1)
+    affordable_cycles = max(remaining * watch_budget_share / max(cycle_cost, 1), 1)
+    return min(max(seconds_to_reset / affordable_cycles, minimum), max_poll_seconds)
+
+
+def write_report_atomically(path: str, report_lines):
+    """write the report next to path, then move it in place, so readers never
+    see a half written report"""
+    partial_path = f"{path}.partial"
+    with open(partial_path, "wb") as writer:
+        for item in report_lines:
+            writer.write(f"{item}\n".encode())
+    os.replace(partial_path, path)
+
+
+class ReportWatcher:
+    """report items of one report window, updated from the changes since the
+    previous poll
+
+    Args:
+      settings: active config.Settings; target_repo and developer_ids
+      start_date: beginning of the report window
+      end_date: end of the report window (exclusive)
+    """
+
+    def __init__(self, settings, start_date, end_date):
+        self.settings = settings
+        self.start_date = start_date
+        self.end_date = end_date
+        # number: (updated_at, report items); issues also keep created_at
+        self.pr_items: dict[int, tuple] = {}
+        self.issue_items: dict[int, tuple] = {}
+        self.closers: dict[int, tuple] = {}  # number: (closed_at, closer login)
+        self.watermarks: dict[str, datetime.datetime] = {}  # listing: updated_at
+        self.etags: dict[str, str] = {}  # listing url: ETag of its first page
+
+    def listing_url(self, kind: str) -> str:
+        return f"{self.settings.base_url}/repos/{self.settings.target_repo}/{kind}"
+
+    def iter_changed(self, kind: str):
+        """payloads from the updated-sorted listing of kind, newest first, down to
+        the previous poll's watermark (the report start on the first poll)
+
+        Args:
+          kind: "pulls" or "issues"
+
+        Returns:
+            generator of payload dicts; nothing when the first page is unchanged
+
+        """
+        first_poll = kind not in self.watermarks
+        oldest = self.watermarks.get(kind, self.start_date)
+        params = {"state": "all", "sort": "updated", "direction": "desc"}
+        if kind == "issues":
+            params["since"] = oldest.strftime("%Y-%m-%dT%H:%M:%SZ")
+        url = self.listing_url(kind)
+        headers = github_request_headers()
+        if url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        response = transport.get_session().get(
+            url, params={"per_page": 100, **params}, headers=headers
+        )
+        # with the response cache on, a 304 comes back as the cached page
+        unchanged = response.status_code == 304 or getattr(
+            response, "from_cache", False
+        )
+        if unchanged and not first_poll:
+            return
+        response.raise_for_status()
+        if "ETag" in response.headers:
+            self.etags[url] = response.headers["ETag"]
+        self.watermarks.setdefault(kind, oldest)
+
+        while True:
+            for payload in response.json():
+                updated_at = parse_github_timestamp(payload["updated_at"])
+                if updated_at < oldest:
+                    return
+                self.watermarks[kind] = max(self.watermarks[kind], updated_at)
+                yield payload
+            next_url = response.links.get("next", {}).get("url")
+            if next_url is None:
+                return
+            response = transport.get_session().get(
+                next_url, headers=github_request_headers()
+            )
+            response.raise_for_status()
+
+    def issue_record(self, payload: dict, closers: IssueClosers) -> IssueRecord:
+        """IssueRecord for a listing payload; the listing does not carry closed_by,
+        so the closer of a closed issue of the window is looked up once per close,
+        in the issue events like IssueSnapshot, or with a GET of the issue
+
+        Args:
+          payload: dict from the issue list endpoint
+          closers: IssueClosers of this poll
+
+        Returns:
+            IssueRecord
+
+        """
+        closed_by = None
+        created_at = parse_github_timestamp(payload["created_at"])
+        if payload["state"] == "closed" and check_if_issue_date_interesting(
+            created_at,
+            self.start_date,
+            self.end_date,
+            self.settings.end_date_buffer,
+        ):
+            number = payload["number"]
+            closed_at = parse_github_timestamp(payload["closed_at"])
+            known_close, closed_by = self.closers.get(number, (None, None))
+            if known_close != closed_at:
+                close = closers.closer(number, closed_at)
+                if close is not None:
+                    closed_by = close.actor
+                else:
+                    payload = get_json(payload["url"])
+                    closed_by = (payload.get("closed_by") or {}).get("login")
+                self.closers[number] = (closed_at, closed_by)
+        return IssueRecord.from_rest_payload(payload, closed_by)
+
+    def update(self) -> int:
+        """one poll: classify again everything changed since the previous poll
+
+        Returns:
+            number of PRs and issues read again
+
+        """
+        developer_ids = self.settings.developer_ids
+        changed = 0
+        for payload in self.iter_changed("pulls"):
+            if self.seen(self.pr_items, payload):
+                continue
+            pull_request = PullRequestSnapshot.from_list_payload(payload)
+            # reviews may have been added since the events were fetched
+            forget_discussion_events(pull_request.number)
+            self.pr_items[pull_request.number] = (
+                pull_request.updated_at,
+                list(
+                    iter_pr_report_items(
+                        [pull_request], developer_ids, self.start_date, self.end_date
+                    )
+                ),
+            )
+            changed += 1
+
+        # events since the previous poll hold every close made since then
+        closers = IssueClosers(
+            self.settings.target_repo, self.watermarks.get("issues", self.start_date)
+        )
+        for payload in self.iter_changed("issues"):
+            if self.seen(self.issue_items, payload):
+                continue
+            issue = self.issue_record(payload, closers)
+            self.issue_items[issue.number] = (
+                issue.updated_at,
+                list(
+                    iter_issue_report_items(
+                        [issue],
+                        developer_ids,
+                        self.start_date,
+                        self.end_date,
+                        self.settings.end_date_buffer,
+                    )
+                ),
+                issue.created_at,
+            )
+            changed += 1
+        return changed
+
+    @staticmethod
+    def seen(known_items: dict, payload: dict) -> bool:
+        """item already classified at this update; listings repeat the items
+        updated in the same second as the watermark"""
+        known = known_items.get(payload["number"])
+        return known is not None and known[0] == parse_github_timestamp(
+            payload["updated_at"]
+        )
+
+    def report_items(self) -> list:
+        """report tuples of all PRs and issues, unsorted, in the order a normal
+        run produces them: PRs most recently updated first, then issues least
+        recently updated first"""
+        pull_requests = sorted(
+            self.pr_items.items(),
+            key=lambda entry: (entry[1][0], entry[0]),
+            reverse=True,
+        )
+        issues = sorted(
+            self.issue_items.values(),
+            key=lambda entry: (entry[0], -entry[2].timestamp()),
+        )
+        items = []
+        for _, (_, report_items) in pull_requests:
+            items.extend(report_items)
+        for _, report_items, _ in issues:
+            items.extend(report_items)
+        return items
+
+
+def rate_limit_budget() -> tuple | None:
+    """(remaining, limit, reset) of the core rate limit, as last reported"""
+    scheduler = transport.get_session().scheduler
+    return getattr(scheduler, "budgets", {}).get("core")
+
+
+def watch_report(
+    output: str,
+    fixed_window: tuple | None = None,
+    max_cycles: int | None = None,
+    sleep=time.sleep,
+):
+    """keeps output up to date until interrupted
+
+    Args:
+      output: report file, rewritten atomically whenever it changes
+      fixed_window: (start, end) to watch instead of the current week
+      max_cycles: stop after this many polls; None runs until interrupted
+      sleep: called with the seconds to wait between polls
+
+    Returns:
+        the ReportWatcher of the last cycle
+
+    """
+    settings = config.settings
+    watcher = None
+    cycle = 0
+    while max_cycles is None or cycle < max_cycles:
+        start_date, end_date = fixed_window or current_week()
+        if watcher is None or watcher.start_date != start_date:
+            logging.info(f"watching {start_date} to {end_date}, report at {output}")
+            watcher = ReportWatcher(settings, start_date, end_date)
+        budget_before = rate_limit_budget()
+        changed = watcher.update()
+        if changed or cycle == 0:
+            write_report_atomically(
+                output,
+                format_final_html_block(sort_final_data(watcher.report_items())),
+            )
+        budget = rate_limit_budget()
+        cycle_cost = 1
+        if budget_before is not None and budget is not None:
+            if budget[2] == budget_before[2]:  # same reset window
+                cycle_cost = budget_before[0] - budget[0]
+        seconds = poll_seconds(budget, cycle_cost, settings.watch_interval)
+        logging.info(
+            f"watch cycle {cycle + 1}: {changed} items changed, "
+            f"{cycle_cost} requests, next poll in {seconds:.0f}s"
+        )
+        cycle += 1
+        if max_cycles is None or cycle < max_cycles:
+            sleep(seconds)
+    return watcher
@@ -0,0 +1,423 @@
+"""
+module receives GitHub webhook deliveries on a small local HTTP endpoint and
+appends them to an event store, so reports can be built without polling GitHub.
+
+the store is a JSON lines file, one delivery per line.  `--source webhooks` folds
+the stored `pull_request`, `pull_request_review`, `issue_comment` and `issues`
+events into the same PullRequestRecord / IssueRecord objects the mirror returns:
+the newest payload of each PR and issue, plus the logins that reviewed,
+commented on or closed each PR.  The existing classification rules then run on
+those records, with no GitHub calls at all.
+
+    python -m webhooks serve --port 8000
+    python -m webhooks replay --url http://127.0.0.1:8000 deliveries/*.json
+
+replay posts saved payload files (`{"event": ..., "payload": ...}`) to an
+endpoint, signed like GitHub signs them, to test locally.
+"""
+import argparse
+import datetime
+import glob
+import hashlib
+import hmac
+import http.server
+import json
+import logging
+import os
+import threading
+import uuid
+
+import requests
+
+import config
+from pr_discussion import events_from_issue_comments
+from pr_discussion import events_from_reviews
+from pr_discussion import review_actions
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+
+logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+handled_events = ("pull_request", "pull_request_review", "issue_comment", "issues")
+
+
+def event_store_path(settings) -> str:
+    """event store of the settings, by default next to the http cache"""
+    if settings.event_store:
+        return settings.event_store
+    return os.path.join(settings.cache_dir or ".", "webhook_events.jsonl")
+
+
+def signature(secret: str, body: bytes) -> str:
+    """X-Hub-Signature-256 header value GitHub sends for body"""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+class EventStore:
+    """append-only JSON lines file of webhook deliveries
+
+    Args:
+      path: store file, created on first append
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, event: str, delivery: str, payload: dict):
+        """store one delivery; a single write per line, so concurrent readers
+        never see half a line"""
+        line = json.dumps(
+            {
+                "event": event,
+                "delivery": delivery,
+                "received_at": datetime.datetime.utcnow().isoformat(),
+                "payload": payload,
+            }
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as writer:
+                writer.write(line + "\n")
+
+    def __iter__(self):
+        """stored deliveries, oldest first, each redelivery only once"""
+        if not os.path.exists(self.path):
+            return
+        deliveries = set()
+        with open(self.path, encoding="utf-8") as reader:
+            for line in reader:
+                if not line.endswith("\n"):
+                    break  # a delivery still being written
+                stored = json.loads(line)
+                if stored["delivery"] in deliveries:
+                    continue
+                deliveries.add(stored["delivery"])
+                yield stored
+
+
+def _newer(stored: dict | None, payload: dict) -> bool:
+    """payload is at least as recent as the stored one; deliveries can arrive
+    out of order"""
+    return stored is None or payload["updated_at"] >= stored["updated_at"]
+
+
+class EventFold:
+    """current state of a repo's PRs and issues, built from webhook deliveries
+
+    Args:
+      target_repo: owner/name; deliveries for other repos are skipped
+    """
+
+    def __init__(self, target_repo: str):
+        self.target_repo = target_repo
+        self.pull_requests: dict[int, dict] = {}  # number: newest PR payload
+        # numbers seen in pull_request events; review and comment events carry
+        # only part of the PR payload
+        self.complete_pull_requests: set[int] = set()
+        self.discussion: dict[int, set] = {}  # number: logins active on the PR
+        # number: newest issue payload; PRs too, as the issues listing has them
+        self.issues: dict[int, dict] = {}
+        self.closers: dict[int, str | None] = {}
+
+    def add(self, event: str, payload: dict):
+        if (payload.get("repository") or {}).get("full_name") != self.target_repo:
+            return
+        sender = (payload.get("sender") or {}).get("login")
+        action = payload.get("action")
+        if event == "pull_request":
+            self.add_pull_request(payload["pull_request"])
+            self.complete_pull_requests.add(payload["pull_request"]["number"])
+            self.add_issue(self.issue_view(payload["pull_request"]))
+            if action == "closed":
+                self.add_discussion(payload["pull_request"]["number"], sender)
+                self.closers[payload["pull_request"]["number"]] = sender
+            elif action == "reopened":
+                self.closers[payload["pull_request"]["number"]] = None
+        elif event == "pull_request_review" and action == "submitted":
+            self.add_pull_request(payload["pull_request"])
+            for review in events_from_reviews([payload["review"]]):
+                if review.action in review_actions:
+                    self.add_discussion(payload["pull_request"]["number"], review.actor)
+        elif event == "issue_comment" and action == "created":
+            issue = payload["issue"]
+            self.add_issue(issue)
+            if "pull_request" in issue:
+                # the issue's comment count is the PR's comments field
+                self.add_pull_request(
+                    {
+                        "number": issue["number"],
+                        "updated_at": issue["updated_at"],
+                        "comments": issue["comments"],
+                    }
+                )
+                for comment in events_from_issue_comments([payload["comment"]]):
+                    self.add_discussion(issue["number"], comment.actor)
+        elif event == "issues":
+            self.add_issue(payload["issue"])
+            if action == "closed":
+                self.closers[payload["issue"]["number"]] = sender
+            elif action == "reopened":
+                self.closers[payload["issue"]["number"]] = None
+
+    def add_pull_request(self, pull_request: dict):
+        """merge a PR payload into the stored one; review and comment payloads
+        carry fewer fields than pull_request payloads, so fields are merged"""
+        stored = self.pull_requests.get(pull_request["number"])
+        if stored is None:
+            self.pull_requests[pull_request["number"]] = dict(pull_request)
+        elif _newer(stored, pull_request):
+            stored.update(pull_request)
+        else:
+            for name, value in pull_request.items():
+                stored.setdefault(name, value)
+
+    def add_issue(self, issue: dict):
+        stored = self.issues.get(issue["number"])
+        if _newer(stored, issue):
+            self.issues[issue["number"]] = issue
+
+    def add_discussion(self, number: int, login: str | None):
+        if login is not None:
+            self.discussion.setdefault(number, set()).add(login)
+
+    @staticmethod
+    def issue_view(pull_request: dict) -> dict:
+        """a PR payload as the issues listing shows the PR"""
+        return {
+            "number": pull_request["number"],
+            "title": pull_request["title"],
+            "url": pull_request["issue_url"],
+            "html_url": pull_request["html_url"],
+            "state": pull_request["state"],
+            "user": pull_request["user"],
+            "created_at": pull_request["created_at"],
+            "updated_at": pull_request["updated_at"],
+            "closed_at": pull_request["closed_at"],
+        }
+
+    def pull_request_records(self) -> list:
+        """PullRequestRecord of every PR seen in a pull_request event"""
+        records = []
+        for number, payload in self.pull_requests.items():
+            if number not in self.complete_pull_requests:
+                continue  # only seen in review / comment events, not complete
+            record = PullRequestRecord.from_rest_payload(payload)
+            record.discussion_authors = self.discussion.get(number, set())
+            records.append(record)
+        return records
+
+    def issue_records(self) -> list:
+        return [
+            IssueRecord.from_rest_payload(issue, self.closers.get(number))
+            for number, issue in self.issues.items()
+        ]
+
+
+def fold_event_store(store: EventStore, target_repo: str) -> EventFold:
+    fold = EventFold(target_repo)
+    for stored in store:
+        fold.add(stored["event"], stored["payload"])
+    return fold
+
+
+def load_report_inputs(
+    store: EventStore,
+    target_repo: str,
+    report_start_date: datetime.datetime,
+    report_end_date: datetime.datetime,
+) -> tuple:
+    """PRs and issues for a report from the event store, like the mirror's
+
+    Args:
+      store: EventStore with the repo's deliveries
+      target_repo: owner/name
+      report_start_date: beginning of window
+      report_end_date: end of window, including any end_date_buffer
+
+    Returns:
+        tuple of PullRequestRecords updated in the window and IssueRecords
+        updated since its start, both most recently updated first
+
+    """
+    fold = fold_event_store(store, target_repo)
+    pull_requests = [
+        record
+        for record in fold.pull_request_records()
+        if report_start_date <= record.updated_at <= report_end_date
+    ]
+    issues = [
+        record
+        for record in fold.issue_records()
+        if record.updated_at >= report_start_date
+    ]
+    newest_first = {"key": lambda record: record.updated_at, "reverse": True}
+    return sorted(pull_requests, **newest_first), sorted(issues, **newest_first)
+
+
+class WebhookHandler(http.server.BaseHTTPRequestHandler):
+    """accepts GitHub webhook POSTs and stores the events reports use"""
+
+    server: "WebhookServer"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        logging.debug(f"webhooks: {format % args}")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        secret = self.server.secret
+        if secret and not hmac.compare_digest(
+            self.headers.get("X-Hub-Signature-256", ""), signature(secret, body)
+        ):
+            return self.respond(401, "signature does not match")
+
+        event = self.headers.get("X-GitHub-Event", "")
+        if event not in handled_events:
+            return self.respond(200, f"ignored {event or 'unnamed'} event")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self.respond(400, "body is not JSON")
+        delivery = self.headers.get("X-GitHub-Delivery") or str(uuid.uuid4())
+        self.server.store.append(event, delivery, payload)
+        self.server.count_delivery()
+        return self.respond(202, "stored")
+
+    def respond(self, status: int, message: str):
+        body = message.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class WebhookServer(http.server.ThreadingHTTPServer):
+    """webhook endpoint writing to an EventStore; use as a context manager to
+    serve in a background thread, like fake_github.FakeGitHub
+
+    Args:
+      store: EventStore receiving the deliveries
+      secret: webhook secret; deliveries with another signature are refused
+      host: address to listen on
+      port: 0 picks a free port
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        store: EventStore,
+        secret: str | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        super().__init__((host, port), WebhookHandler)
+        self.store = store
+        self.secret = secret
+        self.deliveries = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_delivery(self):
+        with self._count_lock:
+            self.deliveries += 1
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def replay_deliveries(url: str, deliveries, secret: str | None = None) -> int:
+    """posts deliveries to a webhook endpoint the way GitHub does
+
+    Args:
+      url: endpoint, e.g. http://127.0.0.1:8000
+      deliveries: iterable of (event name, payload dict)
+      secret: signs each body, when the endpoint checks signatures
+
+    Returns:
+        number of deliveries stored by the endpoint
+
+    """
+    stored = 0
+    with requests.Session() as session:
+        for event, payload in deliveries:
+            body = json.dumps(payload).encode()
+            headers = {
+                "Content-Type": "application/json",
+                "X-GitHub-Event": event,
+                "X-GitHub-Delivery": str(uuid.uuid4()),
+            }
+            if secret:
+                headers["X-Hub-Signature-256"] = signature(secret, body)
+            response = session.post(url, data=body, headers=headers)
+            response.raise_for_status()
+            stored += response.status_code == 202
+    return stored
+
+
+def read_delivery_files(paths: list[str]):
+    """(event, payload) from saved delivery files, in name order; directories
+    contribute their *.json files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "*.json")))
+        else:
+            files.append(path)
+    for path in sorted(files):
+        with open(path, encoding="utf-8") as reader:
+            delivery = json.load(reader)
+        yield delivery["event"], delivery["payload"]
+
+
+def main(argv=None):
+    """serve the webhook endpoint, or replay saved deliveries to one"""
+    parser = argparse.ArgumentParser(
+        prog="python -m webhooks",
+        description="receive GitHub webhooks into a local event store",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the webhook endpoint")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument(
+        "--event-store",
+        default=event_store_path(config.settings),
+        help="JSON lines file receiving the deliveries",
+    )
+    replay = commands.add_parser("replay", help="post saved deliveries")
+    replay.add_argument("--url", default="http://127.0.0.1:8000")
+    replay.add_argument("paths", nargs="+", help="delivery files or directories")
+    args = parser.parse_args(argv)
+
+    secret = config.webhook_secret
+    if args.command == "replay":
+        stored = replay_deliveries(args.url, read_delivery_files(args.paths), secret)
+        logging.info(f"{stored} deliveries stored by {args.url}")
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.event_store)), exist_ok=True)
+    server = WebhookServer(EventStore(args.event_store), secret, args.host, args.port)
+    if not secret:
+        logging.warning("GITHUB_WEBHOOK_SECRET is not set; signatures are not checked")
+    logging.info(f"receiving webhooks on {server.url} into {args.event_store}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
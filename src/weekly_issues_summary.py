@@ -8,7 +8,9 @@ import typing
 
 import github
 
-from config import repo
+import config
+from page_seek import seek_window
+from pr_records import IssueListing
 from utilities import timer_decorator
 
 logging.basicConfig(encoding="utf-8", level=logging.INFO)
@@ -44,24 +46,42 @@ def check_if_issue_date_interesting(
         <= (end_date + datetime.timedelta(days=int(end_date_buffer)))
     )
 
+def issue_listing(
+    target_repo: str, start_date_inner: datetime.datetime
+) -> IssueListing:
+    """issues updated since start date, most recently created first
+
+    filter_issues places issues by their creation date, so sorting on it lets
+    filter_issues seek straight to the pages created in the report window; the
+    closers of closed issues come from one pass over the repo's issue events
+
+    Args:
+      target_repo: owner/name of repo
+      start_date_inner: date we stop getting issues from GitHub
+
+    Returns:
+      IssueListing of IssueSnapshot records
+
+    """
+    return IssueListing(target_repo, start_date_inner)
+
+
 @timer_decorator
 def get_issues(start_date_inner: datetime.datetime):
-    """use PyGithub API to return issues in descending order
-    from most recently updated to older, stopping at the oldest date = start date
+    """use the GitHub REST API to return issues in descending order
+    from most recently created to older, stopping at the oldest date = start date
 
     Args:
       start_date_inner: date we stop getting issues from GitHub
 
     Returns:
-      GitHub PaginatedList, list of tuples containing PR objects from GitHub
+      IssueListing of issues, see issue_listing
       start_date_inner: datetime.datetime:
 
     """
 
     logging.info("begin pulling issues of interest")
-    return repo.get_issues(
-        state="all", since=start_date_inner, sort="updated", direction="desc"
-    )
+    return issue_listing(config.settings.target_repo, start_date_inner)
 
 
 # noinspection PyUnresolvedReferences,GrazieInspection
@@ -89,45 +109,86 @@ def filter_issues(
     """
     logging.info("begin filter_issues")
     issues_opened, issues_closed, issued_combined = [], [], []
-
-    for issue in input_issues:
-        logging.info(f"processing issue: {issue.number}")
-        # simplify condition names
-        if issue.last_modified is None:
-            date_to_consider = issue.created_at
-        else:
-            date_to_consider = issue.last_modified
-
-        interesting_date_range = check_if_issue_date_interesting(
-            date_to_consider, start_date, end_date, end_date_buffer
-        )
-
-        # filter stuff we want to keep
-        if interesting_date_range:
-            interesting_issue_owner = (
-                False
-                if issue.user.login is None
-                else bool(issue.user.login in developer_ids)
-            )
-
-            interesting_issue_closer = (
-                False
-                if issue.closed_by is None
-                else bool(issue.closed_by.login in developer_ids)
-            )
-
-            if issue.state == "closed" and (
-                interesting_issue_owner or interesting_issue_closer
+    window_end = end_date + datetime.timedelta(days=int(end_date_buffer))
+
+    checkpoint = config.settings.report_checkpoint
+    if checkpoint is not None:
+        # continue with what an earlier, interrupted run already found
+        issues_opened = checkpoint.issues_of_interest
+        if checkpoint.issues.done:
+            return sorted(issues_opened, key=lambda x: x.updated_at)
+        input_issues = checkpoint.issues.track(input_issues, start_date, window_end)
+    else:
+        # only the pages created in the window, when the listing can seek
+        input_issues = seek_window(input_issues, "created_at", start_date, window_end)
+
+    try:
+        for issue in input_issues:
+            if issue_of_interest(
+                issue, developer_ids, start_date, end_date, end_date_buffer
             ):
                 issues_opened.append(issue)
-            elif issue.state == "open" and interesting_issue_owner:
-                issues_opened.append(issue)
-            else:
-                continue
+        if checkpoint is not None:
+            checkpoint.issues.done = True
+    finally:
+        if checkpoint is not None:
+            checkpoint.save()
 
     return sorted(issues_opened + issues_closed, key=lambda x: x.updated_at)
 
 
+def issue_of_interest(
+    issue,
+    developer_ids: list,
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    end_date_buffer: int = 0,
+) -> bool:
+    """decides if a single issue belongs in the report; see filter_issues
+
+    Args:
+      issue: issue from GitHub
+      developer_ids: GitHub id strings to filter
+      start_date: for issue filtering
+      end_date: for issue filtering
+      end_date_buffer: optional buffer to extend end date
+
+    Returns:
+      bool: True if one of our developers opened or closed the issue in the period
+
+    """
+    logging.info(f"processing issue: {issue.number}")
+    # simplify condition names
+    if issue.last_modified is None:
+        date_to_consider = issue.created_at
+    else:
+        date_to_consider = issue.last_modified
+
+    interesting_date_range = check_if_issue_date_interesting(
+        date_to_consider, start_date, end_date, end_date_buffer
+    )
+
+    # filter stuff we want to keep
+    if not interesting_date_range:
+        return False
+
+    interesting_issue_owner = (
+        False if issue.user.login is None else bool(issue.user.login in developer_ids)
+    )
+
+    interesting_issue_closer = (
+        False
+        if issue.closed_by is None
+        else bool(issue.closed_by.login in developer_ids)
+    )
+
+    if issue.state == "closed" and (
+        interesting_issue_owner or interesting_issue_closer
+    ):
+        return True
+    return issue.state == "open" and interesting_issue_owner
+
+
 @typing.no_type_check
 @timer_decorator
 def format_issues(
@@ -156,52 +217,80 @@ def format_issues(
     len(input_issues)
 
     for issue in input_issues:
-        logging.info(f"formatting issue #: {issue.number}")
-        # determine branch based on common PR naming pattern with [X.Y] branch prefix
-        if "[main]" in issue.title or "[3." not in issue.title:
-            branch_name = "[main]"
-        else:
-            branch_name = str(issue.title).split(" ", 2)[0]
-
-        match issue.state:
-            case "open":
-                # issues we authored
-                if (
-                    issue.user.login in developer_ids
-                    and check_if_issue_date_interesting(
-                        issue.updated_at, start_date, end_date, end_date_buffer
-                    )
-                ):
-                    issues_summary.append(
-                        tuple(
-                            (
-                                f"{issue.updated_at}",
-                                "Issue",
-                                "opened",
-                                f"{branch_name.rjust(6)}",
-                                f"{issue.url}",
-                                f"{issue.title}",
-                            )
+        issues_summary.extend(
+            format_issue(issue, developer_ids, start_date, end_date, end_date_buffer)
+        )
+
+    return issues_summary
+
+
+@typing.no_type_check
+def format_issue(
+    issue,
+    developer_ids: list,
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    end_date_buffer: int = 0,
+) -> list:
+    """report items for one issue; see format_issues
+
+    Args:
+      issue: issue from GitHub
+      developer_ids: GitHub id strings to filter
+      start_date: start date of report
+      end_date: similar, passed in for testing
+      end_date_buffer: number of days to add to 'end time'
+
+    Returns:
+      list issues_summary: tuples with select, reformatted fields for this issue
+
+    """
+    issues_summary = []
+    logging.info(f"formatting issue #: {issue.number}")
+    # determine branch based on common PR naming pattern with [X.Y] branch prefix
+    if "[main]" in issue.title or "[3." not in issue.title:
+        branch_name = "[main]"
+    else:
+        branch_name = str(issue.title).split(" ", 2)[0]
+
+    match issue.state:
+        case "open":
+            # issues we authored
+            if (
+                issue.user.login in developer_ids
+                and check_if_issue_date_interesting(
+                    issue.updated_at, start_date, end_date, end_date_buffer
+                )
+            ):
+                issues_summary.append(
+                    tuple(
+                        (
+                            f"{issue.updated_at}",
+                            "Issue",
+                            "opened",
+                            f"{branch_name.rjust(6)}",
+                            f"{issue.url}",
+                            f"{issue.title}",
                         )
                     )
-
-            # issues we closed
-            case "closed":
-                if issue.closed_by.login in developer_ids:
-                    issues_summary.append(
-                        tuple(
-                            (
-                                f"{issue.closed_at}",
-                                "Issue",
-                                "closed",
-                                f"{branch_name.rjust(6)}",
-                                f"{issue.url}",
-                                f"{issue.title}",
-                            )
+                )
+
+        # issues we closed
+        case "closed":
+            if issue.closed_by.login in developer_ids:
+                issues_summary.append(
+                    tuple(
+                        (
+                            f"{issue.closed_at}",
+                            "Issue",
+                            "closed",
+                            f"{branch_name.rjust(6)}",
+                            f"{issue.url}",
+                            f"{issue.title}",
                         )
                     )
-        # END match
-    # END for issue in input_issues
+                )
+    # END match
 
     return issues_summary
 
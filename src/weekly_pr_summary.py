@@ -6,15 +6,17 @@ requires env var:  GITHUB_ACCESS_TOKEN, a valid access token from your GitHub ac
 
 import datetime
 import logging
-import re
 
 import github.GithubException
-import requests
 
-from config import buildbot_ids
-from config import end_date_buffer
-from config import github_token
-from config import repo
+import config
+import tracing
+import transport
+from activity_matcher import get_activity_matcher
+from discussion_memo import discussion_key
+from page_seek import seek_window
+from pr_discussion import developers_active_in_discussion
+from pr_discussion import get_discussion_events
 from utilities import timer_decorator
 
 logging.basicConfig(encoding="utf-8", level=logging.INFO)
@@ -72,8 +74,11 @@ def check_developer_wrote_comments(pr_object, developer_ids: list[str]) -> bool:
     """checks if developer commented on a PR
 
     PyGitHub does not provide easy way to confirm if a developer reviewed a PR.
-    As workaround, we parse written PR comments for target developer_id
-    assuming if "{developer_id} approved these changes" is found, the PR was reviewed
+    By default, we read the PR timeline from the REST API (reviews, comments and
+    state changes as actor / action records) and look for our developer ids.
+    PR records fetched through GraphQL include discussion authors, so for those
+    the check is a set lookup with no extra requests.  Setting review_backend to
+    "html" falls back to scraping the rendered PR page.
 
     Args:
       pr_object: tuple of elements from the GitHub PR object
@@ -82,58 +87,103 @@ def check_developer_wrote_comments(pr_object, developer_ids: list[str]) -> bool:
     Returns:
       bool: developer_commented
 
+    """
+    # records from github_graphql already carry reviewer / commenter logins
+    discussion_authors = getattr(pr_object, "discussion_authors", None)
+    if discussion_authors is not None:
+        return not discussion_authors.isdisjoint(developer_ids)
+
+    # each PR is analyzed once per updated_at, however many callers ask; the
+    # whole team is analyzed together, so per-developer checks in team mode
+    # reuse one analysis
+    settings = config.settings
+    team = discussion_team(developer_ids)
+    developers_found = settings.discussion_memo.get_or_analyze(
+        discussion_key(settings.target_repo, pr_object, settings.review_backend, team),
+        lambda: analyze_discussion(pr_object, team),
+    ).intersection(developer_ids)
+    if developers_found:
+        logging.info(f"{pr_object.number} reviewed by {sorted(developers_found)}")
+    return bool(developers_found)
+
+
+def discussion_team(developer_ids: list[str]) -> list[str]:
+    """developers a discussion is analyzed for: the requested ones plus the team"""
+    return sorted(set(config.settings.developer_ids).union(developer_ids))
+
+
+def discussion_known(pr_object, developer_ids: list[str]) -> bool:
+    """check_developer_wrote_comments can answer without any requests"""
+    if getattr(pr_object, "discussion_authors", None) is not None:
+        return True
+    settings = config.settings
+    return (
+        discussion_key(
+            settings.target_repo,
+            pr_object,
+            settings.review_backend,
+            discussion_team(developer_ids),
+        )
+        in settings.discussion_memo
+    )
+
+
+def analyze_discussion(pr_object, developer_ids: list[str]) -> set[str]:
+    """developers who reviewed, commented on or closed a PR, per review_backend
+
+    Args:
+      pr_object: tuple of elements from the GitHub PR object
+      developer_ids: list of GitHub IDs of developers we are interested in
+
+    Returns:
+      set of developer ids found in the PR discussion
+
+    """
+    if config.settings.review_backend == "html":
+        return scrape_developer_comments(pr_object, developer_ids)
+    return developers_active_in_discussion(
+        get_discussion_events(pr_object.number), developer_ids
+    )
+
+
+def scrape_developer_comments(pr_object, developer_ids: list[str]) -> set[str]:
+    """checks if developer commented on a PR, by searching the rendered PR page
+
+    original approach: parse written PR comments for target developer_id
+    assuming if "{developer_id} approved these changes" is found, the PR was reviewed
+
+    Args:
+      pr_object: tuple of elements from the GitHub PR object
+      developer_ids: list of GitHub IDs of developers we are interested in
+
+    Returns:
+      set of developer ids found in the PR page
+
     """
     # use our person GitHub access token to avoid response limits
-    headers_for_requests = {"Authorization": f"token {github_token}"}
-    pr_html_url_text = requests.get(
-        pr_object.html_url, headers=headers_for_requests
-    ).text
+    headers_for_requests = {"Authorization": f"token {config.settings.github_token}"}
+    pr_html_url_text = (
+        transport.get_session()
+        .get(pr_object.html_url, headers=headers_for_requests)
+        .text
+    )
     if pr_object.comments > 0:
-        pr_comments_url_text = requests.get(
-            pr_object.review_comments_url, headers=headers_for_requests
-        ).text
+        pr_comments_url_text = (
+            transport.get_session()
+            .get(pr_object.review_comments_url, headers=headers_for_requests)
+            .text
+        )
     else:
         pr_comments_url_text = ""
     pr_discussion_text = pr_html_url_text + pr_comments_url_text
-    reviewed_search_string = "approved these changes"
-    commented_search_string_1 = "left a comment"
-    commented_search_string_2 = "commented"
-    commented_search_string_3 = "closed this"
-
-    search_strings = [
-        reviewed_search_string,
-        commented_search_string_1,
-        commented_search_string_2,
-        commented_search_string_3,
-    ]
 
-    found_string = False
-    successful_searches = []
-
-    # python in string search
-    for developer in developer_ids:
-        for string in search_strings:
-            new_string = f"{developer} {string}"
-            if new_string in pr_discussion_text:
-                successful_searches.append((f"found! with exact string: {new_string}"))
-
-    # backup regex search - both are needed due to GitHub url format differences
-    for developer in developer_ids:
-        for string in search_strings:
-            # regex finds {developer} NEAR {search string} (ref: https://regex101.com/)
-            regex = fr"\b({developer})\W+(?:\w+\W+){0,3}?({string})\b"
-            pattern = re.compile(regex)
-            if re.search(pattern, pr_discussion_text):
-                successful_searches.append(f"found!  with {regex}")
-
-    if not successful_searches:
-        return False
-    number_of_successful_searches = len(successful_searches)
-    successful_searches.insert(0, f"{pr_object.number}")
-    successful_searches.insert(1, str(number_of_successful_searches))
-    for item in successful_searches:
-        logging.info(item)
-    return True
+    # one scan finds {developer} NEAR a phrase for every developer; this also
+    # covers the exact "{developer} {phrase}" strings the page usually contains
+    with tracing.span("activity_matcher", "regex", characters=len(pr_discussion_text)):
+        activity = get_activity_matcher(tuple(developer_ids)).find(pr_discussion_text)
+    for developer, phrases in sorted(activity.items()):
+        logging.info(f"{pr_object.number} found! {developer}: {sorted(phrases)}")
+    return set(activity)
 
 
 @timer_decorator
@@ -157,7 +207,7 @@ def get_pr_objects_from_pr_numbers(
     """
     logging.info(f"retrieving {len(prs_to_get)} PRs: {prs_to_get}")
 
-    pr_objects = [repo.get_pull(item) for item in sorted(prs_to_get)]
+    pr_objects = [config.settings.repo.get_pull(item) for item in sorted(prs_to_get)]
 
     reviewed_prs_found = [
         each_pull_request.number
@@ -192,11 +242,75 @@ def filter_prs_from_date_range(
 
     """
     logging.info("begin finding pull requests of interest by date range.")
+    prs_of_interest, prs_reviewed_inner = [], []
+
+    checkpoint = None if user_input_prs else config.settings.report_checkpoint
+    if checkpoint is not None:
+        # continue with what an earlier, interrupted run already found
+        prs_of_interest = checkpoint.prs_of_interest
+        prs_reviewed_inner = checkpoint.prs_reviewed
+        if checkpoint.pull_requests.done:
+            return prs_of_interest, prs_reviewed_inner
+        pull_request_inputs = checkpoint.pull_requests.track(
+            pull_request_inputs,
+            report_start_date,
+            report_end_date + datetime.timedelta(days=config.settings.end_date_buffer),
+        )
+
+    try:
+        for pull_request_entries, reviewed in iter_prs_of_interest(
+            pull_request_inputs,
+            developer_ids,
+            report_start_date,
+            report_end_date,
+            user_input_prs,
+        ):
+            prs_of_interest.extend(pull_request_entries)
+            if reviewed:
+                prs_reviewed_inner.append(pull_request_entries[0].number)
+        if checkpoint is not None:
+            checkpoint.pull_requests.done = True
+    finally:
+        if checkpoint is not None:
+            checkpoint.save()
+
+    return prs_of_interest, prs_reviewed_inner
+
+
+def iter_prs_of_interest(
+    pull_request_inputs,
+    developer_ids: list[str],
+    report_start_date,
+    report_end_date,
+    user_input_prs: list[str] = [],
+):
+    """generator behind filter_prs_from_date_range; yields each PR of interest as
+    soon as it is classified, so callers can summarize it and let it go
 
+    Args:
+      pull_request_inputs: PRs from GitHub, most recently updated first
+      developer_ids: GitHub developer ids
+      report_start_date: for local filtering
+      report_end_date: also for local filtering; end_date_buffer is added here
+      user_input_prs: (Default value = [])user input of specific pr numbers to find
+
+    Returns:
+      generator of tuples:
+      - list of the PR, once for each reason it is of interest
+      - bool, True if one of our developers reviewed the PR
+
+    """
     # setup
     # add buffer to end date to capture changes by bots after DIR approval in period
-    report_end_date = report_end_date + datetime.timedelta(days=end_date_buffer)
-    prs_of_interest, prs_reviewed_inner = [], []
+    report_end_date = report_end_date + datetime.timedelta(
+        days=config.settings.end_date_buffer
+    )
+    buildbot_ids = config.settings.buildbot_ids
+    if not user_input_prs:
+        # skip straight to the window's pages when the listing can seek
+        pull_request_inputs = seek_window(
+            pull_request_inputs, "updated_at", report_start_date, report_end_date
+        )
 
     for each_pull_request in pull_request_inputs:
         # Our API call return is sorted in descending dates
@@ -221,60 +335,92 @@ def filter_prs_from_date_range(
             break
 
         else:
-            date_check_results = check_for_interesting_dates(
-                each_pull_request, report_start_date, report_end_date
-            )
-            created_date_of_interest = date_check_results.get("created")
-            updated_date_of_interest = date_check_results.get("updated")
-            closed_date_of_interest = date_check_results.get("closed")
-            merged_date_of_interest = date_check_results.get("merged")
-            dev_comments = check_developer_wrote_comments(
-                each_pull_request, developer_ids
+            with tracing.span(
+                f"PR {each_pull_request.number}",
+                "pull_request",
+                number=each_pull_request.number,
+            ):
+                pull_request_entries, reviewed = classify_pull_request(
+                    each_pull_request,
+                    developer_ids,
+                    report_start_date,
+                    report_end_date,
+                    buildbot_ids,
+                )
+            if pull_request_entries:
+                yield pull_request_entries, reviewed
+
+
+def classify_pull_request(
+    each_pull_request,
+    developer_ids: list[str],
+    report_start_date,
+    report_end_date,
+    buildbot_ids: list[str],
+) -> tuple[list, bool]:
+    """decides why a single PR inside the date range is of interest
+
+    Args:
+      each_pull_request: single PR object from GitHub
+      developer_ids: GitHub developer ids
+      report_start_date: beginning of report period
+      report_end_date: end of report period, including end_date_buffer
+      buildbot_ids: bots that merge PRs for our developers
+
+    Returns:
+      tuple:
+      - list of the PR, once for each reason it is of interest (may be empty)
+      - bool, True if one of our developers reviewed the PR
+
+    """
+    pull_request_entries, reviewed = [], False
+
+    date_check_results = check_for_interesting_dates(
+        each_pull_request, report_start_date, report_end_date
+    )
+    created_date_of_interest = date_check_results.get("created")
+    updated_date_of_interest = date_check_results.get("updated")
+    closed_date_of_interest = date_check_results.get("closed")
+    merged_date_of_interest = date_check_results.get("merged")
+    dev_comments = check_developer_wrote_comments(each_pull_request, developer_ids)
+
+    # keep PR's we merged and PRs we own that are merged by bots
+    if (
+        each_pull_request.merged is True
+        and merged_date_of_interest is True
+        and each_pull_request.state == "closed"
+        and bool(
+            bool(each_pull_request.merged_by.login in developer_ids)
+            or bool(
+                each_pull_request.user.login in developer_ids
+                and each_pull_request.merged_by.login in buildbot_ids
             )
+        )
+    ):
+        pull_request_entries.append(each_pull_request)
+        if dev_comments is True:
+            reviewed = True
 
-            # keep PR's we merged and PRs we own that are merged by bots
-            if (
-                each_pull_request.merged is True
-                and merged_date_of_interest is True
-                and each_pull_request.state == "closed"
-                and bool(
-                    bool(each_pull_request.merged_by.login in developer_ids)
-                    or bool(
-                        each_pull_request.user.login in developer_ids
-                        and each_pull_request.merged_by.login in buildbot_ids
-                    )
-                )
-            ):
-                prs_of_interest.append(each_pull_request)
-                if (
-                    check_developer_wrote_comments(each_pull_request, developer_ids)
-                    is True
-                ):
-                    prs_reviewed_inner.append(each_pull_request.number)
-
-            # keep PRs we authored
-            if (
-                created_date_of_interest
-                and each_pull_request.user.login in developer_ids
-            ):
-                prs_of_interest.append(each_pull_request)
+    # keep PRs we authored
+    if created_date_of_interest and each_pull_request.user.login in developer_ids:
+        pull_request_entries.append(each_pull_request)
 
-            # keep PRs we reviewed
-            if (
-                updated_date_of_interest
-                and each_pull_request.comments >= 1
-                and dev_comments is True
-            ):
-                prs_of_interest.append(each_pull_request)
-                prs_reviewed_inner.append(each_pull_request.number)
+    # keep PRs we reviewed
+    # comments is not in PR list payloads; check it last, so it is only
+    # fetched for PRs our developers took part in
+    if (
+        updated_date_of_interest
+        and dev_comments is True
+        and each_pull_request.comments >= 1
+    ):
+        pull_request_entries.append(each_pull_request)
+        reviewed = True
 
-                # keep PRs we closed or enabled another to close (don't use merged_at)
-                if each_pull_request.state == "closed" and closed_date_of_interest:
-                    prs_of_interest.append(each_pull_request)
-                else:
-                    continue
+        # keep PRs we closed or enabled another to close (don't use merged_at)
+        if each_pull_request.state == "closed" and closed_date_of_interest:
+            pull_request_entries.append(each_pull_request)
 
-    return prs_of_interest, prs_reviewed_inner
+    return pull_request_entries, reviewed
 
 
 # END filter_prs_from_date_range
@@ -307,62 +453,93 @@ def summarize_pr_info(
 
     report_data: list = []
     for each_pull_request in interesting_pull_requests:
-
-        date_check_results = check_for_interesting_dates(
-            each_pull_request, report_start_date, report_end_date
+        report_data.extend(
+            summarize_pull_request(
+                each_pull_request,
+                reviewed_pull_requests,
+                developer_ids,
+                report_start_date,
+                report_end_date,
+            )
         )
-        created_date_of_interest = date_check_results.get("created")
-        updated_date_of_interest = date_check_results.get("updated")
-        closed_date_of_interest = date_check_results.get("closed")
-        merged_date_of_interest = date_check_results.get("merged")
 
-        # check each PR for key state changes during reporting period
-        # merged - by DIR of interest
-        if (
-            each_pull_request.state == "closed"
-            and closed_date_of_interest is True
-            and each_pull_request.merged is True
-            and merged_date_of_interest is True
-        ):
-            current_pr_action = "merged"
-            date_to_use_for_pr = each_pull_request.merged_at
-            report_data = append_report_data(
-                report_data, each_pull_request, current_pr_action, date_to_use_for_pr
-            )
+    return report_data
 
-        # authored, does not depend on pr state
-        if (
-            each_pull_request.user.login in developer_ids
-            and created_date_of_interest is True
-        ):
-            current_pr_action = "authored"
-            date_to_use_for_pr = each_pull_request.updated_at
-            report_data = append_report_data(
-                report_data, each_pull_request, current_pr_action, date_to_use_for_pr
-            )
 
-        # closed - captures PRs closed but not merged
-        # no strict ID that DIR closed in object
-        if closed_date_of_interest is True and each_pull_request.merged is False:
-            current_pr_action = "closed"
-            date_to_use_for_pr = each_pull_request.closed_at
-            report_data = append_report_data(
-                report_data, each_pull_request, current_pr_action, date_to_use_for_pr
-            )
+def summarize_pull_request(
+    each_pull_request,
+    reviewed_pull_requests: list,
+    developer_ids: list,
+    report_start_date,
+    report_end_date,
+) -> list:
+    """report items for one PR; see summarize_pr_info
 
-        # reviewed PR - identified in `reviewed_pull_requests` list
-        if (
-            each_pull_request.number in reviewed_pull_requests
-            and updated_date_of_interest is True
-        ):
-            current_pr_action = "reviewed"
-            date_to_use_for_pr = each_pull_request.updated_at
-            report_data = append_report_data(
-                report_data, each_pull_request, current_pr_action, date_to_use_for_pr
-            )
+    Args:
+      each_pull_request: single PR object from GitHub
+      reviewed_pull_requests: list of ints, PR #s confirmed by comment text
+      developer_ids: list of developer ids we are interested in
+      report_start_date: beginning of period for local filtering
+      report_end_date: end of period for local filtering
 
-        else:
-            continue
+    Returns:
+      list: report_data for this PR
+
+    """
+    report_data: list = []
+
+    date_check_results = check_for_interesting_dates(
+        each_pull_request, report_start_date, report_end_date
+    )
+    created_date_of_interest = date_check_results.get("created")
+    updated_date_of_interest = date_check_results.get("updated")
+    closed_date_of_interest = date_check_results.get("closed")
+    merged_date_of_interest = date_check_results.get("merged")
+
+    # check each PR for key state changes during reporting period
+    # merged - by DIR of interest
+    if (
+        each_pull_request.state == "closed"
+        and closed_date_of_interest is True
+        and each_pull_request.merged is True
+        and merged_date_of_interest is True
+    ):
+        current_pr_action = "merged"
+        date_to_use_for_pr = each_pull_request.merged_at
+        report_data = append_report_data(
+            report_data, each_pull_request, current_pr_action, date_to_use_for_pr
+        )
+
+    # authored, does not depend on pr state
+    if (
+        each_pull_request.user.login in developer_ids
+        and created_date_of_interest is True
+    ):
+        current_pr_action = "authored"
+        date_to_use_for_pr = each_pull_request.updated_at
+        report_data = append_report_data(
+            report_data, each_pull_request, current_pr_action, date_to_use_for_pr
+        )
+
+    # closed - captures PRs closed but not merged
+    # no strict ID that DIR closed in object
+    if closed_date_of_interest is True and each_pull_request.merged is False:
+        current_pr_action = "closed"
+        date_to_use_for_pr = each_pull_request.closed_at
+        report_data = append_report_data(
+            report_data, each_pull_request, current_pr_action, date_to_use_for_pr
+        )
+
+    # reviewed PR - identified in `reviewed_pull_requests` list
+    if (
+        each_pull_request.number in reviewed_pull_requests
+        and updated_date_of_interest is True
+    ):
+        current_pr_action = "reviewed"
+        date_to_use_for_pr = each_pull_request.updated_at
+        report_data = append_report_data(
+            report_data, each_pull_request, current_pr_action, date_to_use_for_pr
+        )
 
     return report_data
 
@@ -449,16 +626,17 @@ def sort_final_data(report_data: list) -> list:
     """
 
     logging.info("begin sort of final report")
-    try:
-        report_data = sorted(
-            sorted(
-                sorted(report_data, key=lambda key3: key3[3], reverse=True),
-                key=lambda key1: key1[1],
-            ),
-            key=lambda key0: datetime.datetime.fromisoformat(key0[0]).date(),
-        )
-    except ValueError:
-        pass
+    with tracing.span("sort_final_data", "sort", items=len(report_data)):
+        try:
+            report_data = sorted(
+                sorted(
+                    sorted(report_data, key=lambda key3: key3[3], reverse=True),
+                    key=lambda key1: key1[1],
+                ),
+                key=lambda key0: datetime.datetime.fromisoformat(key0[0]).date(),
+            )
+        except ValueError:
+            pass
 
     return report_data
 
@@ -477,9 +655,28 @@ def format_final_html_block(report_data: list) -> list:
 
     """
     logging.info("begin formatting for blog")
-    report_output = []
+    return list(iter_html_block(report_data))
+
+
+def iter_html_block(report_data: list):
+    """generator behind format_final_html_block, so a report can be written line
+    by line as it is rendered
+
+    Args:
+      report_data: sorted report data
+
+    Returns:
+      generator of report lines
+
+    """
     last_day_used = None
     last_work_product_used = None
+    # extra columns (repo in multi-repo reports, developer in team reports) are
+    # padded so links line up
+    label_widths = {}
+    for report_item in report_data:
+        for column, label in enumerate(report_item[6:]):
+            label_widths[column] = max(label_widths.get(column, 0), len(label))
 
     for report_item in report_data:
         current_day = datetime.datetime.fromisoformat(report_item[0]).date()
@@ -489,14 +686,14 @@ def format_final_html_block(report_data: list) -> list:
 
         # insert section row for each time the day changes
         if current_day != last_day_used:
-            report_output.append("")
-            report_output.append(f"{current_day.strftime('%A')}")
+            yield ""
+            yield f"{current_day.strftime('%A')}"
             last_day_used = current_day
 
         # insert section row each time the work product changes
         if current_work_product != last_work_product_used:
-            report_output.append("")
-            report_output.append(f"{current_work_product}")
+            yield ""
+            yield f"{current_work_product}"
             last_work_product_used = current_work_product
 
         # check spacing in item title, so branch names line up neatly
@@ -506,12 +703,16 @@ def format_final_html_block(report_data: list) -> list:
         else:
             final_title = draft_title
 
-        report_output.append(f"<li> {final_url} {final_title}/li>")
+        labels = [
+            f"{label:<{label_widths[column]}}"
+            for column, label in enumerate(report_item[6:])
+        ]
+        final_url = " ".join(labels + [final_url])
 
-    # END for loop - add blank line at end of table
-    report_output.append("")
+        yield f"<li> {final_url} {final_title}/li>"
 
-    return report_output
+    # END for loop - add blank line at end of table
+    yield ""
 
 
 def get_final_summary(
@@ -549,7 +750,10 @@ def get_final_summary(
         )
 
     except github.RateLimitExceededException:
-        logging.error("github rate limit exceeded", github.RateLimitExceededException)
+        # the transport already waited out and retried the limit; a partial
+        # report would silently miss PRs
+        logging.error("github rate limit exceeded after retries")
+        raise
     except github.GithubException as error:
         logging.error(f"a server error occurred {error}")
     except IndexError as error:
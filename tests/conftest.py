@@ -0,0 +1,88 @@
+"""pytest setup - modules under src and benchmarks are imported as top-level
+modules"""
+import dataclasses
+import datetime
+import os
+import sys
+
+import pytest
+
+repo_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(repo_root, "benchmarks"))
+sys.path.insert(0, os.path.join(repo_root, "src"))
+
+import config  # noqa: E402
+import pr_discussion  # noqa: E402
+import pr_records  # noqa: E402
+import transport  # noqa: E402
+from pr_records import BranchRef  # noqa: E402
+from pr_records import PullRequestRecord  # noqa: E402
+from pr_records import UserRef  # noqa: E402
+
+cassette_dir = os.path.join(repo_root, "tests", "cassettes")
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """every test starts from the same active settings and empty module caches;
+    settings a test activates, and what it fetched, are dropped afterwards.  The
+    cache is off, so no test reads or writes the user's http cache or discussion
+    memo, and memo hits can't carry over between runs"""
+    monkeypatch.setattr(
+        config, "settings", dataclasses.replace(config.settings, cache_dir="")
+    )
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    for kind in pr_records.completion_statistics:
+        monkeypatch.setitem(pr_records.completion_statistics, kind, 0)
+
+
+@pytest.fixture
+def github_cassette(request, monkeypatch):
+    """replays the test's GitHub traffic from tests/cassettes/<module>.<test>.jsonl.gz
+
+    only GITHUB_CASSETTE_MODE=record calls GitHub (network access and
+    GITHUB_ACCESS_TOKEN needed) and (re)writes the cassette; without a cassette
+    the test is skipped, or fails on CI, instead of quietly going to the network
+
+    Returns:
+        the active config.Settings, with the cassette set
+
+    """
+    module_name = request.module.__name__.rpartition(".")[2]
+    path = os.path.join(cassette_dir, f"{module_name}.{request.node.name}.jsonl.gz")
+    mode = os.environ.get("GITHUB_CASSETTE_MODE", "replay")
+    if mode != "record" and not os.path.isfile(path):
+        message = (
+            f"no cassette {os.path.relpath(path, repo_root)}; record it with "
+            "GITHUB_CASSETTE_MODE=record pytest (needs network access and a token)"
+        )
+        if os.environ.get("CI"):
+            pytest.fail(message)
+        pytest.skip(message)
+
+    # an in-memory discussion memo, so every run sends the same requests
+    settings = config.configure(cassette=path, cassette_mode=mode, cache_dir="")
+    yield settings
+    transport.save_cassette()
+
+
+def make_pull_request(number: int, created: str, updated: str, merged: str = None):
+    """PR record for tests of the report pipeline; odd numbers are ambv's, even
+    ones zooba's, and merged PRs were merged by ambv"""
+    merged_at = None if merged is None else datetime.datetime.fromisoformat(merged)
+    return PullRequestRecord(
+        number=number,
+        title=f"PR {number}",
+        html_url=f"https://github.com/python/cpython/pull/{number}",
+        state="open" if merged is None else "closed",
+        created_at=datetime.datetime.fromisoformat(created),
+        updated_at=datetime.datetime.fromisoformat(updated),
+        closed_at=merged_at,
+        merged_at=merged_at,
+        merged=merged is not None,
+        merged_by=None if merged is None else UserRef("ambv"),
+        user=UserRef("ambv" if number % 2 else "zooba"),
+        comments=2,
+        base=BranchRef("main"),
+        discussion_authors={"ambv"},
+    )
@@ -0,0 +1,69 @@
+"""
+test single-pass developer activity matcher against the per-developer regexes
+it replaces; no GitHub access needed
+"""
+
+import re
+
+from activity_matcher import ActivityMatcher
+from activity_matcher import activity_phrases
+from activity_matcher import trie_pattern
+
+sample_page = (
+    '<a class="author" href="/ambv">ambv</a> approved these changes '
+    "<span>zooba</span> left a comment "
+    "pablogsal merged commit 1a2b3c into python:main "
+    "miss-islington and vstinner commented on 16 Nov "
+    "gvanrossum one two three four closed this"
+)
+
+
+def per_developer_search(developer_ids, text):
+    """the original 2 x D x 4 scans, kept as the reference result"""
+    found = set()
+    for developer in developer_ids:
+        for phrase in activity_phrases:
+            if f"{developer} {phrase}" in text:
+                found.add(developer)
+            regex = rf"\b({developer})\W+(?:\w+\W+){{0,3}}?({phrase})\b"
+            if re.search(regex, text):
+                found.add(developer)
+    return found
+
+
+def test_trie_pattern_matches_exactly_the_words():
+    words = ["ambv", "ambvx", "a.b", "zooba", "zoo"]
+    pattern = re.compile(rf"(?:{trie_pattern(words)})\Z")
+
+    assert all(pattern.match(word) for word in words)
+    assert not pattern.match("axb")  # ids are escaped, "." is literal
+    assert not pattern.match("amb")
+
+
+def test_finds_every_developer_in_one_pass():
+    developer_ids = ["ambv", "zooba", "pablogsal", "miss-islington", "vstinner"]
+
+    found = ActivityMatcher(developer_ids).find(sample_page)
+
+    # both ids before "commented" are found, the match only consumes the id
+    assert found == {
+        "ambv": {"approved these changes"},
+        "zooba": {"left a comment"},
+        "miss-islington": {"commented"},
+        "vstinner": {"commented"},
+    }
+    assert set(found) == per_developer_search(developer_ids, sample_page)
+
+
+def test_phrase_must_follow_within_three_words():
+    assert ActivityMatcher(["gvanrossum"]).find(sample_page) == {}
+
+
+def test_many_developers_match_like_separate_searches():
+    developer_ids = [f"dev{number}" for number in range(60)] + ["ambv", "zooba"]
+    page = sample_page + " dev7 commented, dev42 left a comment, dev4 approved x"
+
+    found = ActivityMatcher(developer_ids).find(page)
+
+    assert set(found) == per_developer_search(developer_ids, page)
+    assert set(found) == {"ambv", "zooba", "dev7", "dev42"}
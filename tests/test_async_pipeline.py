@@ -0,0 +1,195 @@
+"""
+test asyncio pipeline against canned REST payloads and the local fake_github
+server - no GitHub access needed
+"""
+import asyncio
+import datetime
+import threading
+import time
+
+import async_pipeline
+import config
+import fake_github
+import main
+import pr_discussion
+from pr_records import PullRequestRecord
+from weekly_pr_summary import get_final_summary
+
+api = "https://api.github.com/repos/python/cpython"
+
+
+def make_pull_payload(number, updated_at):
+    """REST PR payload, merged by ambv on 16 Nov"""
+    return {
+        "number": number,
+        "url": f"{api}/pulls/{number}",
+        "html_url": f"https://github.com/python/cpython/pull/{number}",
+        "review_comments_url": f"{api}/pulls/{number}/comments",
+        "title": f"bpo-{number}: fix something",
+        "state": "closed",
+        "created_at": "2021-11-15T09:00:00Z",
+        "updated_at": updated_at,
+        "closed_at": "2021-11-16T10:00:00Z",
+        "merged_at": "2021-11-16T10:00:00Z",
+        "merged": True,
+        "merged_by": {"login": "ambv"},
+        "user": {"login": "vstinner"},
+        "comments": 0,
+        "base": {"ref": "main"},
+    }
+
+
+# 5 listing pages of 2 PRs each, one PR per day going back from 20 Nov
+pull_payloads = [
+    make_pull_payload(29700 - day, f"2021-11-{20 - day:02d}T12:00:00Z")
+    for day in range(10)
+]
+
+
+class FakeResponse:
+    """the parts of requests.Response the pipeline uses"""
+
+    def __init__(self, payload, links=None):
+        self.payload = payload
+        self.links = links or {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeGitHub:
+    """answers listing, detail and issue requests; records concurrency"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, client, url, params):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.urls.append((url, (params or {}).get("page")))
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+
+        if url.endswith("/pulls"):
+            page = params["page"]
+            return FakeResponse(
+                pull_payloads[(page - 1) * 2 : page * 2],
+                {"last": {"url": f"{api}/pulls?page=5"}},
+            )
+        if url.endswith("/issues"):
+            return FakeResponse([])
+        number = int(url.rsplit("/", 1)[1])
+        return FakeResponse(
+            next(payload for payload in pull_payloads if payload["number"] == number)
+        )
+
+
+def test_async_report_matches_sync_classification(monkeypatch):
+    """same report items as the sync functions, with bounded concurrency"""
+    canned_github = FakeGitHub()
+    monkeypatch.setattr(
+        async_pipeline.AsyncGitHub,
+        "_get",
+        lambda client, url, params: canned_github.get(client, url, params),
+    )
+    monkeypatch.setattr(async_pipeline, "get_discussion_events", lambda number: [])
+    monkeypatch.setattr("weekly_pr_summary.get_discussion_events", lambda number: [])
+
+    settings = config.Settings(
+        developer_ids=["ambv"],
+        start_date=datetime.datetime(2021, 11, 15),
+        end_date=datetime.datetime(2021, 11, 17),
+        end_date_buffer=0,
+        concurrency=2,
+        cache_dir="",
+    )
+    monkeypatch.setattr(config, "settings", settings)
+    report_items = async_pipeline.run_async_report(settings)
+
+    # details only for PRs updated 15-16 Nov; listing waves stop after 14 Nov
+    listed_pages = [page for url, page in canned_github.urls if url.endswith("/pulls")]
+    assert listed_pages == [1, 2, 3, 4, 5]
+    detail_numbers = sorted(
+        int(url.rsplit("/", 1)[1])
+        for url, page in canned_github.urls
+        if "/pulls/" in url
+    )
+    assert detail_numbers == [29695, 29696]
+    assert canned_github.max_in_flight <= 2
+
+    expected_records = [
+        PullRequestRecord.from_rest_payload(payload) for payload in pull_payloads[:7]
+    ]
+    assert report_items == get_final_summary(
+        expected_records, ["ambv"], settings.start_date, settings.end_date
+    )
+    assert {item[4].split(">")[1] for item in report_items} == {
+        "merged GH-29695</a",
+        "merged GH-29696</a",
+    }
+
+
+def test_async_issue_closers_come_from_the_issue_events(monkeypatch, tmp_path):
+    """closers are looked up only for issues created in the window, in the
+    issue events, so the issue side costs a few pages; reports match a plain run"""
+    repo = fake_github.generate_repo("fake/cpython", pull_requests=1500, seed=11)
+    reports = []
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        for extra in ([], ["--async"]):
+            monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+            output = tmp_path / f"report{len(reports)}.txt"
+            main.main(
+                [
+                    "--repo",
+                    "fake/cpython",
+                    "--developers",
+                    "ambv",
+                    "zooba",
+                    "--start-date",
+                    "2021-11-15",
+                    "--end-date",
+                    "2021-11-21",
+                    "--base-url",
+                    server.base_url,
+                    "--cache-dir",
+                    "",
+                    "--max-request-rate",
+                    "1000",
+                    "--output",
+                    str(output),
+                    *extra,
+                ]
+            )
+            reports.append(output.read_text())
+
+        requests_before = server.requests_served
+        issues = asyncio.run(
+            async_pipeline.fetch_issue_records(
+                async_pipeline.AsyncGitHub(4),
+                "fake/cpython",
+                datetime.datetime(2021, 11, 15),
+                datetime.datetime(2021, 11, 23),
+            )
+        )
+        requests_sent = server.requests_served - requests_before
+
+    assert reports[1] == reports[0]
+    closed_in_window = [
+        issue
+        for issue in issues
+        if issue.state == "closed"
+        and datetime.datetime(2021, 11, 15)
+        <= issue.created_at
+        <= datetime.datetime(2021, 11, 23)
+    ]
+    assert len(closed_in_window) > 50
+    for issue in closed_in_window:
+        item = repo.issues.get(issue.number) or repo.pull_requests[issue.number]
+        assert issue.closed_by.login == item.closed_by
+    # listing and events pages, not one GET per closed issue
+    assert requests_sent < 15
@@ -0,0 +1,117 @@
+"""
+test multi-week backfill against separate single-week runs
+no GitHub access needed
+"""
+
+import datetime
+
+import pytest
+
+import config
+from backfill import bucket_by_week
+from backfill import build_weekly_reports
+from backfill import iso_weeks
+from backfill import weekly_report_path
+from pr_records import IssueRecord
+from pr_records import UserRef
+from tests.conftest import make_pull_request
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import get_final_summary
+from weekly_pr_summary import sort_final_data
+
+pull_requests = [
+    make_pull_request(29703, "2021-11-29 09:00", "2021-11-30 10:00"),
+    make_pull_request(
+        29602, "2021-11-20 08:00", "2021-11-23 12:00", "2021-11-23 11:00"
+    ),
+    make_pull_request(29601, "2021-11-16 08:00", "2021-11-21 18:00"),
+    make_pull_request(
+        29510, "2021-11-08 08:00", "2021-11-10 10:00", "2021-11-10 09:00"
+    ),
+    make_pull_request(29400, "2021-10-01 08:00", "2021-11-01 10:00"),
+]
+
+issues = [
+    IssueRecord(
+        number=45800,
+        title="[3.10] crash in tokenizer",
+        url="https://api.github.com/repos/python/cpython/issues/45800",
+        state="closed",
+        user=UserRef("vstinner"),
+        closed_by=UserRef("ambv"),
+        created_at=datetime.datetime(2021, 11, 17, 9, 0),
+        updated_at=datetime.datetime(2021, 11, 18, 9, 0),
+        closed_at=datetime.datetime(2021, 11, 18, 9, 0),
+    ),
+]
+
+
+@pytest.fixture
+def backfill_settings(monkeypatch):
+    settings = config.Settings(
+        developer_ids=["ambv"], end_date_buffer=2, cache_dir="", github_token=None
+    )
+    monkeypatch.setattr(config, "settings", settings)
+    return settings
+
+
+def test_iso_weeks_cover_range_from_monday():
+    weeks = iso_weeks(datetime.datetime(2021, 11, 10), datetime.datetime(2021, 11, 22))
+
+    assert [week.label for week in weeks] == ["2021-W45", "2021-W46"]
+    assert weeks[0].start == datetime.datetime(2021, 11, 8)
+    assert weeks[-1].end == datetime.datetime(2021, 11, 22)
+
+
+def test_buffer_puts_items_in_the_previous_week_too():
+    weeks = iso_weeks(datetime.datetime(2021, 11, 8), datetime.datetime(2021, 12, 6))
+
+    buckets = bucket_by_week(
+        pull_requests,
+        weeks,
+        lambda pull_request: pull_request.updated_at,
+        2,
+        stop_before=weeks[0].start,
+    )
+
+    numbers = {
+        label: [pull_request.number for pull_request in bucket]
+        for label, bucket in buckets.items()
+    }
+    assert numbers == {
+        "2021-W45": [29510],
+        "2021-W46": [29602, 29601],
+        "2021-W47": [29703, 29602],
+        "2021-W48": [29703],
+    }
+
+
+def test_backfill_matches_separate_weekly_runs(backfill_settings):
+    """one scan gives the same reports as one run per week"""
+    weeks = iso_weeks(datetime.datetime(2021, 11, 8), datetime.datetime(2021, 12, 6))
+
+    reports = build_weekly_reports(pull_requests, issues, weeks, backfill_settings)
+
+    for week in weeks:
+        separate_run = get_final_summary(
+            pull_requests, ["ambv"], week.start, week.end
+        ) + get_final_issues(
+            [issue for issue in issues if issue.updated_at >= week.start],
+            ["ambv"],
+            week.start,
+            week.end,
+            2,
+        )
+        assert reports[week] == format_final_html_block(sort_final_data(separate_run))
+    assert any("merged GH-29602" in line for line in reports[weeks[2]])
+
+
+def test_weekly_report_path():
+    week = iso_weeks(datetime.datetime(2021, 11, 15), datetime.datetime(2021, 11, 22))[
+        0
+    ]
+
+    assert (
+        weekly_report_path("GitHub_summary.txt", week) == "GitHub_summary_2021-W46.txt"
+    )
@@ -0,0 +1,67 @@
+"""
+test the offline benchmark suite on small inputs, so it keeps working as the
+pipeline changes - no GitHub access needed
+"""
+
+import run_benchmarks
+
+
+def test_suite_measures_every_case_on_recorded_and_synthetic_inputs():
+    results = run_benchmarks.run_suite(sizes=[20, 40], repeat=1, min_seconds=0.001)
+
+    assert list(results) == [case.name for case in run_benchmarks.cases]
+    for name, case_results in results.items():
+        assert set(case_results) - {"recorded"} == {"20", "40"}
+        for measurement in case_results.values():
+            assert measurement["seconds"] >= 0
+            assert measurement["peak_bytes"] >= 0
+            assert measurement["calibration_seconds"] > 0
+    assert results["summarize_pr_info"]["recorded"]["items"] == 2
+    assert results["sort_final_data"]["40"]["items"] == 40
+    assert "40" in run_benchmarks.scaling_exponents(results["sort_final_data"])
+
+
+def test_slower_than_baseline_is_a_regression():
+    baseline = {"sort_final_data": {"1000": {"seconds": 1.0}}}
+    results = {
+        "sort_final_data": {"1000": {"seconds": 1.2}},
+        "filter_issues": {"1000": {"seconds": 9.0}},  # no baseline yet
+    }
+
+    assert run_benchmarks.compare_with_baseline(results, baseline, 0.25) == []
+    results["sort_final_data"]["1000"]["seconds"] = 1.3
+    assert run_benchmarks.compare_with_baseline(results, baseline, 0.25) == [
+        ("sort_final_data", "1000", 1.3, 1.0)
+    ]
+    # the calibration loop ran 10% slower in this run than in the baseline's:
+    # the machine is slower, not the code
+    baseline["sort_final_data"]["1000"]["calibration_seconds"] = 0.01
+    results["sort_final_data"]["1000"]["calibration_seconds"] = 0.011
+    assert run_benchmarks.compare_with_baseline(results, baseline, 0.25) == []
+
+
+def test_short_stages_are_timed_over_many_calls():
+    calls = []
+
+    seconds = run_benchmarks.time_per_call(calls.append, (None,), 0.01)
+
+    assert len(calls) > 100
+    assert seconds < 0.001
+
+
+def test_regressions_are_measured_again_before_they_count(monkeypatch):
+    retries = []
+
+    def fake_run_suite(sizes, repeat, names):
+        retries.append((sizes, names))
+        return {"sort_final_data": {"recorded": {"seconds": 0.5}}}
+
+    monkeypatch.setattr(run_benchmarks, "run_suite", fake_run_suite)
+    baseline = {"sort_final_data": {"recorded": {"seconds": 1.0}}}
+    results = {"sort_final_data": {"recorded": {"seconds": 2.0}}}
+    regressions = run_benchmarks.compare_with_baseline(results, baseline, 0.25)
+
+    run_benchmarks.remeasure(results, regressions, 3)
+
+    assert retries == [([], ["sort_final_data"])]
+    assert run_benchmarks.compare_with_baseline(results, baseline, 0.25) == []
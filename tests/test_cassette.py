@@ -0,0 +1,146 @@
+"""
+test recording GitHub traffic to a cassette and replaying it without network,
+using the local fake_github server as the recorded GitHub
+"""
+
+import gzip
+import json
+import time
+
+import pytest
+
+import cassette
+import config
+import fake_github
+import main
+import pr_discussion
+import transport
+
+full_name = "fake/cpython"
+
+
+@pytest.fixture(scope="module")
+def repo():
+    return fake_github.generate_repo(full_name, pull_requests=1500, seed=5)
+
+
+def report_arguments(base_url: str, cassette_path, output_path) -> list:
+    return [
+        "--repo",
+        full_name,
+        "--developers",
+        "ambv",
+        "zooba",
+        "vstinner",
+        "--start-date",
+        "2021-11-15",
+        "--end-date",
+        "2021-11-21",
+        "--base-url",
+        base_url,
+        "--cache-dir",
+        "",
+        "--max-request-rate",
+        "1000",
+        "--cassette",
+        str(cassette_path),
+        "--output",
+        str(output_path),
+    ]
+
+
+def test_replayed_report_matches_recorded_one_without_network(
+    repo, tmp_path, monkeypatch
+):
+    cassette_path = tmp_path / "report.jsonl.gz"
+
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        main.main(
+            report_arguments(server.base_url, cassette_path, tmp_path / "recorded.txt")
+        )
+        requests_served = server.requests_served
+    recorded = transport.active_cassette()
+
+    # the server is gone; every response now comes from the cassette
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    main.main(report_arguments(server.base_url, cassette_path, tmp_path / "replay.txt"))
+    replayed = transport.active_cassette()
+
+    assert recorded.statistics["recorded"] == requests_served
+    assert replayed.replaying
+    assert replayed.statistics["replayed"] > 0
+    assert replayed.statistics["missing"] == 0
+    assert transport.scheduler_statistics()["waited_seconds"] == 0
+    assert (tmp_path / "replay.txt").read_text() == (
+        tmp_path / "recorded.txt"
+    ).read_text()
+    # compressed, and the token is never stored
+    with gzip.open(cassette_path, "rt", encoding="utf-8") as reader:
+        lines = reader.read().splitlines()
+    assert json.loads(lines[0])["version"] == cassette.cassette_format_version
+    assert not any("Authorization" in line for line in lines)
+
+
+def test_missing_interaction_names_request_and_closest_recordings(tmp_path):
+    path = str(tmp_path / "small.jsonl.gz")
+    with fake_github.FakeGitHub([fake_github.generate_repo(full_name, 50)]) as server:
+        settings = config.Settings(
+            base_url=server.base_url, cache_dir="", cassette=path
+        )
+        settings.http_session.get(f"{server.base_url}/repos/{full_name}/pulls/3")
+        settings.http_session.adapters["https://"].cassette.save()
+
+    replay = config.Settings(cache_dir="", cassette=path, cassette_mode="replay")
+    replay.http_session.get(f"{server.base_url}/repos/{full_name}/pulls/3")
+    with pytest.raises(cassette.CassetteMiss) as miss:
+        replay.http_session.get(f"{server.base_url}/repos/{full_name}/pulls/4")
+
+    message = str(miss.value)
+    assert f"GET {server.base_url}/repos/{full_name}/pulls/4 is not in cassette" in (
+        message
+    )
+    assert f"closest recorded: GET {server.base_url}/repos/{full_name}/pulls/3" in (
+        message
+    )
+    assert "--cassette-mode record" in message
+
+
+def test_replay_mode_needs_an_existing_cassette(tmp_path):
+    with pytest.raises(FileNotFoundError, match="record it first"):
+        cassette.Cassette(str(tmp_path / "missing.jsonl.gz"), "replay")
+
+
+def test_interaction_key_ignores_query_order_but_not_body():
+    url = "https://api.github.com/repos/python/cpython/pulls"
+    assert cassette.interaction_key(
+        "GET", f"{url}?state=all&page=2", None
+    ) == cassette.interaction_key("GET", f"{url}?page=2&state=all", None)
+    assert cassette.interaction_key(
+        "POST", "https://api.github.com/graphql", b'{"query": "a"}'
+    ) != cassette.interaction_key(
+        "POST", "https://api.github.com/graphql", b'{"query": "b"}'
+    )
+
+
+def test_recorded_rate_limits_replay_without_waiting(tmp_path):
+    path = tmp_path / "limited.jsonl.gz"
+    url = "https://api.github.com/repos/python/cpython/pulls/29601"
+    key = cassette.interaction_key("GET", url, None)
+    recordings = [
+        {"status": 403, "headers": {"Retry-After": "60"}, "text": "rate limit"},
+        {"status": 200, "headers": {"ETag": '"a"'}, "text": '{"number": 29601}'},
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as writer:
+        writer.write(json.dumps({"version": cassette.cassette_format_version}) + "\n")
+        for recording in recordings:
+            writer.write(
+                json.dumps({"key": key, "url": url, "reason": "", **recording}) + "\n"
+            )
+
+    settings = config.Settings(cache_dir="", cassette=str(path))
+    started = time.perf_counter()
+    response = settings.http_session.get(url)
+
+    assert response.json() == {"number": 29601}
+    assert time.perf_counter() - started < 1
+    assert settings.http_session.scheduler.snapshot()["retries"] == 1
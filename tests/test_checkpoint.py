@@ -0,0 +1,126 @@
+"""
+test checkpointing a report run and resuming it after a failure, against the
+local fake_github server
+"""
+
+import datetime
+import json
+
+import pytest
+import requests
+
+import checkpoint
+import config
+import fake_github
+import main
+import pr_discussion
+import weekly_pr_summary
+
+full_name = "fake/cpython"
+
+
+@pytest.fixture(scope="module")
+def server():
+    repo = fake_github.generate_repo(full_name, pull_requests=3000, seed=11)
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as fake_server:
+        yield fake_server
+
+
+def report_arguments(base_url: str, output_path, *extra) -> list:
+    return [
+        "--repo",
+        full_name,
+        "--developers",
+        "ambv",
+        "zooba",
+        "vstinner",
+        "--start-date",
+        "2021-11-01",
+        "--end-date",
+        "2021-11-21",
+        "--base-url",
+        base_url,
+        "--cache-dir",
+        "",
+        "--max-request-rate",
+        "1000",
+        "--output",
+        str(output_path),
+        *extra,
+    ]
+
+
+def test_resumed_run_matches_uninterrupted_run(server, tmp_path, monkeypatch):
+    requests_before = server.requests_served
+    main.main(report_arguments(server.base_url, tmp_path / "full.txt"))
+    full_requests = server.requests_served - requests_before
+    assert not (tmp_path / "full.txt.checkpoint.json").exists()
+
+    # the network drops while classifying the 6th PR in the window
+    classify_pull_request = weekly_pr_summary.classify_pull_request
+    calls = []
+
+    def failing_classify(*args, **kwargs):
+        calls.append(args[0].number)
+        if len(calls) == 6:
+            raise requests.exceptions.ConnectionError("connection reset")
+        return classify_pull_request(*args, **kwargs)
+
+    output_path = tmp_path / "resumed.txt"
+    monkeypatch.setattr(weekly_pr_summary, "classify_pull_request", failing_classify)
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    requests_before = server.requests_served
+    with pytest.raises(requests.exceptions.ConnectionError):
+        main.main(report_arguments(server.base_url, output_path))
+    failed_requests = server.requests_served - requests_before
+    saved = json.loads((tmp_path / "resumed.txt.checkpoint.json").read_text())
+    assert saved["issues"]["done"]
+    assert not saved["pull_requests"]["done"]
+    assert calls[4] in saved["pull_requests"]["numbers_at_last"]
+
+    monkeypatch.setattr(
+        weekly_pr_summary, "classify_pull_request", classify_pull_request
+    )
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    requests_before = server.requests_served
+    main.main(report_arguments(server.base_url, output_path, "--resume"))
+    resume_requests = server.requests_served - requests_before
+
+    assert output_path.read_text() == (tmp_path / "full.txt").read_text()
+    assert not (tmp_path / "resumed.txt.checkpoint.json").exists()
+    # issues are not read again, nor are the PRs handled before the failure;
+    # only the pages around the resume point are
+    assert failed_requests + resume_requests < full_requests + 10
+
+
+def test_checkpoint_of_another_run_is_not_resumed(tmp_path):
+    path = str(tmp_path / "report.checkpoint.json")
+    settings = config.Settings(developer_ids=["ambv"])
+    checkpoint.Checkpoint(path, checkpoint.run_key(settings)).save()
+
+    other_run = checkpoint.run_key(config.Settings(developer_ids=["zooba"]))
+    with pytest.raises(ValueError, match="another run"):
+        checkpoint.Checkpoint(path, other_run, resume=True)
+
+
+def test_listing_progress_skips_processed_items():
+    class Item:
+        def __init__(self, number, updated_at):
+            self.number = number
+            self.updated_at = updated_at
+
+    def day(number):
+        return datetime.datetime(2021, 11, number)
+
+    items = [Item(5, day(9)), Item(4, day(8)), Item(3, day(8)), Item(2, day(7))]
+    progress = checkpoint.ListingProgress("updated_at")
+    tracked = progress.track(items, day(1), day(10))
+    assert [next(tracked).number, next(tracked).number] == [5, 4]
+    # item 4 is not finished until the next item is asked for
+    assert progress.to_json()["numbers_at_last"] == [5]
+
+    next(tracked)
+    resumed = checkpoint.ListingProgress("updated_at")
+    resumed.load(progress.to_json())
+    remaining = resumed.track(items, day(1), day(10))
+    assert [item.number for item in remaining] == [3, 2]
@@ -0,0 +1,77 @@
+"""
+test lazy configuration and command line parsing - no GitHub access needed
+"""
+import concurrent.futures
+import datetime
+import time
+
+import checkpoint
+import config
+from main import parse_args
+
+
+def test_import_does_not_build_github_client():
+    """importing config must not create a client or touch the network"""
+    assert "github_host" not in vars(config.Settings())
+
+
+def test_lazy_repo_makes_no_request():
+    """repo and paginated lists are built without fetching anything"""
+    settings = config.Settings(
+        target_repo="python/devguide", github_token=None, cache_dir=""
+    )
+    pull_requests = settings.pull_requests_all
+
+    assert settings.repo.url == "/repos/python/devguide"
+    assert pull_requests is settings.pull_requests_all
+
+
+def test_checkpoint_is_built_once_by_concurrent_workers(monkeypatch, tmp_path):
+    """the PR and issue workers read report_checkpoint first at the same time"""
+    built = []
+
+    class SlowCheckpoint:
+        def __init__(self, *args):
+            time.sleep(0.05)
+            built.append(self)
+
+    monkeypatch.setattr(checkpoint, "Checkpoint", SlowCheckpoint)
+    settings = config.Settings(
+        cache_dir="", checkpoint=str(tmp_path / "report.checkpoint.json")
+    )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        checkpoints = list(executor.map(lambda _: settings.report_checkpoint, range(4)))
+
+    assert len(built) == 1
+    assert all(active is built[0] for active in checkpoints)
+
+
+def test_parse_args_overrides_config_defaults():
+    """command line options replace config.py values, others keep defaults"""
+    original_settings = config.settings
+    try:
+        parse_args(
+            [
+                "--repo",
+                "python/peps",
+                "--developers",
+                "ambv",
+                "zooba",
+                "--start-date",
+                "2021-11-15",
+                "--end-date",
+                "2021-11-21",
+                "--workers",
+                "4",
+            ]
+        )
+        settings = config.settings
+        assert settings.target_repo == "python/peps"
+        assert settings.developer_ids == ["ambv", "zooba"]
+        assert settings.start_date == datetime.datetime(2021, 11, 15)
+        # end date covers all 24 hours of the last day
+        assert settings.end_date == datetime.datetime(2021, 11, 22)
+        assert settings.workers == 4
+        assert settings.end_date_buffer == config.end_date_buffer
+    finally:
+        config.settings = original_settings
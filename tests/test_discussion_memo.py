@@ -0,0 +1,95 @@
+"""
+test memoized PR discussion analysis
+no GitHub access needed
+"""
+
+import concurrent.futures
+import datetime
+
+import config
+import pr_discussion
+from discussion_memo import DiscussionMemo
+from discussion_memo import discussion_key
+from pr_records import PullRequestRecord
+from weekly_pr_summary import check_developer_wrote_comments
+from weekly_pr_summary import discussion_known
+
+updated_at = datetime.datetime(2021, 11, 16, 9, 0)
+
+
+def make_record(updated: datetime.datetime = updated_at) -> PullRequestRecord:
+    return PullRequestRecord(number=29601, updated_at=updated)
+
+
+def test_unchanged_pr_is_analyzed_once():
+    """same number and updated_at hits the memo; a newer updated_at misses"""
+    memo = DiscussionMemo()
+    analyses = []
+
+    def analyze():
+        analyses.append(1)
+        return {"ambv"}
+
+    key = discussion_key("python/cpython", make_record(), "api", ["ambv"])
+    assert memo.get_or_analyze(key, analyze) == {"ambv"}
+    assert memo.get_or_analyze(key, analyze) == {"ambv"}
+
+    newer = make_record(updated_at + datetime.timedelta(minutes=1))
+    memo.get_or_analyze(
+        discussion_key("python/cpython", newer, "api", ["ambv"]), analyze
+    )
+
+    assert len(analyses) == 2
+    assert memo.statistics == {"hits": 1, "misses": 2}
+
+
+def test_concurrent_callers_share_one_analysis():
+    memo = DiscussionMemo()
+    analyses = []
+    key = discussion_key("python/cpython", make_record(), "api", ["ambv"])
+
+    def analyze():
+        analyses.append(1)
+        return set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: memo.get_or_analyze(key, analyze), range(16)))
+
+    assert len(analyses) == 1
+
+
+def test_results_persist_across_runs(tmp_path):
+    path = str(tmp_path / "discussion_memo.sqlite3")
+    key = discussion_key("python/cpython", make_record(), "html", ["ambv", "zooba"])
+    DiscussionMemo(path).get_or_analyze(key, lambda: {"zooba"})
+
+    next_run = DiscussionMemo(path)
+
+    assert key in next_run
+    assert next_run.get_or_analyze(key, lambda: set()) == {"zooba"}
+    assert next_run.statistics == {"hits": 1, "misses": 0}
+
+
+def test_check_developer_wrote_comments_uses_memo(monkeypatch):
+    """a second check of an unchanged PR downloads and analyzes nothing"""
+    fetched = []
+
+    def fake_fetch_discussion_events(pr_number):
+        fetched.append(pr_number)
+        return [pr_discussion.DiscussionEvent("ambv", "approved", updated_at)]
+
+    monkeypatch.setattr(config, "settings", config.Settings(cache_dir=""))
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    monkeypatch.setattr(
+        pr_discussion, "fetch_discussion_events", fake_fetch_discussion_events
+    )
+
+    assert not discussion_known(make_record(), ["ambv"])
+    assert check_developer_wrote_comments(make_record(), ["ambv"]) is True
+    # clear the per-run timeline cache: only the memo can answer now
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    assert check_developer_wrote_comments(make_record(), ["ambv"]) is True
+
+    assert discussion_known(make_record(), ["ambv"])
+    assert fetched == [29601]
+    assert config.settings.discussion_memo.statistics == {"hits": 1, "misses": 1}
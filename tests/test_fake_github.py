@@ -0,0 +1,123 @@
+"""
+test the local GitHub stand-in: generated repos, listings, rate limits, and a
+full report run against it
+no GitHub access needed
+"""
+
+import collections
+import datetime
+
+import pytest
+import requests
+
+import fake_github
+import main
+
+full_name = "fake/cpython"
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+
+
+@pytest.fixture(scope="module")
+def repo():
+    return fake_github.generate_repo(full_name, pull_requests=3000, seed=3)
+
+
+@pytest.fixture
+def server(repo):
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as running:
+        yield running
+
+
+def test_generated_repo_is_reproducible_and_cpython_like(repo):
+    again = fake_github.generate_repo(full_name, pull_requests=3000, seed=3)
+    pull_requests = list(repo.pull_requests.values())
+
+    assert [pr.title for pr in pull_requests] == [
+        pr.title for pr in again.pull_requests.values()
+    ]
+    assert len(pull_requests) == 3000
+    assert len(repo.issues) == 750
+    # PRs and issues share one number sequence, in creation order
+    numbers = sorted(list(repo.pull_requests) + list(repo.issues))
+    assert numbers == list(range(1, 3751))
+    assert all(pr.created_at <= pr.updated_at for pr in pull_requests)
+    weekdays = collections.Counter(pr.created_at.weekday() < 5 for pr in pull_requests)
+    assert weekdays[True] / 5 > 1.5 * weekdays[False] / 2
+    backports = [pr for pr in pull_requests if pr.author == "miss-islington"]
+    assert backports and all(pr.base != "main" for pr in backports)
+    original = repo.pull_requests[int(backports[0].title.split("(GH-")[1][:-1])]
+    assert backports[0].title.startswith(f"[{backports[0].base}] {original.title}")
+
+
+def test_listing_pages_rate_limit_headers_and_etags(server, repo):
+    url = f"{server.base_url}/repos/{full_name}/pulls"
+    params = {"state": "all", "sort": "updated", "direction": "desc", "per_page": 5}
+
+    first = requests.get(url, params=params)
+    second = requests.get(first.links["next"]["url"])
+    revalidated = requests.get(
+        url, params, headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    newest = sorted(
+        repo.pull_requests.values(), key=lambda pr: (pr.updated_at, pr.number)
+    )[::-1]
+    assert [item["number"] for item in first.json() + second.json()] == [
+        pr.number for pr in newest[:10]
+    ]
+    assert first.links["last"]["url"].endswith("page=600")
+    assert int(first.headers["X-RateLimit-Remaining"]) == 99999
+    assert int(second.headers["X-RateLimit-Remaining"]) == 99998
+    # revalidations answered 304 cost nothing, as on GitHub
+    assert revalidated.status_code == 304
+    assert int(revalidated.headers["X-RateLimit-Remaining"]) == 99998
+
+
+def test_exhausted_rate_limit_answers_403(repo):
+    with fake_github.FakeGitHub([repo], rate_limit=2) as server:
+        url = f"{server.base_url}/repos/{full_name}/issues/1"
+        statuses = [requests.get(url).status_code for _ in range(3)]
+        remaining = requests.get(f"{server.base_url}/rate_limit").json()["rate"]
+
+    assert statuses == [200, 200, 403]
+    assert remaining["remaining"] == 0
+
+
+@pytest.mark.parametrize("retrieval", ["list", "search"])
+def test_report_against_fake_server(server, repo, retrieval, tmp_path):
+    output = tmp_path / "report.txt"
+    merges = collections.defaultdict(list)
+    for pr in repo.pull_requests.values():
+        if pr.merged_by and start_date <= pr.merged_at < end_date:
+            merges[pr.merged_by].append(pr.number)
+    developer = max(fake_github.core_developers, key=lambda login: len(merges[login]))
+
+    main.main(
+        [
+            "--repo",
+            full_name,
+            "--developers",
+            developer,
+            "--start-date",
+            "2021-11-15",
+            "--end-date",
+            "2021-11-21",
+            "--retrieval",
+            retrieval,
+            "--base-url",
+            server.base_url,
+            "--cache-dir",
+            "",
+            "--max-request-rate",
+            "1000",
+            "--output",
+            str(output),
+        ]
+    )
+
+    report = output.read_text(encoding="utf-8")
+    assert merges[developer]
+    for number in merges[developer]:
+        assert f"merged GH-{number}</a>" in report
+    assert server.requests_served > 0
@@ -0,0 +1,151 @@
+"""
+test GraphQL batch fetching with canned responses - no GitHub access needed
+"""
+import datetime
+
+import github_graphql
+from weekly_pr_summary import check_developer_wrote_comments
+from weekly_pr_summary import filter_prs_from_date_range
+
+
+def make_pull_request_node(number, updated_at, **overrides):
+    """GraphQL PullRequest node for a PR merged by ambv"""
+    node = {
+        "number": number,
+        "title": f"bpo-{number}: fix something",
+        "url": f"https://github.com/python/cpython/pull/{number}",
+        "state": "MERGED",
+        "createdAt": "2021-11-15T09:00:00Z",
+        "updatedAt": updated_at,
+        "closedAt": "2021-11-16T10:00:00Z",
+        "mergedAt": "2021-11-16T10:00:00Z",
+        "merged": True,
+        "mergedBy": {"login": "ambv"},
+        "author": {"login": "vstinner"},
+        "baseRefName": "main",
+        "comments": {"totalCount": 1, "nodes": [{"author": {"login": "zooba"}}]},
+        "reviews": {
+            "nodes": [
+                {
+                    "author": {"login": "ambv"},
+                    "state": "APPROVED",
+                    "submittedAt": "2021-11-16T09:00:00Z",
+                }
+            ]
+        },
+        "timelineItems": {"nodes": [{"actor": {"login": "ambv"}}]},
+    }
+    node.update(overrides)
+    return node
+
+
+def test_record_from_graphql_node():
+    """record exposes the PyGithub attributes used for classification"""
+    record = github_graphql.PullRequestRecord.from_graphql_node(
+        make_pull_request_node(29537, "2021-11-16T10:00:01Z"), "python/cpython"
+    )
+
+    assert record.state == "closed"
+    assert record.merged is True
+    assert record.merged_by.login == "ambv"
+    assert record.user.login == "vstinner"
+    assert record.base.ref == "main"
+    assert record.comments == 1
+    assert record.merged_at == datetime.datetime(2021, 11, 16, 10, 0, 0)
+    assert record.discussion_authors == {"ambv", "zooba"}
+    assert check_developer_wrote_comments(record, ["ambv"]) is True
+    assert check_developer_wrote_comments(record, ["gvanrossum"]) is False
+
+
+def test_truncated_discussion_is_left_to_the_timeline():
+    """a PR with more comments than fetched has no prefetched discussion"""
+    comments = {
+        "totalCount": github_graphql.discussion_page_size + 1,
+        "nodes": [{"author": {"login": "zooba"}}] * github_graphql.discussion_page_size,
+    }
+    record = github_graphql.PullRequestRecord.from_graphql_node(
+        make_pull_request_node(29537, "2021-11-16T10:00:01Z", comments=comments),
+        "python/cpython",
+    )
+
+    assert record.discussion_authors is None
+
+
+def test_iteration_pages_until_older_than_start(monkeypatch):
+    """paging stops after the first PR updated before the report window"""
+    pages = [
+        {
+            "repository": {
+                "pullRequests": {
+                    "pageInfo": {"hasNextPage": True, "endCursor": "cursor1"},
+                    "nodes": [
+                        make_pull_request_node(29601, "2021-11-17T10:00:00Z"),
+                        make_pull_request_node(29537, "2021-11-16T10:00:01Z"),
+                    ],
+                }
+            }
+        },
+        {
+            "repository": {
+                "pullRequests": {
+                    "pageInfo": {"hasNextPage": True, "endCursor": "cursor2"},
+                    "nodes": [
+                        make_pull_request_node(29440, "2021-11-10T10:00:00Z"),
+                        make_pull_request_node(29000, "2021-11-09T10:00:00Z"),
+                    ],
+                }
+            }
+        },
+    ]
+    cursors = []
+
+    def fake_run_graphql_query(query, variables):
+        cursors.append(variables["cursor"])
+        return pages[len(cursors) - 1]
+
+    monkeypatch.setattr(github_graphql, "run_graphql_query", fake_run_graphql_query)
+
+    records = list(
+        github_graphql.iter_pull_requests_by_update(
+            "python/cpython", datetime.datetime(2021, 11, 15)
+        )
+    )
+
+    assert [record.number for record in records] == [29601, 29537, 29440]
+    assert cursors == [None, "cursor1"]
+
+    prs_of_interest, prs_reviewed = filter_prs_from_date_range(
+        records,
+        ["ambv"],
+        datetime.datetime(2021, 11, 15),
+        datetime.datetime(2021, 11, 22),
+    )
+    assert {pr.number for pr in prs_of_interest} == {29601, 29537}
+    assert set(prs_reviewed) == {29601, 29537}
+
+
+def test_fetch_by_number_batches_100_per_request(monkeypatch):
+    """one request per 100 PR numbers, results keep input order"""
+    batches = []
+
+    def fake_run_graphql_query(query, variables):
+        numbers = [
+            int(line.split(":")[0].strip()[2:])
+            for line in query.splitlines()
+            if "pullRequest(number" in line
+        ]
+        batches.append(numbers)
+        return {
+            "repository": {
+                f"pr{number}": make_pull_request_node(number, "2021-11-16T10:00:01Z")
+                for number in numbers
+            }
+        }
+
+    monkeypatch.setattr(github_graphql, "run_graphql_query", fake_run_graphql_query)
+
+    pr_numbers = list(range(1000, 1250))
+    records = github_graphql.fetch_pull_requests_by_number("python/cpython", pr_numbers)
+
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert [record.number for record in records] == pr_numbers
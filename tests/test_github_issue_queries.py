@@ -5,12 +5,17 @@ weekly Developer In Residence Reports
 """
 import datetime
 
+import pytest
+
 from config import developer_ids
 from config import end_date_buffer
 from utilities import check_github_rate_limit
 from weekly_issues_summary import filter_issues
 from weekly_issues_summary import get_issues
 
+# recorded on the first run, replayed offline after; see conftest.github_cassette
+pytestmark = pytest.mark.usefixtures("github_cassette")
+
 
 def test_get_issues_from_15to21nov():
     """
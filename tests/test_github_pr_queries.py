@@ -12,11 +12,16 @@ between date ranges to pull less, but that is client-side responsibility
 
 import datetime
 
+import pytest
+
+import config
 from config import developer_ids
-from config import repo
 from weekly_pr_summary import filter_prs_from_date_range
 from utilities import check_github_rate_limit
 
+# recorded on the first run, replayed offline after; see conftest.github_cassette
+pytestmark = pytest.mark.usefixtures("github_cassette")
+
 
 def test_get_one_closed_pr29537():
     """
@@ -28,7 +33,7 @@ def test_get_one_closed_pr29537():
     start_date = datetime.datetime(2021, 11, 16, 00, 00, 00)
     end_date = datetime.datetime(2021, 11, 16, 23, 59, 59)
 
-    list_with_pull_report_29537 = [repo.get_pull(29537)]
+    list_with_pull_report_29537 = [config.settings.repo.get_pull(29537)]
 
     closed_pr_we_care_about, pull_requests_reviewed = filter_prs_from_date_range(
         list_with_pull_report_29537, developer_ids, start_date, end_date
@@ -47,7 +52,7 @@ def test_get_one_authored_pr28044():
     start_date = datetime.datetime(2021, 8, 30, 00, 00, 00)
     end_date = datetime.datetime(2021, 8, 30, 23, 59, 59)
 
-    list_with_pull_report = [repo.get_pull(28044)]
+    list_with_pull_report = [config.settings.repo.get_pull(28044)]
 
     authored_pr_we_care_about, pull_requests_reviewed = filter_prs_from_date_range(
         list_with_pull_report, developer_ids, start_date, end_date
@@ -66,7 +71,7 @@ def test_get_one_reviewed_pr28089():
     start_date = datetime.datetime(2021, 8, 31, 00, 00, 00)
     end_date = datetime.datetime(2021, 8, 31, 23, 59, 59)
 
-    list_with_pull_report = [repo.get_pull(28089)]
+    list_with_pull_report = [config.settings.repo.get_pull(28089)]
 
     authored_pr_we_care_about, pull_requests_reviewed = filter_prs_from_date_range(
         list_with_pull_report, developer_ids, start_date, end_date
@@ -85,7 +90,7 @@ def test_get_one_reviewed_pr29440():
     start_date = datetime.datetime(2021, 11, 15, 00, 00, 00)
     end_date = datetime.datetime(2021, 11, 21, 23, 59, 59)
 
-    list_with_pull_report = [repo.get_pull(29440)]
+    list_with_pull_report = [config.settings.repo.get_pull(29440)]
 
     authored_pr_we_care_about, pull_requests_reviewed = filter_prs_from_date_range(
         list_with_pull_report, developer_ids, start_date, end_date
@@ -111,7 +116,8 @@ def test_difficult_to_find_prs_on_16nov_search_by_list_of_pr():
     pull_requests_targeted = [
         pull_request
         for pull_request in [
-            repo.get_pull(target_pr_number) for target_pr_number in pr_we_expect_to_find
+            config.settings.repo.get_pull(target_pr_number)
+            for target_pr_number in pr_we_expect_to_find
         ]
     ]
 
@@ -162,7 +168,8 @@ def test_all_prs_on_16nov_search_by_list_of_pr():
     pull_requests_targeted = [
         pull_request
         for pull_request in [
-            repo.get_pull(target_pr_number) for target_pr_number in pr_we_expect_to_find
+            config.settings.repo.get_pull(target_pr_number)
+            for target_pr_number in pr_we_expect_to_find
         ]
     ]
 
@@ -6,13 +6,18 @@ limitations on pagination and caching with PyGitHub library
 import datetime
 import logging
 
+import pytest
+
+import config
 from config import developer_ids
-from config import pull_requests_all
 from weekly_pr_summary import filter_prs_from_date_range
 from utilities import check_github_rate_limit
 
 logging.basicConfig(encoding="utf-8", level=logging.DEBUG)
 
+# recorded on the first run, replayed offline after; see conftest.github_cassette
+pytestmark = pytest.mark.usefixtures("github_cassette")
+
 
 def test_most_prs_on_15to21nov_search_by_date():
     """
@@ -74,7 +79,7 @@ def test_most_prs_on_15to21nov_search_by_date():
 
     # pull results using our functions
     pr_we_care_about, _pull_requests_reviewed = filter_prs_from_date_range(
-        pull_requests_all, developer_ids, start_date, end_date
+        config.settings.pull_requests_all, developer_ids, start_date, end_date
     )
 
     # elements below useful for simplification & debugging
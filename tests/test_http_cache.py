@@ -0,0 +1,170 @@
+"""
+test conditional-request response cache against a local http server
+no GitHub access needed
+"""
+
+import http.server
+import json
+import threading
+
+import pytest
+from github import Github
+
+import config
+import fake_github
+import http_cache
+import transport
+from http_cache import ResponseCache
+
+
+class ConditionalHandler(http.server.BaseHTTPRequestHandler):
+    """serves a fixed PR payload with an ETag, and 304 when it still matches"""
+
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.send_header("X-RateLimit-Remaining", "4999")
+            self.end_headers()
+            return
+
+        number = int(self.path.rstrip("/").split("/")[-1])
+        body = json.dumps(
+            {"number": number, "title": f"PR {number}", "state": "open"}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """http server on a free local port, shut down after the test"""
+    ConditionalHandler.requests_seen = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ConditionalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_second_request_is_revalidated_and_served_from_cache(local_server, tmp_path):
+    """304 responses are answered with the stored body"""
+    session = transport.build_session(
+        config.Settings(cache_dir=str(tmp_path), cache_max_mb=1)
+    )
+    url = f"{local_server}/repos/python/cpython/pulls/29537"
+
+    first = session.get(url)
+    second = session.get(url)
+
+    assert first.from_cache is False
+    assert second.from_cache is True
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["X-RateLimit-Remaining"] == "4999"
+    assert ConditionalHandler.requests_seen == [
+        ("/repos/python/cpython/pulls/29537", None),
+        ("/repos/python/cpython/pulls/29537", '"v1"'),
+    ]
+
+
+def test_pygithub_requests_use_the_shared_cache(local_server, tmp_path):
+    """PyGithub objects are fetched through the caching session too"""
+    settings = config.Settings(cache_dir=str(tmp_path), cache_max_mb=1)
+    transport.install_pygithub_transport(settings.http_session)
+    try:
+        github_host = Github(base_url=local_server)
+        repo = github_host.get_repo("python/cpython", lazy=True)
+
+        assert repo.get_pull(29537).title == "PR 29537"
+        assert repo.get_pull(29537).title == "PR 29537"
+    finally:
+        from github.Requester import Requester
+
+        Requester.resetConnectionClasses()
+
+    adapter = settings.http_session.get_adapter("http://")
+    assert adapter.response_cache.stats["hits"] == 1
+    assert ConditionalHandler.requests_seen[-1][1] == '"v1"'
+
+
+def test_cache_evicts_least_recently_used(local_server, tmp_path):
+    """cache stays under its size limit"""
+    session = transport.build_session(
+        config.Settings(cache_dir=str(tmp_path), cache_max_mb=1)
+    )
+    response_cache = session.get_adapter("http://").response_cache
+    response_cache.max_bytes = 200
+
+    for number in range(10):
+        session.get(f"{local_server}/repos/python/cpython/pulls/{number}")
+
+    assert response_cache.total_bytes() <= 200
+    assert response_cache.stats["evictions"] > 0
+
+
+def test_cache_file_shared_between_instances(tmp_path):
+    """independent cache objects on one file see each other's entries"""
+    first_cache = ResponseCache(str(tmp_path), 1024 * 1024)
+    second_cache = ResponseCache(str(tmp_path), 1024 * 1024)
+
+    first_cache._connection().execute(
+        "INSERT INTO responses VALUES ('key', 'url', '\"e\"', NULL, '{}', x'00', 1, 0)"
+    )
+    results = []
+    thread = threading.Thread(target=lambda: results.append(second_cache.lookup("key")))
+    thread.start()
+    thread.join()
+
+    assert results[0]["etag"] == '"e"'
+
+
+def test_revalidated_responses_keep_the_connection_alive(tmp_path):
+    """304s are read to the end, so cache hits reuse the pooled connection"""
+    repo = fake_github.generate_repo("fake/cpython", pull_requests=20, seed=1)
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        session = transport.build_session(
+            config.Settings(cache_dir=str(tmp_path), cache_max_mb=1)
+        )
+        url = f"{server.base_url}/repos/fake/cpython/pulls/3"
+        responses = [session.get(url) for _ in range(6)]
+
+    assert [response.from_cache for response in responses] == [False] + [True] * 5
+    assert session.get_adapter("http://").statistics.snapshot() == {
+        "requests": 6,
+        "connections_opened": 1,
+        "reuse_rate": 0.833,
+    }
+
+
+def test_store_keeps_a_running_size_instead_of_scanning(
+    local_server, tmp_path, monkeypatch
+):
+    """the stored size is recounted once per size_recount_interval stores"""
+    session = transport.build_session(
+        config.Settings(cache_dir=str(tmp_path), cache_max_mb=1)
+    )
+    response_cache = session.get_adapter("http://").response_cache
+    scans = []
+    total_bytes = response_cache.total_bytes
+    monkeypatch.setattr(
+        response_cache, "total_bytes", lambda: scans.append(1) or total_bytes()
+    )
+    monkeypatch.setattr(http_cache, "size_recount_interval", 5)
+
+    for number in range(10):
+        session.get(f"{local_server}/repos/python/cpython/pulls/{number}")
+
+    assert len(scans) == 2
+    assert response_cache._size_estimate == total_bytes()
@@ -0,0 +1,104 @@
+"""
+test finding issue closers from the repository's issue events, against the local
+fake_github server
+"""
+
+import datetime
+
+import config
+import fake_github
+import issue_events
+import pr_records
+import weekly_issues_summary
+
+full_name = "fake/cpython"
+developers = ["ambv", "zooba", "vstinner"]
+window_start = datetime.datetime(2021, 11, 15)
+window_end = datetime.datetime(2021, 11, 21)
+
+
+def report_issues(listing) -> list:
+    return weekly_issues_summary.get_final_issues(
+        listing, developers, window_start, window_end, end_date_buffer=2
+    )
+
+
+def test_closers_from_events_match_fetching_each_issue():
+    repo = fake_github.generate_repo(full_name, pull_requests=1500, seed=5)
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        config.configure(
+            base_url=server.base_url,
+            cache_dir="",
+            max_request_rate=1000,
+            target_repo=full_name,
+        )
+        listing = weekly_issues_summary.issue_listing(full_name, window_start)
+        requests_before = server.requests_served
+        report = report_issues(listing)
+        requests = server.requests_served - requests_before
+        fetched_issues = pr_records.completion_statistics["issues"]
+
+        closed = [
+            issue
+            for issue in weekly_issues_summary.issue_listing(full_name, window_start)
+            if issue.state == "closed"
+            and window_start <= issue.created_at <= window_end
+        ]
+        # the same closers as reading closed_by from every closed issue
+        for issue in closed:
+            item = repo.issues.get(issue.number) or repo.pull_requests[issue.number]
+            assert issue.closed_by.login == item.closed_by
+
+    assert any(item[2] == "closed" for item in report)
+    # listing pages and a few events pages, not one GET per closed issue
+    assert len(closed) > 50
+    assert requests < len(closed) / 5
+    assert fetched_issues <= 2
+
+
+def event(name: str, number: int, actor: str, day: int) -> dict:
+    return {
+        "event": name,
+        "actor": {"login": actor},
+        "created_at": f"2021-11-{day:02d}T12:00:00Z",
+        "issue": {"number": number},
+    }
+
+
+def test_newest_close_wins_and_reopened_issues_are_unknown(monkeypatch):
+    pages = [
+        [event("closed", 1, "zooba", 20), event("labeled", 2, "ambv", 19)],
+        [event("reopened", 2, "ambv", 18), event("closed", 1, "ambv", 17)],
+        [event("closed", 2, "vstinner", 16), event("closed", 3, "ambv", 10)],
+    ]
+    requested = []
+
+    def fake_iter_json_pages(url, params=None):
+        requested.append(url)
+        yield from pages
+
+    monkeypatch.setattr(issue_events, "iter_json_pages", fake_iter_json_pages)
+    closers = issue_events.IssueClosers(full_name, datetime.datetime(2021, 11, 15))
+
+    close = closers.closer(1, datetime.datetime(2021, 11, 20, 12))
+    assert close == issue_events.Close("zooba", datetime.datetime(2021, 11, 20, 12))
+    assert closers.pages_read == 1
+    # closed before since: not read, the caller fetches the issue
+    assert closers.closer(3, datetime.datetime(2021, 11, 10, 12)) is None
+    assert closers.pages_read == 1
+    # reopened after vstinner closed it: the events can't say who closes it now
+    assert closers.closer(2, datetime.datetime(2021, 11, 16, 12)) is None
+    assert closers.pages_read == 3 and closers.exhausted
+    assert len(requested) == 1
+
+
+def test_events_never_cost_more_pages_than_lookups(monkeypatch):
+    pages = [[event("labeled", 1, "ambv", day)] for day in range(30, 15, -1)]
+    monkeypatch.setattr(
+        issue_events, "iter_json_pages", lambda url, params=None: iter(pages)
+    )
+    closers = issue_events.IssueClosers(full_name, datetime.datetime(2021, 11, 15))
+
+    assert closers.closer(1, datetime.datetime(2021, 11, 16, 12)) is None
+    assert closers.closer(1, datetime.datetime(2021, 11, 16, 12)) is None
+    assert closers.pages_read == closers.lookups == 2
@@ -3,11 +3,14 @@ test integrated PR and issues with short list of inputs for testing
 by testing hash values of actual vs expected results files, stored in ./tests
 """
 import logging
+import os
 
+import pytest
+
+import config
 from config import developer_ids
 from config import end_date
 from config import end_date_buffer
-from config import issues_all
 from config import start_date
 from utilities import check_github_rate_limit
 from utilities import hash_file
@@ -19,10 +22,14 @@ from weekly_pr_summary import sort_final_data
 
 logging.basicConfig(encoding="utf-8", level=logging.INFO)
 
+# replayed offline from tests/cassettes; see conftest.github_cassette
+pytestmark = pytest.mark.usefixtures("github_cassette")
+test_directory = os.path.dirname(os.path.abspath(__file__))
+
 
 def test_main():
     """ "test shadow copy of main routine with subset of data for end-to-end testing"""
-    pr_obj_shortlist, pr_reviewed = get_pr_objects_from_pr_numbers(
+    _, pr_obj_shortlist, pr_reviewed = get_pr_objects_from_pr_numbers(
         [29653, 29664, 13580, 28722], developer_ids, start_date, end_date
     )
 
@@ -31,7 +38,7 @@ def test_main():
     )
 
     issue_raw_results = get_final_issues(
-        issues_all, developer_ids, start_date, end_date, end_date_buffer
+        config.settings.issues_all, developer_ids, start_date, end_date, end_date_buffer
     )
 
     combined_results = pr_raw_results + issue_raw_results
@@ -40,14 +47,17 @@ def test_main():
 
     combined_results = format_final_html_block(combined_results)
 
-    with open("test_main_small_test_results.txt", "wb") as writer:
+    results_path = os.path.join(test_directory, "test_main_small_test_results.txt")
+    with open(results_path, "wb") as writer:
         for item in combined_results:
             writer.write(f"{item}\n".encode())
 
     check_github_rate_limit()
 
     # test hash values of actual vs expected results
-    actual_results = hash_file("test_main_small_test_results.txt")
-    expected_results = hash_file("test_main_small_expected_output.txt")
+    actual_results = hash_file(results_path)
+    expected_results = hash_file(
+        os.path.join(test_directory, "test_main_small_expected_output.txt")
+    )
 
     assert actual_results == expected_results
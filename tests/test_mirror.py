@@ -0,0 +1,179 @@
+"""
+test local SQLite mirror sync and reports from it - no GitHub access needed
+"""
+import datetime
+
+import config
+import issue_events
+import mirror
+from pr_records import BranchRef
+from pr_records import PullRequestRecord
+from pr_records import UserRef
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import get_final_summary
+
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+
+
+def make_pull_request(number, updated_at, merged_by="ambv"):
+    """merged PR record, as yielded by iter_pull_requests_by_update"""
+    return PullRequestRecord(
+        number=number,
+        title=f"bpo-{number}: fix something",
+        html_url=f"https://github.com/python/cpython/pull/{number}",
+        state="closed",
+        created_at=datetime.datetime(2021, 11, 15, 9),
+        updated_at=updated_at,
+        closed_at=datetime.datetime(2021, 11, 16, 10),
+        merged_at=datetime.datetime(2021, 11, 16, 10),
+        merged=True,
+        merged_by=UserRef(merged_by),
+        user=UserRef("vstinner"),
+        comments=0,
+        base=BranchRef("main"),
+        discussion_authors={"zooba"},
+    )
+
+
+def make_issue_payload(number, state, updated_at):
+    """REST issue list payload; list payloads don't include closed_by"""
+    return {
+        "number": number,
+        "title": f"bpo-{number}: an issue",
+        "url": f"https://api.github.com/repos/python/cpython/issues/{number}",
+        "html_url": f"https://github.com/python/cpython/issues/{number}",
+        "state": state,
+        "user": {"login": "ambv"},
+        "created_at": "2021-11-15T08:00:00Z",
+        "updated_at": updated_at,
+        "closed_at": "2021-11-16T12:00:00Z" if state == "closed" else None,
+    }
+
+
+def test_sync_is_incremental_and_reports_run_offline(monkeypatch, tmp_path):
+    """second sync starts at the watermark; reports need no GitHub calls"""
+    pr_sync_calls, issue_sync_calls, issue_detail_calls = [], [], []
+
+    def fake_iter_pull_requests_by_update(target_repo, since):
+        pr_sync_calls.append(since)
+        yield make_pull_request(29601, datetime.datetime(2021, 11, 17, 10))
+        yield make_pull_request(29537, datetime.datetime(2021, 11, 16, 11))
+
+    def fake_iter_json_pages(url, params):
+        issue_sync_calls.append(params["since"])
+        yield [
+            make_issue_payload(45831, "open", "2021-11-17T08:00:00Z"),
+            make_issue_payload(45826, "closed", "2021-11-16T12:00:00Z"),
+            make_issue_payload(45820, "closed", "2021-11-16T12:00:00Z"),
+        ]
+
+    def fake_get_json(url):
+        issue_detail_calls.append(url)
+        number = int(url.rsplit("/", 1)[1])
+        payload = make_issue_payload(number, "closed", "2021-11-16T12:00:00Z")
+        payload["closed_by"] = {"login": "ambv"}
+        return payload
+
+    monkeypatch.setattr(
+        mirror, "iter_pull_requests_by_update", fake_iter_pull_requests_by_update
+    )
+    monkeypatch.setattr(mirror, "iter_json_pages", fake_iter_json_pages)
+    monkeypatch.setattr(mirror, "get_json", fake_get_json)
+    # the events show one close; the other closed issue is fetched
+    events = [
+        {
+            "event": "closed",
+            "actor": {"login": "ambv"},
+            "created_at": "2021-11-16T12:00:00Z",
+            "issue": {"number": 45826},
+        }
+    ]
+    monkeypatch.setattr(
+        issue_events, "iter_json_pages", lambda url, params=None: iter([events])
+    )
+
+    settings = config.Settings(cache_dir=str(tmp_path), start_date=start_date)
+    assert mirror.sync_mirror(settings) == {"pull_requests": 2, "issues": 3}
+    mirror.sync_mirror(settings)
+
+    assert pr_sync_calls == [
+        start_date,
+        datetime.datetime(2021, 11, 17, 10) - mirror.sync_overlap,
+    ]
+    assert issue_sync_calls == ["2021-11-15T00:00:00Z", "2021-11-17T07:55:00Z"]
+    # only the close the events don't show is fetched, once: the closer of an
+    # unchanged close is reused from the mirror
+    assert issue_detail_calls == [
+        "https://api.github.com/repos/python/cpython/issues/45820"
+    ]
+
+    connection = mirror.open_mirror(mirror.mirror_path(settings))
+    pull_requests = mirror.load_pull_requests(connection, start_date, end_date)
+    issues = mirror.load_issues(connection, start_date)
+    connection.close()
+
+    assert [pr.number for pr in pull_requests] == [29601, 29537]
+    assert [issue.closed_by.login for issue in issues[1:]] == ["ambv", "ambv"]
+
+    pr_report = get_final_summary(pull_requests, ["ambv"], start_date, end_date)
+    issue_report = get_final_issues(issues, ["ambv"], start_date, end_date, 2)
+
+    assert [(item[2], item[4]) for item in pr_report] == [
+        (
+            "merged",
+            "<a href=https://github.com/python/cpython/pull/29601>"
+            "merged GH-29601</a>",
+        ),
+        (
+            "merged",
+            "<a href=https://github.com/python/cpython/pull/29537>"
+            "merged GH-29537</a>",
+        ),
+    ]
+    assert [(item[2], item[0]) for item in issue_report] == [
+        ("closed", "2021-11-16 12:00:00"),
+        ("closed", "2021-11-16 12:00:00"),
+        ("opened", "2021-11-17 08:00:00"),
+    ]
+
+
+def test_sync_for_an_older_report_reads_back_to_its_start(monkeypatch, tmp_path):
+    """the watermark only covers updates since the first sync's start"""
+    pr_sync_calls = []
+
+    def fake_iter_pull_requests_by_update(target_repo, since):
+        pr_sync_calls.append(since)
+        yield make_pull_request(29601, datetime.datetime(2021, 11, 17, 10))
+
+    monkeypatch.setattr(
+        mirror, "iter_pull_requests_by_update", fake_iter_pull_requests_by_update
+    )
+    monkeypatch.setattr(mirror, "iter_json_pages", lambda url, params: iter(()))
+    settings = config.Settings(cache_dir=str(tmp_path), start_date=start_date)
+    earlier = start_date - datetime.timedelta(weeks=4)
+
+    mirror.sync_mirror(settings)
+    mirror.sync_mirror(settings, since=earlier)
+    mirror.sync_mirror(settings, since=earlier + datetime.timedelta(weeks=1))
+
+    watermark = datetime.datetime(2021, 11, 17, 10) - mirror.sync_overlap
+    assert pr_sync_calls == [start_date, earlier, watermark]
+    connection = mirror.open_mirror(mirror.mirror_path(settings))
+    assert mirror.mirror_covers(connection, "issues", earlier)
+    assert not mirror.mirror_covers(
+        connection, "issues", earlier - datetime.timedelta(days=1)
+    )
+    connection.close()
+
+
+def test_truncated_discussion_round_trips(tmp_path):
+    """a PR whose discussion wasn't fully fetched still reads the timeline"""
+    connection = mirror.open_mirror(str(tmp_path / "mirror.sqlite3"))
+    pull_request = make_pull_request(29601, datetime.datetime(2021, 11, 17, 10))
+    pull_request.discussion_authors = None
+    mirror.store_pull_request(connection, pull_request)
+
+    (loaded,) = mirror.load_pull_requests(connection, start_date, end_date)
+
+    assert loaded.discussion_authors is None
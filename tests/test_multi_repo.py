@@ -0,0 +1,98 @@
+"""
+test combined multi-repo report built in worker processes from local mirrors
+no GitHub access needed
+"""
+
+import datetime
+
+import config
+import main
+import mirror
+from pr_records import BranchRef
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+from pr_records import UserRef
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import sort_final_data
+
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+
+
+def write_mirror(settings: config.Settings, number: int, merged_at):
+    """one merged PR and one issue closed by ambv"""
+    repo_name = settings.target_repo.split("/")[1]
+    connection = mirror.open_mirror(mirror.mirror_path(settings))
+    mirror.store_pull_request(
+        connection,
+        PullRequestRecord(
+            number=number,
+            title=f"fix {repo_name}",
+            html_url=f"https://github.com/{settings.target_repo}/pull/{number}",
+            state="closed",
+            created_at=merged_at - datetime.timedelta(days=1),
+            updated_at=merged_at,
+            closed_at=merged_at,
+            merged_at=merged_at,
+            merged=True,
+            merged_by=UserRef("ambv"),
+            user=UserRef("zooba"),
+            comments=0,
+            base=BranchRef("main"),
+            discussion_authors=set(),
+        ),
+    )
+    mirror.store_issue(
+        connection,
+        IssueRecord(
+            number=number + 1,
+            title=f"{repo_name} issue",
+            url=f"https://api.github.com/repos/{settings.target_repo}/issues/1",
+            html_url=f"https://github.com/{settings.target_repo}/issues/1",
+            state="closed",
+            user=UserRef("vstinner"),
+            closed_by=UserRef("ambv"),
+            created_at=merged_at,
+            updated_at=merged_at,
+            closed_at=merged_at,
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def test_repos_are_reported_in_parallel_with_a_repo_column(tmp_path):
+    settings = config.Settings(
+        target_repo=["python/cpython", "python/devguide"],
+        developer_ids=["ambv"],
+        start_date=start_date,
+        end_date=end_date,
+        source="mirror",
+        cache_dir=str(tmp_path),
+        processes=2,
+        github_token=None,
+    )
+    write_mirror(
+        config.Settings(target_repo="python/cpython", cache_dir=str(tmp_path)),
+        29601,
+        datetime.datetime(2021, 11, 16, 10),
+    )
+    write_mirror(
+        config.Settings(target_repo="python/devguide", cache_dir=str(tmp_path)),
+        750,
+        datetime.datetime(2021, 11, 17, 10),
+    )
+
+    report_items = main.run_multi_repo_report(settings)
+
+    assert sorted((item[6], item[1], item[2]) for item in report_items) == [
+        ("python/cpython", "Issue", "closed"),
+        ("python/cpython", "PR", "merged"),
+        ("python/devguide", "Issue", "closed"),
+        ("python/devguide", "PR", "merged"),
+    ]
+    report_lines = format_final_html_block(sort_final_data(report_items))
+    assert (
+        "<li> python/cpython  <a href=https://github.com/python/cpython/pull/29601>"
+        "merged GH-29601</a> [main] fix cpython/li>"
+    ) in report_lines
@@ -0,0 +1,119 @@
+"""
+test seeking to a report window in sorted listings, against the local
+fake_github server
+"""
+
+import datetime
+
+import pytest
+
+import config
+import fake_github
+import page_seek
+import pr_records
+import weekly_issues_summary
+
+full_name = "fake/cpython"
+window_start = datetime.datetime(2020, 11, 16)
+window_end = datetime.datetime(2020, 11, 23)
+
+
+@pytest.fixture(scope="module")
+def server():
+    repo = fake_github.generate_repo(
+        full_name, pull_requests=3000, issues=1500, years=2, seed=3
+    )
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as fake_server:
+        yield fake_server
+
+
+@pytest.fixture
+def settings(server):
+    return config.configure(
+        base_url=server.base_url,
+        cache_dir="",
+        max_request_rate=1000,
+        target_repo=full_name,
+    )
+
+
+def numbers(items) -> list:
+    return [item.number for item in items]
+
+
+def test_pull_request_seek_matches_full_scan_with_fewer_requests(server, settings):
+    listing = pr_records.PullRequestListing(full_name)
+    requests_before = server.requests_served
+    expected = [
+        pull_request
+        for pull_request in listing
+        if window_start <= pull_request.updated_at <= window_end
+    ]
+    scan_requests = server.requests_served - requests_before
+
+    requests_before = server.requests_served
+    found = list(listing.seek(window_start, window_end))
+    seek_requests = server.requests_served - requests_before
+
+    assert expected
+    assert numbers(found) == numbers(expected)
+    assert seek_requests < scan_requests / 2
+
+
+def test_issue_seek_matches_full_scan(server, settings):
+    listing = weekly_issues_summary.issue_listing(full_name, window_start)
+    expected = [
+        issue for issue in listing if window_start <= issue.created_at <= window_end
+    ]
+
+    found = list(page_seek.seek_window(listing, "created_at", window_start, window_end))
+
+    assert expected
+    assert numbers(found) == numbers(expected)
+
+
+class Item:
+    def __init__(self, number: int, day: int):
+        self.number = number
+        self.updated_at = datetime.datetime(2021, 1, day)
+
+
+def pages_of(days: list[int], per_page: int = 3) -> page_seek.PageCache:
+    items = [Item(number, day) for number, day in enumerate(days)]
+    return page_seek.PageCache(
+        lambda page: items[(page - 1) * per_page : page * per_page]
+    )
+
+
+@pytest.mark.parametrize(
+    "newest_day, expected_page",
+    [(30, 1), (28, 1), (27, 2), (24, 2), (23, 3), (18, 4), (17, 5), (1, None)],
+)
+def test_find_first_page(newest_day, expected_page):
+    # pages: [30 29 28] [27 26 24] [23 20 19] [18 18 18] [17 10 9]
+    days = [30, 29, 28, 27, 26, 24, 23, 20, 19, 18, 18, 18, 17, 10, 9]
+    pages = pages_of(days)
+    newest = datetime.datetime(2021, 1, newest_day)
+
+    assert page_seek.find_first_page(5, pages, "updated_at", newest) == expected_page
+
+
+def test_iter_window_stops_past_oldest_and_skips_repeated_items():
+    days = [30, 29, 28, 27, 26, 24, 23, 20, 19, 18, 18, 18, 17, 10, 9]
+    pages = pages_of(days)
+    found = page_seek.iter_window(
+        5,
+        pages,
+        "updated_at",
+        datetime.datetime(2021, 1, 19),
+        datetime.datetime(2021, 1, 26),
+    )
+
+    assert [item.updated_at.day for item in found] == [26, 24, 23, 20, 19]
+    # page 4 onwards never needed
+    assert pages.requests <= 4
+
+
+def test_seek_window_leaves_other_iterables_alone():
+    items = [Item(1, 5)]
+    assert page_seek.seek_window(items, "updated_at", None, None) is items
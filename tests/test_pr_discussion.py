@@ -0,0 +1,102 @@
+"""
+test review detection from timeline / review / comment payloads - no GitHub access
+"""
+import datetime
+
+import pr_discussion
+from weekly_pr_summary import check_developer_wrote_comments
+
+sample_timeline = [
+    {
+        "event": "commented",
+        "actor": {"login": "zooba"},
+        "user": {"login": "zooba"},
+        "created_at": "2021-11-16T08:00:00Z",
+    },
+    {
+        "event": "reviewed",
+        "user": {"login": "ambv"},
+        "state": "approved",
+        "submitted_at": "2021-11-16T09:00:00Z",
+    },
+    {
+        "event": "line-commented",
+        "comments": [
+            {"user": {"login": "pablogsal"}, "created_at": "2021-11-16T09:30:00Z"}
+        ],
+    },
+    {"event": "committed", "author": {"name": "Victor Stinner"}},
+    {
+        "event": "merged",
+        "actor": {"login": "miss-islington"},
+        "created_at": "2021-11-16T10:00:00Z",
+    },
+]
+
+
+class FakePullRequest:
+    """the PR attributes check_developer_wrote_comments reads"""
+
+    number = 29601
+
+
+def test_events_from_timeline():
+    """timeline entries become actor / action / timestamp records"""
+    events = pr_discussion.events_from_timeline(sample_timeline)
+
+    assert events == [
+        pr_discussion.DiscussionEvent(
+            "zooba", "commented", datetime.datetime(2021, 11, 16, 8, 0)
+        ),
+        pr_discussion.DiscussionEvent(
+            "ambv", "approved", datetime.datetime(2021, 11, 16, 9, 0)
+        ),
+        pr_discussion.DiscussionEvent(
+            "pablogsal", "commented", datetime.datetime(2021, 11, 16, 9, 30)
+        ),
+        pr_discussion.DiscussionEvent(
+            "miss-islington", "merged", datetime.datetime(2021, 11, 16, 10, 0)
+        ),
+    ]
+
+
+def test_events_from_reviews():
+    """commented reviews count as reviews, other states keep their name"""
+    events = pr_discussion.events_from_reviews(
+        [
+            {"user": {"login": "ambv"}, "state": "COMMENTED", "submitted_at": None},
+            {"user": None, "state": "CHANGES_REQUESTED", "submitted_at": None},
+        ]
+    )
+
+    assert [(event.actor, event.action) for event in events] == [
+        ("ambv", "reviewed"),
+        (None, "changes_requested"),
+    ]
+
+
+def test_merging_alone_is_not_a_review():
+    """only review-like actions count as developer activity"""
+    events = pr_discussion.events_from_timeline(sample_timeline)
+
+    assert pr_discussion.developers_active_in_discussion(
+        events, ["ambv", "miss-islington", "gvanrossum"]
+    ) == {"ambv"}
+
+
+def test_discussion_fetched_once_per_pr(monkeypatch):
+    """repeated checks of the same PR reuse the first download"""
+    fetched = []
+
+    def fake_fetch_discussion_events(pr_number):
+        fetched.append(pr_number)
+        return pr_discussion.events_from_timeline(sample_timeline)
+
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    monkeypatch.setattr(
+        pr_discussion, "fetch_discussion_events", fake_fetch_discussion_events
+    )
+
+    assert check_developer_wrote_comments(FakePullRequest(), ["ambv"]) is True
+    assert check_developer_wrote_comments(FakePullRequest(), ["gvanrossum"]) is False
+    assert fetched == [29601]
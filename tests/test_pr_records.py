@@ -0,0 +1,148 @@
+"""
+test PR snapshots built from list payloads, and when they fetch the full PR
+no GitHub access needed
+"""
+
+import datetime
+
+import config
+import pr_discussion
+import pr_records
+from pr_records import PullRequestListing
+from pr_records import PullRequestRecord
+from pr_records import PullRequestSnapshot
+from weekly_pr_summary import get_final_summary
+
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+api_url = "https://api.github.com/repos/python/cpython/pulls"
+
+
+def make_list_payload(number: int, author: str, updated: str, merged: str = None):
+    """PR list endpoint item; no merged, merged_by or comments fields"""
+    return {
+        "number": number,
+        "title": f"bpo-{number}: fix something",
+        "url": f"{api_url}/{number}",
+        "html_url": f"https://github.com/python/cpython/pull/{number}",
+        "review_comments_url": f"{api_url}/{number}/comments",
+        "state": "open" if merged is None else "closed",
+        "user": {"login": author},
+        "created_at": "2021-11-15T08:00:00Z",
+        "updated_at": updated,
+        "closed_at": merged,
+        "merged_at": merged,
+        "base": {"ref": "main"},
+    }
+
+
+def make_full_payload(list_payload: dict, comments: int) -> dict:
+    merged = list_payload["merged_at"] is not None
+    return {
+        **list_payload,
+        "merged": merged,
+        "merged_by": {"login": "ambv"} if merged else None,
+        "comments": comments,
+    }
+
+
+list_payloads = [
+    make_list_payload(29703, "zooba", "2021-11-19T10:00:00Z"),  # reviewed by ambv
+    make_list_payload(
+        29602, "vstinner", "2021-11-18T10:00:00Z", "2021-11-18T09:00:00Z"
+    ),
+    make_list_payload(29601, "ambv", "2021-11-17T10:00:00Z"),  # authored by ambv
+    make_list_payload(29510, "zooba", "2021-11-16T10:00:00Z"),  # not ours
+    make_list_payload(29100, "ambv", "2021-11-01T10:00:00Z"),  # before the window
+]
+comment_counts = {29703: 4, 29602: 1, 29601: 0, 29510: 2, 29100: 0}
+reviewers = {29703: ["ambv"], 29602: [], 29601: [], 29510: ["zooba"]}
+
+
+def test_snapshot_reads_list_payload_without_requests(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(pr_records, "get_json", fetched.append)
+
+    merged = PullRequestSnapshot.from_list_payload(list_payloads[1])
+    open_pr = PullRequestSnapshot.from_list_payload(list_payloads[0])
+
+    assert merged.merged is True
+    assert merged.merged_at == datetime.datetime(2021, 11, 18, 9)
+    assert open_pr.merged is False
+    assert open_pr.merged_by is None
+    assert open_pr.base.ref == "main"
+    assert fetched == []
+
+
+def test_snapshot_completes_once_per_pr(monkeypatch):
+    fetched = []
+
+    def fake_get_json(url):
+        fetched.append(url)
+        return make_full_payload(list_payloads[1], comments=1)
+
+    monkeypatch.setattr(pr_records, "get_json", fake_get_json)
+    snapshot = PullRequestSnapshot.from_list_payload(list_payloads[1])
+
+    assert snapshot.merged_by.login == "ambv"
+    assert snapshot.comments == 1
+    assert fetched == [f"{api_url}/29602"]
+
+
+def test_classification_completes_only_prs_that_need_it(monkeypatch):
+    """report matches fully fetched PRs; only the PR merged in the window and
+    the PR our developer reviewed need their full payload"""
+    payloads_by_url = {
+        payload["url"]: make_full_payload(payload, comment_counts[payload["number"]])
+        for payload in list_payloads
+    }
+    fetched = []
+
+    def fake_get_json(url):
+        fetched.append(url)
+        return payloads_by_url[url]
+
+    def fake_iter_json_pages(url, params=None):
+        assert url == api_url
+        yield list_payloads[:3]
+        yield list_payloads[3:]
+
+    def fake_get_json_page(url, params, page):
+        assert url == api_url
+        return [list_payloads[:3], list_payloads[3:]][page - 1], 2
+
+    monkeypatch.setattr(
+        config,
+        "settings",
+        config.Settings(developer_ids=["ambv"], cache_dir="", github_token=None),
+    )
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    monkeypatch.setattr(
+        pr_discussion,
+        "fetch_discussion_events",
+        lambda pr_number: [
+            pr_discussion.DiscussionEvent(login, "approved", None)
+            for login in reviewers[pr_number]
+        ],
+    )
+    monkeypatch.setattr(pr_records, "get_json", fake_get_json)
+    monkeypatch.setattr(pr_records, "iter_json_pages", fake_iter_json_pages)
+    monkeypatch.setattr(pr_records, "get_json_page", fake_get_json_page)
+    monkeypatch.setitem(pr_records.completion_statistics, "pull_requests", 0)
+
+    report = get_final_summary(
+        PullRequestListing("python/cpython"), ["ambv"], start_date, end_date
+    )
+
+    full_records = [
+        PullRequestRecord.from_rest_payload(payload)
+        for payload in payloads_by_url.values()
+    ]
+    assert report == get_final_summary(full_records, ["ambv"], start_date, end_date)
+    assert sorted((item[2], item[5].split()[1]) for item in report) == [
+        ("authored", "bpo-29601:"),
+        ("merged", "bpo-29602:"),
+        ("reviewed", "bpo-29703:"),
+    ]
+    assert sorted(fetched) == [f"{api_url}/29602", f"{api_url}/29703"]
+    assert pr_records.completion_statistics["pull_requests"] == 2
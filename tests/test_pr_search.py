@@ -0,0 +1,83 @@
+"""
+test Search API window splitting with a stand-in client - no GitHub access needed
+"""
+import datetime
+
+import pr_search
+
+
+class FakeSearchResults(list):
+    """list of issues with the totalCount attribute of a PaginatedList"""
+
+    def __init__(self, items, total_count):
+        super().__init__(items)
+        self.totalCount = total_count
+
+
+class FakeGithubHost:
+    """answers searches with a result count proportional to window length"""
+
+    def __init__(self, results_per_day):
+        self.results_per_day = results_per_day
+        self.queries = []
+
+    def search_issues(self, query, sort, order):
+        self.queries.append(query)
+        window = query.split("updated:")[1].split(" ")[0]
+        window_start, window_end = (
+            datetime.datetime.fromisoformat(part) for part in window.split("..")
+        )
+        days = (window_end - window_start) / datetime.timedelta(days=1)
+        return FakeSearchResults([], int(days * self.results_per_day))
+
+
+def test_build_search_query():
+    """query covers the whole window and one developer"""
+    query = pr_search.build_search_query(
+        "python/cpython",
+        "ambv",
+        datetime.datetime(2021, 11, 15),
+        datetime.datetime(2021, 11, 24),
+    )
+
+    assert query == (
+        "repo:python/cpython is:pr "
+        "updated:2021-11-15T00:00:00+00:00..2021-11-24T00:00:00+00:00 "
+        "involves:ambv"
+    )
+
+
+def test_small_window_is_not_split():
+    """a week with few results is a single search"""
+    github_host = FakeGithubHost(results_per_day=50)
+    windows = list(
+        pr_search.search_windows(
+            github_host,
+            "python/cpython",
+            "ambv",
+            datetime.datetime(2021, 11, 15),
+            datetime.datetime(2021, 11, 22),
+        )
+    )
+
+    assert len(windows) == 1
+    assert len(github_host.queries) == 1
+
+
+def test_large_window_is_split_below_result_cap():
+    """windows hitting the 1,000 result cap are halved until under the cap"""
+    github_host = FakeGithubHost(results_per_day=300)
+    windows = list(
+        pr_search.search_windows(
+            github_host,
+            "python/cpython",
+            "ambv",
+            datetime.datetime(2021, 11, 15),
+            datetime.datetime(2021, 11, 23),
+        )
+    )
+
+    assert len(windows) == 4
+    assert all(
+        results.totalCount < pr_search.search_result_limit for results in windows
+    )
@@ -0,0 +1,230 @@
+"""
+test rate limit scheduler pacing and retries with canned responses, and
+redirects against a local HTTP server
+no GitHub access needed
+"""
+
+import http.server
+import threading
+import time
+
+import requests
+
+from rate_limit import RateLimitScheduler
+from rate_limit import ScheduledSession
+from rate_limit import SchedulerManager
+from rate_limit import rate_limit_delay
+from rate_limit import rate_limit_resource
+from rate_limit import send_with_scheduler
+
+
+def make_response(status_code: int, headers: dict, body: bytes = b"{}"):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+def make_request(url: str = "https://api.github.com/repos/python/cpython/pulls"):
+    return requests.Request("GET", url).prepare()
+
+
+def test_rate_limit_delay_reads_primary_and_secondary_limits():
+    """Retry-After wins, exhausted budgets wait for the reset, other 403s pass"""
+    reset = int(time.time()) + 30
+
+    assert rate_limit_delay(make_response(200, {})) is None
+    assert rate_limit_delay(make_response(403, {"Retry-After": "7"})) == 7
+    assert (
+        29
+        <= rate_limit_delay(
+            make_response(
+                403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}
+            )
+        )
+        <= 32
+    )
+    assert (
+        rate_limit_delay(
+            make_response(
+                403, {}, b'{"message": "You have exceeded a secondary rate limit"}'
+            )
+        )
+        == 60
+    )
+    assert rate_limit_delay(make_response(403, {}, b'{"message": "Forbidden"}')) is None
+
+
+def test_rate_limit_resource_from_url():
+    assert rate_limit_resource("https://api.github.com/search/issues?q=x") == "search"
+    assert rate_limit_resource("https://api.github.com/graphql") == "graphql"
+    assert rate_limit_resource("https://api.github.com/repos/python/cpython") == "core"
+
+
+def test_secondary_limit_is_waited_out_and_retried():
+    """a Retry-After response is resent after the pause, with concurrency halved"""
+    scheduler = RateLimitScheduler(max_rate=100, max_concurrency=8)
+    replies = [make_response(403, {"Retry-After": "0.2"}), make_response(200, {})]
+    sent = []
+
+    def send(request, **kwargs):
+        sent.append(time.monotonic())
+        return replies.pop(0)
+
+    response = scheduler.send(send, make_request())
+
+    assert response.status_code == 200
+    assert len(sent) == 2
+    assert sent[1] - sent[0] >= 0.2
+    assert scheduler.statistics["retries"] == 1
+    assert scheduler.concurrency == 4
+
+
+def test_gives_up_after_max_retries():
+    """the last rate limited response is returned once retries run out"""
+    scheduler = RateLimitScheduler(max_rate=100, max_concurrency=2, max_retries=1)
+
+    response = scheduler.send(
+        lambda request, **kwargs: make_response(429, {"Retry-After": "0"}),
+        make_request(),
+    )
+
+    assert response.status_code == 429
+    assert scheduler.statistics["requests"] == 2
+
+
+def test_concurrency_grows_back_after_successes():
+    scheduler = RateLimitScheduler(max_rate=1000, max_concurrency=4)
+    scheduler.concurrency = 1
+
+    for _ in range(10):
+        scheduler.send(lambda request, **kwargs: make_response(200, {}), make_request())
+
+    assert scheduler.concurrency == 4
+
+
+def test_token_bucket_caps_request_rate():
+    """after the initial burst, requests are spaced by 1 / max_rate"""
+    scheduler = RateLimitScheduler(max_rate=50, max_concurrency=8)
+
+    started = time.monotonic()
+    for _ in range(75):
+        scheduler.acquire()
+        scheduler.release()
+
+    assert time.monotonic() - started >= 0.45
+
+
+def test_low_budget_is_spread_until_reset():
+    """with a few requests left, each resource request waits its share of the time"""
+    scheduler = RateLimitScheduler(max_rate=1000, max_concurrency=8)
+    scheduler.observe(
+        "core",
+        make_response(
+            200,
+            {
+                "X-RateLimit-Remaining": "4",
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Reset": str(int(time.time()) + 1),
+            },
+        ),
+    )
+
+    started = time.monotonic()
+    for _ in range(3):
+        scheduler.acquire("core")
+        scheduler.release()
+    # the search budget is separate and not slowed down
+    scheduler.acquire("search")
+    scheduler.release()
+
+    assert time.monotonic() - started >= 0.2
+
+
+def test_lowercase_rate_limit_headers_update_budget():
+    """HTTP/2 responses, and often GitHub's, carry lowercase header names"""
+    scheduler = RateLimitScheduler(max_rate=1000, max_concurrency=8)
+    reset = int(time.time()) + 60
+    replies = [
+        make_response(
+            200,
+            {
+                "x-ratelimit-remaining": "4",
+                "x-ratelimit-limit": "5000",
+                "x-ratelimit-reset": str(reset),
+                "x-ratelimit-resource": "core",
+            },
+        )
+    ]
+
+    send_with_scheduler(
+        scheduler, 0, lambda request, **kwargs: replies.pop(0), make_request()
+    )
+
+    assert scheduler.budgets["core"] == (4, 5000, reset)
+
+
+class RedirectHandler(http.server.BaseHTTPRequestHandler):
+    """moves /old to /new, like a renamed GitHub repo"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/old":
+            self.send_response(301)
+            self.send_header("Location", "/new")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"moved": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_redirects_take_one_slot_at_a_time():
+    """following a redirect at concurrency 1 must not wait for its own slot"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RedirectHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheduler = RateLimitScheduler(max_rate=100, max_concurrency=1)
+    session = ScheduledSession(scheduler)
+    responses = []
+
+    request = threading.Thread(
+        target=lambda: responses.append(
+            session.get(f"http://127.0.0.1:{server.server_address[1]}/old")
+        ),
+        daemon=True,
+    )
+    request.start()
+    request.join(timeout=5)
+    server.shutdown()
+
+    assert not request.is_alive()
+    (response,) = responses
+    assert response.json() == {"moved": True}
+    assert [hop.status_code for hop in response.history] == [301]
+    assert scheduler.snapshot()["requests"] == 2
+    assert scheduler.in_flight == 0
+
+
+def test_scheduler_shared_through_manager_proxy():
+    """worker processes use the scheduler through a proxy of the same methods"""
+    with SchedulerManager() as manager:
+        scheduler = manager.RateLimitScheduler(100, 4)
+        replies = [make_response(429, {"Retry-After": "0"}), make_response(200, {})]
+
+        response = send_with_scheduler(
+            scheduler, 3, lambda request, **kwargs: replies.pop(0), make_request()
+        )
+
+        assert response.status_code == 200
+        assert scheduler.snapshot()["requests"] == 2
+        assert scheduler.snapshot()["retries"] == 1
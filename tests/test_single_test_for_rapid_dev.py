@@ -5,12 +5,17 @@ separate file for debugging of single tests
 import datetime
 import logging
 
+import pytest
+
+import config
 from config import developer_ids
-from config import repo
 from weekly_pr_summary import filter_prs_from_date_range
 
 logging.basicConfig(encoding="utf-8", level=logging.WARN)
 
+# recorded on the first run, replayed offline after; see conftest.github_cassette
+pytestmark = pytest.mark.usefixtures("github_cassette")
+
 
 def test_get_one_closed_not_merged_pr29440():
     """
@@ -22,7 +27,7 @@ def test_get_one_closed_not_merged_pr29440():
     start_date = datetime.datetime(2021, 11, 15, 00, 00, 00)
     end_date = datetime.datetime(2021, 11, 21, 23, 59, 59)
 
-    list_with_pull_report = [repo.get_pull(29440)]
+    list_with_pull_report = [config.settings.repo.get_pull(29440)]
 
     (
         closed_not_merged_pr_we_care_about,
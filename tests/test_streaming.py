@@ -0,0 +1,123 @@
+"""
+test the streaming pipeline against the list based one, and page by page reads
+no GitHub access needed
+"""
+
+import datetime
+
+import github
+
+import config
+from pr_records import IssueRecord
+from pr_records import UserRef
+from streaming import iter_pages
+from streaming import stream_report_items
+from tests.conftest import make_pull_request
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import get_final_summary
+from weekly_pr_summary import iter_html_block
+from weekly_pr_summary import sort_final_data
+
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+
+pull_requests = [
+    make_pull_request(29703, "2021-11-29 09:00", "2021-11-30 10:00"),
+    make_pull_request(
+        29602, "2021-11-20 08:00", "2021-11-23 12:00", "2021-11-23 11:00"
+    ),
+    make_pull_request(29601, "2021-11-16 08:00", "2021-11-21 18:00"),
+    make_pull_request(
+        29510, "2021-11-18 08:00", "2021-11-19 10:00", "2021-11-19 09:00"
+    ),
+    make_pull_request(29400, "2021-10-01 08:00", "2021-11-01 10:00"),
+]
+
+issues = [
+    IssueRecord(
+        number=45800,
+        title="[3.10] crash in tokenizer",
+        url="https://api.github.com/repos/python/cpython/issues/45800",
+        state="closed",
+        user=UserRef("vstinner"),
+        closed_by=UserRef("ambv"),
+        created_at=datetime.datetime(2021, 11, 17, 9, 0),
+        updated_at=datetime.datetime(2021, 11, 18, 9, 0),
+        closed_at=datetime.datetime(2021, 11, 18, 9, 0),
+    ),
+    # listed after 45800 (created earlier), reported before it (updated earlier)
+    IssueRecord(
+        number=45790,
+        title="[3.11] typo in asyncio docs",
+        url="https://api.github.com/repos/python/cpython/issues/45790",
+        state="open",
+        user=UserRef("ambv"),
+        closed_by=None,
+        created_at=datetime.datetime(2021, 11, 16, 9, 0),
+        updated_at=datetime.datetime(2021, 11, 18, 8, 0),
+        closed_at=None,
+    ),
+]
+
+
+class FakePaginatedList(github.PaginatedList.PaginatedList):
+    """PaginatedList serving canned pages, counting the pages requested"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get_page(self, page):
+        self.requested.append(page)
+        return self.pages[page] if page < len(self.pages) else []
+
+
+def test_iter_pages_reads_one_page_at_a_time():
+    listing = FakePaginatedList([[1, 2], [3, 4], [5]])
+    items = iter_pages(listing)
+
+    assert [next(items), next(items), next(items)] == [1, 2, 3]
+    assert listing.requested == [0, 1]
+    assert list(items) == [4, 5]
+    assert listing.requested == [0, 1, 2, 3]
+
+
+def test_iter_pages_stops_with_the_caller():
+    """breaking out early, as the PR filter does, fetches no further pages"""
+    listing = FakePaginatedList([[1, 2], [3, 4], [5]])
+
+    for item in iter_pages(listing):
+        if item == 2:
+            break
+
+    assert listing.requested == [0]
+
+
+def test_streamed_report_matches_list_pipeline(monkeypatch, tmp_path):
+    settings = config.Settings(
+        developer_ids=["ambv"],
+        start_date=start_date,
+        end_date=end_date,
+        end_date_buffer=2,
+        cache_dir="",
+        github_token=None,
+    )
+    monkeypatch.setattr(config, "settings", settings)
+    progress_path = tmp_path / "GitHub_summary.txt.partial"
+    listing = FakePaginatedList([pull_requests[:2], pull_requests[2:4], []])
+
+    report_items = stream_report_items(listing, issues, settings, progress_path)
+
+    list_pipeline = get_final_summary(
+        pull_requests, ["ambv"], start_date, end_date
+    ) + get_final_issues(issues, ["ambv"], start_date, end_date, 2)
+    # issues in get_final_issues' updated_at order, not listing order
+    assert report_items == list_pipeline
+    assert list(iter_html_block(sort_final_data(report_items))) == (
+        format_final_html_block(sort_final_data(list_pipeline))
+    )
+    # every item reached the progress file
+    progress_lines = progress_path.read_text().splitlines()
+    assert sorted(progress_lines) == sorted("\t".join(item) for item in report_items)
+    assert any("merged GH-29510" in line for line in progress_lines)
@@ -0,0 +1,122 @@
+"""
+test team mode: per-developer reports from one crawl and one discussion analysis
+no GitHub access needed
+"""
+
+import datetime
+
+import config
+import pr_discussion
+from pr_records import BranchRef
+from pr_records import IssueRecord
+from pr_records import PullRequestRecord
+from pr_records import UserRef
+from team_report import build_team_reports
+from team_report import developer_report_path
+from weekly_issues_summary import get_final_issues
+from weekly_pr_summary import format_final_html_block
+from weekly_pr_summary import get_final_summary
+from weekly_pr_summary import sort_final_data
+
+team = ["ambv", "zooba", "vstinner"]
+start_date = datetime.datetime(2021, 11, 15)
+end_date = datetime.datetime(2021, 11, 22)
+
+
+def make_pull_request(number: int, author: str, updated: datetime.datetime):
+    return PullRequestRecord(
+        number=number,
+        title=f"PR {number}",
+        html_url=f"https://github.com/python/cpython/pull/{number}",
+        state="open",
+        created_at=updated - datetime.timedelta(hours=1),
+        updated_at=updated,
+        merged=False,
+        user=UserRef(author),
+        comments=3,
+        base=BranchRef("main"),
+    )
+
+
+class CountingPullRequests:
+    """iterable PR listing that counts how often it is walked"""
+
+    def __init__(self, pull_requests):
+        self.pull_requests = pull_requests
+        self.walks = 0
+
+    def __iter__(self):
+        self.walks += 1
+        return iter(self.pull_requests)
+
+
+pull_requests = [
+    make_pull_request(29800, "zooba", datetime.datetime(2021, 11, 25, 10)),
+    make_pull_request(29703, "ambv", datetime.datetime(2021, 11, 19, 10)),
+    make_pull_request(29602, "vstinner", datetime.datetime(2021, 11, 17, 10)),
+    make_pull_request(29100, "ambv", datetime.datetime(2021, 11, 1, 10)),
+]
+
+issues = [
+    IssueRecord(
+        number=45800,
+        title="crash in tokenizer",
+        url="https://api.github.com/repos/python/cpython/issues/45800",
+        state="open",
+        user=UserRef("zooba"),
+        created_at=datetime.datetime(2021, 11, 16, 9),
+        updated_at=datetime.datetime(2021, 11, 16, 9),
+    ),
+]
+
+# who reviewed which PR
+reviewers = {29800: [], 29703: ["zooba", "vstinner"], 29602: ["ambv"], 29100: []}
+
+
+def test_team_reports_from_one_crawl(monkeypatch):
+    fetched = []
+
+    def fake_fetch_discussion_events(pr_number):
+        fetched.append(pr_number)
+        return [
+            pr_discussion.DiscussionEvent(login, "approved", None)
+            for login in reviewers[pr_number]
+        ]
+
+    settings = config.Settings(
+        developer_ids=team,
+        start_date=start_date,
+        end_date=end_date,
+        end_date_buffer=2,
+        cache_dir="",
+        github_token=None,
+    )
+    monkeypatch.setattr(config, "settings", settings)
+    monkeypatch.setattr(pr_discussion, "_discussion_events_by_pr", {})
+    monkeypatch.setattr(
+        pr_discussion, "fetch_discussion_events", fake_fetch_discussion_events
+    )
+    listing = CountingPullRequests(pull_requests)
+
+    developer_reports, team_report = build_team_reports(listing, issues, settings)
+
+    assert listing.walks == 1
+    # each PR's discussion is analyzed once for the whole team
+    assert sorted(fetched) == [29602, 29703]
+    for developer in team:
+        separate_run = get_final_summary(
+            pull_requests, [developer], start_date, end_date
+        ) + get_final_issues(issues, [developer], start_date, end_date, 2)
+        assert developer_reports[developer] == format_final_html_block(
+            sort_final_data(separate_run)
+        )
+    assert sorted(fetched) == [29602, 29703]
+
+    reviewed = [line for line in team_report if "reviewed GH-29703" in line]
+    assert sorted(line.split()[1] for line in reviewed) == ["vstinner", "zooba"]
+
+
+def test_developer_report_path():
+    assert developer_report_path("out/GitHub_summary.txt", "ambv") == (
+        "out/GitHub_summary_ambv.txt"
+    )
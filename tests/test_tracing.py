@@ -0,0 +1,92 @@
+"""
+test tracing spans, http accounting and Chrome trace export
+no GitHub access needed
+"""
+
+import datetime
+import json
+
+import requests
+
+import tracing
+from utilities import timer_decorator
+
+
+def make_response(body: bytes, from_cache: bool = False, elapsed: float = 0.05):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response._content_consumed = True
+    response.url = "https://api.github.com/repos/python/cpython/pulls/29601"
+    response.request = requests.Request("GET", response.url).prepare()
+    response.elapsed = datetime.timedelta(seconds=elapsed)
+    response.from_cache = from_cache
+    return response
+
+
+def test_disabled_tracer_records_nothing(monkeypatch):
+    tracer = tracing.Tracer()
+    monkeypatch.setattr(tracing, "tracer", tracer)
+
+    with tracing.span("phase"):
+        tracing.response_hook(make_response(b"{}"))
+
+    assert tracing.span("phase") is tracing.span("other")  # shared no-op
+    assert tracer.spans == []
+    assert tracer.totals["http_calls"] == 0
+
+
+def test_http_calls_are_counted_in_every_open_span(monkeypatch):
+    tracer = tracing.Tracer()
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    tracer.enable()
+
+    with tracing.span("get_final_summary") as phase:
+        with tracing.span("PR 29601", "pull_request", number=29601) as pull_request:
+            tracing.response_hook(make_response(b"x" * 300))
+            tracing.response_hook(make_response(b"x" * 300, from_cache=True))
+        with tracing.span("PR 29602", "pull_request", number=29602):
+            tracing.response_hook(make_response(b"x" * 100))
+
+    assert pull_request.args["http_calls"] == 2
+    assert pull_request.args["bytes_received"] == 300
+    assert pull_request.args["cache_hits"] == 1
+    assert pull_request.args["number"] == 29601
+    assert phase.args["http_calls"] == 3
+    assert phase.args["bytes_received"] == 400
+    assert tracer.totals["http_calls"] == 3
+    assert [span.name for span in tracer.expensive_spans("http")] == [
+        "GET /repos/python/cpython/pulls/29601"
+    ] * 3
+
+
+def test_expensive_spans_and_chrome_trace(monkeypatch):
+    tracer = tracing.Tracer()
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    tracer.enable()
+
+    @timer_decorator
+    def summarize():
+        for number, elapsed in ((1, 0.0), (2, 0.02), (3, 0.01)):
+            with tracing.span(f"PR {number}", "pull_request"):
+                started = datetime.datetime.now()
+                while (datetime.datetime.now() - started).total_seconds() < elapsed:
+                    pass
+
+    summarize()
+
+    assert [span.name for span in tracer.expensive_spans("pull_request", 2)] == [
+        "PR 2",
+        "PR 3",
+    ]
+    trace = json.loads(json.dumps(tracer.chrome_trace()))
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == ["summarize", "PR 1", "PR 2", "PR 3"]
+    assert all(event["ph"] == "X" for event in events)
+    # the decorated function's span encloses the PR spans
+    outer = events[0]
+    assert all(
+        outer["ts"] <= event["ts"]
+        and event["ts"] + event["dur"] <= outer["ts"] + outer["dur"]
+        for event in events[1:]
+    )
@@ -0,0 +1,100 @@
+"""
+test pooled keep-alive transport against a local HTTP/1.1 server
+no GitHub access needed
+"""
+
+import concurrent.futures
+import gzip
+import http.server
+import json
+import threading
+
+import pytest
+
+import config
+import transport
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that keeps connections open and gzips its json body"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode()
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            encoding = "gzip"
+        else:
+            encoding = "identity"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """keep-alive http server on a free local port, shut down after the test"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_sequential_requests_reuse_one_connection(local_server):
+    """gzip bodies are decoded and every request after the first reuses the socket"""
+    session = transport.build_session(config.Settings(cache_dir=""))
+
+    for number in range(5):
+        response = session.get(f"{local_server}/pulls/{number}")
+        assert response.json() == {"path": f"/pulls/{number}"}
+
+    statistics = session.get_adapter("http://").statistics.snapshot()
+    assert statistics == {"requests": 5, "connections_opened": 1, "reuse_rate": 0.8}
+
+
+def test_threads_share_pool_up_to_its_size(local_server):
+    """concurrent callers never open more connections than the pool holds"""
+    session = transport.build_session(
+        config.Settings(cache_dir="", pool_size=4, concurrency=4, workers=1)
+    )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(10):
+            list(
+                executor.map(
+                    lambda number: session.get(f"{local_server}/issues/{number}"),
+                    range(4),
+                )
+            )
+
+    statistics = session.get_adapter("http://").statistics.snapshot()
+    assert statistics["requests"] == 40
+    assert statistics["connections_opened"] <= 4
+
+
+def test_http2_adapter_returns_requests_responses(local_server, tmp_path):
+    """httpx-backed adapter works with the response cache and reuses connections"""
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    session = transport.build_session(
+        config.Settings(cache_dir=str(tmp_path), cache_max_mb=1, http2=True)
+    )
+    assert isinstance(session.get_adapter("http://"), transport.CachingHTTP2Adapter)
+
+    responses = [session.get(f"{local_server}/pulls/{number}") for number in (1, 2)]
+
+    assert [response.json()["path"] for response in responses] == [
+        "/pulls/1",
+        "/pulls/2",
+    ]
+    assert "Content-Encoding" not in responses[0].headers
+    statistics = session.get_adapter("http://").statistics.snapshot()
+    assert statistics["connections_opened"] == 1
@@ -0,0 +1,131 @@
+"""
+test keeping a report up to date with --watch, against the local fake_github
+server
+"""
+
+import datetime
+import time
+
+import pytest
+
+import config
+import fake_github
+import main
+import watch
+
+full_name = "fake/cpython"
+developers = ["ambv", "zooba", "vstinner"]
+window = (datetime.datetime(2021, 11, 15), datetime.datetime(2021, 11, 22))
+
+
+@pytest.fixture
+def repo():
+    return fake_github.generate_repo(full_name, pull_requests=1500, seed=7)
+
+
+def configure(server):
+    return config.configure(
+        target_repo=full_name,
+        developer_ids=developers,
+        start_date=window[0],
+        end_date=window[1],
+        base_url=server.base_url,
+        cache_dir="",
+        max_request_rate=1000,
+    )
+
+
+def test_first_cycle_matches_normal_report(repo, tmp_path):
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        main.main(
+            [
+                "--repo",
+                full_name,
+                "--developers",
+                *developers,
+                "--start-date",
+                "2021-11-15",
+                "--end-date",
+                "2021-11-21",
+                "--base-url",
+                server.base_url,
+                "--cache-dir",
+                "",
+                "--max-request-rate",
+                "1000",
+                "--output",
+                str(tmp_path / "report.txt"),
+            ]
+        )
+        configure(server)
+        watch.watch_report(str(tmp_path / "watched.txt"), window, max_cycles=1)
+
+    assert (tmp_path / "watched.txt").read_text() == (
+        tmp_path / "report.txt"
+    ).read_text()
+
+
+def test_later_cycles_read_only_changes(repo, tmp_path, monkeypatch):
+    output = tmp_path / "watched.txt"
+    sleeps = []
+
+    def get_issue(url):
+        raise AssertionError(f"closer of {url} not found in the issue events")
+
+    # closers come from the issue events, like a normal run's
+    monkeypatch.setattr(watch, "get_json", get_issue)
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        configure(server)
+        watcher = watch.watch_report(
+            str(output), window, max_cycles=2, sleep=sleeps.append
+        )
+        first_report = output.read_text()
+        assert len(sleeps) == 1
+
+        # nothing changed: nothing is classified again
+        requests_before = server.requests_served
+        assert watcher.update() == 0
+        assert server.requests_served - requests_before == 2
+
+        # one of our developers closes an issue opened in the window
+        issue = next(
+            issue
+            for issue in repo.issues.values()
+            if issue.closed_at is None
+            and issue.author not in developers
+            and window[0] <= issue.created_at < window[1]
+        )
+        latest = max(item.updated_at for item in repo.issues.values())
+        issue.closed_at = issue.updated_at = latest + datetime.timedelta(minutes=1)
+        issue.closed_by = "zooba"
+        repo.changed()
+
+        requests_before = server.requests_served
+        assert watcher.update() == 1
+        # issues page, the newest issue events page, and a 304 for the PR page
+        assert server.requests_served - requests_before == 3
+
+        watch.write_report_atomically(
+            str(output),
+            watch.format_final_html_block(
+                watch.sort_final_data(watcher.report_items())
+            ),
+        )
+    report = output.read_text()
+    assert report != first_report
+    assert f"/issues/{issue.number} " not in first_report
+    assert f"/issues/{issue.number} " in report
+    assert not (tmp_path / "watched.txt.partial").exists()
+
+
+def test_poll_seconds_follows_remaining_budget():
+    reset = time.time() + 3600
+    # plenty of budget: the minimum interval
+    assert watch.poll_seconds((5000, 5000, reset), 2, 60) == 60
+    # 100 requests left for an hour at 10 per cycle: 5 cycles in that hour
+    assert watch.poll_seconds((100, 5000, reset), 10, 60) == pytest.approx(
+        720, rel=0.01
+    )
+    # exhausted budget: wait, but never longer than the maximum
+    assert watch.poll_seconds((0, 5000, reset), 10, 60) == watch.max_poll_seconds
+    assert watch.poll_seconds(None, 10, 60) == 60
@@ -0,0 +1,216 @@
+"""
+test building reports from stored webhook deliveries, replayed locally from the
+history of a fake_github repo
+"""
+
+import json
+
+import pytest
+import requests
+
+import fake_github
+import main
+import webhooks
+
+full_name = "fake/cpython"
+
+
+def report_arguments(output_path, *extra) -> list:
+    return [
+        "--repo",
+        full_name,
+        "--developers",
+        "ambv",
+        "zooba",
+        "vstinner",
+        "--start-date",
+        "2021-11-15",
+        "--end-date",
+        "2021-11-21",
+        "--cache-dir",
+        "",
+        "--max-request-rate",
+        "1000",
+        "--output",
+        str(output_path),
+        *extra,
+    ]
+
+
+def test_report_from_webhooks_matches_crawled_report(tmp_path):
+    repo = fake_github.generate_repo(full_name, pull_requests=1500, seed=9)
+    with fake_github.FakeGitHub([repo], rate_limit=100000) as server:
+        main.main(
+            report_arguments(tmp_path / "crawled.txt", "--base-url", server.base_url)
+        )
+        deliveries = repo.webhook_deliveries(server.base_url)
+        base_url = server.base_url
+
+    store_path = tmp_path / "events.jsonl"
+    with webhooks.WebhookServer(webhooks.EventStore(str(store_path))) as endpoint:
+        stored = webhooks.replay_deliveries(endpoint.url, deliveries)
+    assert stored == len(deliveries) == endpoint.deliveries
+
+    # the fake server is gone: any GitHub call would fail the run
+    main.main(
+        report_arguments(
+            tmp_path / "webhooks.txt",
+            "--base-url",
+            base_url,
+            "--source",
+            "webhooks",
+            "--event-store",
+            str(store_path),
+        )
+    )
+    assert (tmp_path / "webhooks.txt").read_text() == (
+        tmp_path / "crawled.txt"
+    ).read_text()
+
+
+def test_saved_deliveries_replay_with_signatures(tmp_path):
+    repo = fake_github.generate_repo(full_name, pull_requests=20, seed=1)
+    deliveries = repo.webhook_deliveries("https://api.github.com")[:3]
+    for position, (event, payload) in enumerate(deliveries):
+        delivery_file = tmp_path / "deliveries" / f"{position:03d}.json"
+        delivery_file.parent.mkdir(exist_ok=True)
+        delivery_file.write_text(json.dumps({"event": event, "payload": payload}))
+
+    store = webhooks.EventStore(str(tmp_path / "events.jsonl"))
+    with webhooks.WebhookServer(store, secret="s3cret") as endpoint:
+        files = webhooks.read_delivery_files([str(tmp_path / "deliveries")])
+        assert webhooks.replay_deliveries(endpoint.url, files, "s3cret") == 3
+
+        with pytest.raises(requests.HTTPError, match="401"):
+            webhooks.replay_deliveries(endpoint.url, deliveries[:1], "wrong")
+        # events reports don't use are acknowledged, not stored
+        assert webhooks.replay_deliveries(endpoint.url, [("ping", {})], "s3cret") == 0
+
+    assert [stored["payload"] for stored in store] == [
+        payload for _, payload in deliveries
+    ]
+
+
+def test_fold_keeps_newest_state_of_out_of_order_deliveries():
+    repository = {"full_name": full_name}
+    pull_request = {
+        "number": 7,
+        "title": "bpo-1: fix",
+        "url": "https://api.github.com/repos/fake/cpython/pulls/7",
+        "issue_url": "https://api.github.com/repos/fake/cpython/issues/7",
+        "html_url": "https://github.com/fake/cpython/pull/7",
+        "review_comments_url": "https://api.github.com/repos/fake/cpython/pulls/7/c",
+        "state": "open",
+        "user": {"login": "zooba"},
+        "created_at": "2021-11-15T10:00:00Z",
+        "updated_at": "2021-11-15T10:00:00Z",
+        "closed_at": None,
+        "merged_at": None,
+        "merged": False,
+        "merged_by": None,
+        "comments": 0,
+        "base": {"ref": "main"},
+    }
+    merged = {
+        **pull_request,
+        "state": "closed",
+        "updated_at": "2021-11-16T10:00:00Z",
+        "closed_at": "2021-11-16T10:00:00Z",
+        "merged_at": "2021-11-16T10:00:00Z",
+        "merged": True,
+        "merged_by": {"login": "ambv"},
+    }
+    fold = webhooks.EventFold(full_name)
+    fold.add(
+        "pull_request",
+        {
+            "action": "closed",
+            "pull_request": merged,
+            "repository": repository,
+            "sender": {"login": "ambv"},
+        },
+    )
+    # the opened delivery arrives late, and a review arrives without merged_by
+    fold.add(
+        "pull_request",
+        {
+            "action": "opened",
+            "pull_request": pull_request,
+            "repository": repository,
+            "sender": {"login": "zooba"},
+        },
+    )
+    fold.add(
+        "pull_request_review",
+        {
+            "action": "submitted",
+            "review": {"user": {"login": "vstinner"}, "state": "approved"},
+            "pull_request": {
+                key: value
+                for key, value in merged.items()
+                if key not in ("merged_by", "comments")
+            },
+            "repository": repository,
+            "sender": {"login": "vstinner"},
+        },
+    )
+    fold.add("issues", {"action": "opened", "repository": {"full_name": "a/b"}})
+
+    (record,) = fold.pull_request_records()
+    assert record.state == "closed"
+    assert record.merged_by.login == "ambv"
+    assert record.discussion_authors == {"ambv", "vstinner"}
+    (issue,) = fold.issue_records()
+    assert issue.closed_by.login == "ambv"
+
+
+def test_pull_request_seen_only_in_a_review_is_left_out():
+    """review deliveries carry a PR without comments, merged or merged_by"""
+    repository = {"full_name": full_name}
+    simple_pull_request = {
+        "number": 8,
+        "title": "bpo-2: fix",
+        "url": "https://api.github.com/repos/fake/cpython/pulls/8",
+        "issue_url": "https://api.github.com/repos/fake/cpython/issues/8",
+        "html_url": "https://github.com/fake/cpython/pull/8",
+        "state": "open",
+        "user": {"login": "zooba"},
+        "created_at": "2021-11-15T10:00:00Z",
+        "updated_at": "2021-11-16T10:00:00Z",
+        "closed_at": None,
+        "merged_at": None,
+        "base": {"ref": "main"},
+    }
+    fold = webhooks.EventFold(full_name)
+    fold.add(
+        "pull_request_review",
+        {
+            "action": "submitted",
+            "review": {"user": {"login": "ambv"}, "state": "approved"},
+            "pull_request": simple_pull_request,
+            "repository": repository,
+            "sender": {"login": "ambv"},
+        },
+    )
+    assert fold.pull_request_records() == []
+
+    # the PR's own delivery completes it, the review is kept
+    fold.add(
+        "pull_request",
+        {
+            "action": "opened",
+            "pull_request": {
+                **simple_pull_request,
+                "review_comments_url": f"{simple_pull_request['url']}/comments",
+                "updated_at": "2021-11-15T10:00:00Z",
+                "comments": 0,
+                "merged": False,
+                "merged_by": None,
+            },
+            "repository": repository,
+            "sender": {"login": "zooba"},
+        },
+    )
+    (record,) = fold.pull_request_records()
+    assert record.comments == 0
+    assert record.discussion_authors == {"ambv"}